@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class ActionCancelled(BaseException):
+    """La acción se canceló o superó su tiempo límite.
+
+    Deriva de BaseException (como asyncio.CancelledError) para que los
+    except Exception de las acciones no la absorban.
+    """
+
+
+_local = threading.local()
+
+
+def interruptible_sleep(seconds):
+    """time.sleep que se corta si se cancela la acción en curso (lanza ActionCancelled)"""
+    job = getattr(_local, 'job', None)
+    if job is None:
+        time.sleep(seconds)
+    elif job.cancel_event.wait(seconds):
+        raise ActionCancelled(job.name)
+
+
+class _Job:
+    __slots__ = ('name', 'fn', 'args', 'kwargs', 'timeout', 'future', 'cancel_event')
+
+    def __init__(self, name, fn, args, kwargs, timeout):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.future = Future()
+        self.cancel_event = threading.Event()
+
+
+class _Lane:
+    __slots__ = ('queue', 'current', 'thread')
+
+    def __init__(self):
+        self.queue = deque()
+        self.current = None
+        self.thread = None
+
+
+class ActionExecutor:
+    """Ejecuta acciones en segundo plano, en orden dentro de cada destino.
+
+    Cada destino ('browser', 'audio'...) tiene su cola y su hilo: las
+    acciones del mismo destino no se adelantan entre sí y las de destinos
+    distintos corren en paralelo (además, pycaw/COM siempre se usa desde el
+    mismo hilo). submit() devuelve un Future.
+
+    Una acción que supera su tiempo límite recibe TimeoutError en su Future
+    y se le pide que pare (interruptible_sleep lanza ActionCancelled). Su
+    destino no pasa a la siguiente hasta que la acción vuelve: nunca hay dos
+    hilos por destino. Una acción colgada que no comprueba la cancelación
+    retiene sólo su destino; los demás siguen.
+    """
+
+    def __init__(self, timeout=15.0):
+        self.timeout = timeout
+        self._lanes = {}
+        self._cond = threading.Condition()
+        self._running = True
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'timed_out': 0}
+
+    def submit(self, target, fn, *args, name=None, timeout=None, **kwargs):
+        """Encola fn(*args, **kwargs) en el destino dado"""
+        job = _Job(name or getattr(fn, '__name__', 'acción'), fn, args, kwargs,
+                   self.timeout if timeout is None else timeout)
+        with self._cond:
+            if not self._running:
+                raise RuntimeError('El ejecutor de acciones está cerrado')
+            lane = self._lanes.get(target)
+            if lane is None:
+                lane = self._lanes[target] = _Lane()
+                self._start_worker(target, lane)
+            lane.queue.append(job)
+            self._stats['submitted'] += 1
+            self._cond.notify_all()
+        return job.future
+
+    def _start_worker(self, target, lane):
+        lane.thread = threading.Thread(target=self._work, args=(target, lane), name=f'actions-{target}', daemon=True)
+        lane.thread.start()
+
+    def _work(self, target, lane):
+        while True:
+            with self._cond:
+                while self._running and not lane.queue:
+                    self._cond.wait()
+                if not lane.queue:
+                    return
+                job = lane.queue.popleft()
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                lane.current = job
+            self._run(target, lane, job)
+
+    def _run(self, target, lane, job):
+        timer = None
+        if job.timeout:
+            timer = threading.Timer(job.timeout, self._expire, (target, lane, job))
+            timer.daemon = True
+            timer.start()
+        _local.job = job
+        result = error = None
+        try:
+            result = job.fn(*job.args, **job.kwargs)
+        except ActionCancelled as e:
+            error = e
+        except Exception as e:
+            logging.error(f"Error al ejecutar acción {job.name}: {e}")
+            error = e
+        finally:
+            _local.job = None
+            if timer is not None:
+                timer.cancel()
+        with self._cond:
+            if lane.current is job:
+                lane.current = None
+            if not job.future.done():
+                if error is None:
+                    self._stats['completed'] += 1
+                    job.future.set_result(result)
+                else:
+                    self._stats['cancelled' if isinstance(error, ActionCancelled) else 'failed'] += 1
+                    job.future.set_exception(error)
+            self._cond.notify_all()
+
+    def _expire(self, target, lane, job):
+        with self._cond:
+            if lane.current is not job or job.future.done():
+                return
+            logging.warning('Acción %s sin terminar tras %.1f s, se cancela (%s espera a que pare)',
+                            job.name, job.timeout, target)
+            job.cancel_event.set()
+            job.future.set_exception(TimeoutError(f'{job.name} superó {job.timeout} s'))
+            self._stats['timed_out'] += 1
+            # El mismo hilo sigue con la cola cuando la acción vuelva (orden y COM en un solo hilo)
+            self._cond.notify_all()
+
+    def cancel(self, target=None):
+        """Descarta las acciones pendientes (de un destino o de todos) y pide parar a las que corren"""
+        count = 0
+        with self._cond:
+            for name, lane in self._lanes.items():
+                if target is not None and name != target:
+                    continue
+                cancelled = sum(job.future.cancel() for job in lane.queue)
+                self._stats['cancelled'] += cancelled
+                count += cancelled
+                lane.queue.clear()
+                if lane.current is not None:
+                    lane.current.cancel_event.set()
+                    count += 1
+            self._cond.notify_all()
+        return count
+
+    def pending(self, target=None):
+        """Acciones en cola o en curso"""
+        with self._cond:
+            return sum(len(lane.queue) + (lane.current is not None)
+                       for name, lane in self._lanes.items() if target is None or name == target)
+
+    def wait_idle(self, timeout=None):
+        """Espera a que no quede ninguna acción en cola ni en curso"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while any(lane.queue or lane.current is not None for lane in self._lanes.values()):
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self, cancel_pending=False):
+        """Deja de aceptar acciones; los hilos terminan al vaciar sus colas"""
+        if cancel_pending:
+            self.cancel()
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return dict(self._stats, pending=sum(len(lane.queue) + (lane.current is not None)
+                                                 for lane in self._lanes.values()))
@@ -0,0 +1,365 @@
+import logging
+import math
+import threading
+import time
+import wave
+from array import array
+from collections import deque, namedtuple
+
+from endpointing import Endpointer, EndpointEvent
+
+# Fragmento de voz listo para reconocer (PCM mono); start y end en time.perf_counter()
+Segment = namedtuple('Segment', ['data', 'sample_rate', 'sample_width', 'start', 'end'])
+
+
+class CaptureClosed(Exception):
+    """La captura terminó (fuente agotada o detenida) y no quedan segmentos por leer"""
+
+
+def frame_energy(frame):
+    """Energía RMS de un bloque PCM de 16 bits"""
+    samples = array('h', frame)
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class MicrophoneSource:
+    """Micrófono del sistema (PyAudio a través de speech_recognition)"""
+
+    def __init__(self, device_index=None, sample_rate=16000, chunk=1024):
+        self.device_index = device_index
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.chunk = chunk
+        self._mic = None
+
+    def open(self):
+        import speech_recognition as sr
+        self._mic = sr.Microphone(device_index=self.device_index, sample_rate=self.sample_rate,
+                                  chunk_size=self.chunk)
+        self._mic.__enter__()
+        self.sample_rate = self._mic.SAMPLE_RATE
+        self.sample_width = self._mic.SAMPLE_WIDTH
+
+    def read(self):
+        return self._mic.stream.read(self.chunk)
+
+    def close(self):
+        if self._mic is not None:
+            self._mic.__exit__(None, None, None)
+            self._mic = None
+
+
+class WavSource:
+    """Fuente de audio desde un archivo WAV mono de 16 bits (pruebas sin tarjeta de sonido)"""
+
+    def __init__(self, path, chunk=1024, realtime=False):
+        self.path = path
+        self.chunk = chunk
+        # realtime: entrega los bloques al ritmo real, como haría un micrófono
+        self.realtime = realtime
+        self._wav = None
+
+    def open(self):
+        self._wav = wave.open(self.path, 'rb')
+        if self._wav.getnchannels() != 1 or self._wav.getsampwidth() != 2:
+            raise ValueError(f'{self.path}: se necesita WAV mono de 16 bits')
+        self.sample_rate = self._wav.getframerate()
+        self.sample_width = 2
+
+    def read(self):
+        frame = self._wav.readframes(self.chunk)
+        if not frame:
+            return None
+        if self.realtime:
+            time.sleep(self.chunk / self.sample_rate)
+        return frame
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+class SyntheticSource:
+    """Fuente de audio a partir de un iterable de bloques PCM de 16 bits"""
+
+    def __init__(self, frames, sample_rate=16000, realtime=False):
+        self.frames = frames
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.realtime = realtime
+        self._it = None
+
+    @classmethod
+    def from_pattern(cls, pattern, sample_rate=16000, chunk=1024, **kwargs):
+        """Crea la fuente a partir de [(segundos, amplitud), ...]: 0 es silencio, >0 un tono de 440 Hz"""
+        def frames():
+            for seconds, amplitude in pattern:
+                total = int(seconds * sample_rate)
+                for start in range(0, total, chunk):
+                    n = min(chunk, total - start)
+                    yield array('h', (int(amplitude * math.sin(2 * math.pi * 440 * (start + i) / sample_rate))
+                                      for i in range(n))).tobytes()
+        return cls(frames(), sample_rate=sample_rate, **kwargs)
+
+    def open(self):
+        self._it = iter(self.frames)
+
+    def read(self):
+        frame = next(self._it, None)
+        if frame is not None and self.realtime:
+            time.sleep(len(frame) / (self.sample_width * self.sample_rate))
+        return frame
+
+    def close(self):
+        self._it = None
+
+
+class AudioCapture:
+    """Captura continua en un hilo: búfer circular de bloques, umbral de ruido adaptativo y segmentación.
+
+    listen() ya no abre el dispositivo ni calibra: sólo consume los segmentos
+    de voz que el hilo de captura va dejando en el búfer. El ruido de fondo
+    se estima con un percentil bajo de la energía de los últimos noise_window
+    segundos, haya voz o no (un zumbido constante acaba contando como ruido).
+    Si la fuente falla se vuelve a abrir con esperas crecientes; si se agota,
+    next_segment() lanza CaptureClosed en vez de devolver None al momento.
+    """
+
+    def __init__(self, source, buffer_seconds=30, energy_threshold=300, dynamic_ratio=1.5,
+                 min_threshold=50, noise_adapt=0.05, pause_threshold=1.0, phrase_time_limit=5,
+                 phrase_threshold=0.3, pre_roll=0.3, endpointer=None, noise_window=5.0,
+                 noise_percentile=0.1, max_backoff=10.0):
+        self.source = source
+        self.buffer_seconds = buffer_seconds
+        self.dynamic_ratio = dynamic_ratio
+        self.min_threshold = min_threshold
+        self.noise_adapt = noise_adapt
+        # Decide dónde empieza y acaba cada frase; por defecto, silencio y duración fijos
+        self.endpointer = endpointer or Endpointer.fixed(pause_threshold, phrase_time_limit)
+        # Mínimo de voz para considerar un segmento (descarta golpes y clics)
+        self.phrase_threshold = phrase_threshold
+        self.pre_roll = pre_roll
+        # Nivel de ruido de fondo: sigue al percentil noise_percentile de la energía reciente
+        self.noise_floor = energy_threshold / dynamic_ratio
+        self.noise_window = noise_window
+        self.noise_percentile = noise_percentile
+        self._energies = deque()
+        # Espera máxima entre reintentos de abrir la fuente tras un error
+        self.max_backoff = max_backoff
+
+        self.on_speech_start = None   # callback opcional (p. ej. cortar la voz de Leya)
+        # Se llaman en el hilo de captura con cada EndpointEvent (inicio y final de frase)
+        self.endpoint_listeners = []
+        # Se llaman en el hilo de captura con cada bloque: fn(frame, voiced, sample_rate)
+        self.frame_listeners = []
+        self._ring = deque()
+        self._seq = 0                 # nº de secuencia del siguiente bloque
+        self._segments = deque()      # (primer bloque, último bloque, inicio, fin)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._reset_segmenter()
+
+    @property
+    def energy_threshold(self):
+        return max(self.min_threshold, self.noise_floor * self.dynamic_ratio)
+
+    @property
+    def in_speech(self):
+        return self._speech_start is not None
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """Abre la fuente y arranca el hilo de captura"""
+        if self._running:
+            return
+        self.source.open()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='audio-capture', daemon=True)
+        self._thread.start()
+        logging.info('Captura de audio iniciada (%d Hz)', self.source.sample_rate)
+
+    def stop(self):
+        """Detiene la captura y cierra la fuente"""
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        with self._cond:
+            self._cond.notify_all()
+
+    def _reset_segmenter(self):
+        self._speech_start = None     # seq del primer bloque del segmento en curso
+        self._speech_time = None
+        self.endpointer.reset()
+
+    def _run(self):
+        backoff = 0.5
+        try:
+            while self._running:
+                try:
+                    frame = self.source.read()
+                except Exception as e:
+                    logging.error(f"Error en captura de audio: {e}")
+                    backoff = self._reopen(backoff)
+                    continue
+                if frame is None:
+                    break
+                backoff = 0.5
+                self._push(frame)
+        finally:
+            self._running = False
+            self.source.close()
+            with self._cond:
+                # Cierra el segmento pendiente al agotarse la fuente
+                event = self._emit(self._seq - 1, 'eof') if self._speech_start is not None else None
+                self._cond.notify_all()
+            self._notify(event)
+
+    def _reopen(self, backoff):
+        """Cierra la fuente y la vuelve a abrir tras backoff segundos; devuelve la próxima espera"""
+        try:
+            self.source.close()
+        except Exception as e:
+            logging.error(f"Error al cerrar la fuente de audio: {e}")
+        while self._running:
+            deadline = time.time() + backoff
+            while self._running and time.time() < deadline:
+                time.sleep(min(0.1, deadline - time.time()))
+            backoff = min(backoff * 2, self.max_backoff)
+            if not self._running:
+                break
+            try:
+                self.source.open()
+                logging.info('Fuente de audio reabierta')
+                return backoff
+            except Exception as e:
+                logging.error(f"Error al reabrir la fuente de audio: {e}")
+        return backoff
+
+    def _adapt_noise(self, energy, seconds):
+        """Acerca el nivel de ruido al percentil bajo de la energía reciente (con o sin voz)"""
+        self._energies.append(energy)
+        window = max(1, int(self.noise_window / seconds)) if seconds else len(self._energies)
+        while len(self._energies) > window:
+            self._energies.popleft()
+        # Con menos de un segundo de audio el percentil aún no es fiable
+        if seconds and len(self._energies) * seconds < 1.0:
+            return
+        target = sorted(self._energies)[int(self.noise_percentile * (len(self._energies) - 1))]
+        self.noise_floor += self.noise_adapt * (target - self.noise_floor)
+
+    def _push(self, frame):
+        """Guarda un bloque en el búfer circular y actualiza la segmentación"""
+        seconds = len(frame) / (self.source.sample_width * self.source.sample_rate)
+        energy = frame_energy(frame)
+        event = None
+        with self._cond:
+            self._ring.append(frame)
+            max_frames = max(1, int(self.buffer_seconds / seconds)) if seconds else len(self._ring)
+            while len(self._ring) > max_frames:
+                self._ring.popleft()
+            seq = self._seq
+            self._seq += 1
+
+            self._adapt_noise(energy, seconds)
+            voiced = self.endpointer.is_voice(frame, energy, self.energy_threshold, self.noise_floor)
+            result = self.endpointer.update(seconds, voiced)
+            if result == 'start':
+                pre = int(self.pre_roll / seconds) if seconds else 0
+                self._speech_start = max(seq - pre, self._seq - len(self._ring))
+                self._speech_time = time.perf_counter()
+                # La duración máxima cuenta también el audio previo incluido
+                self.endpointer.length = (seq - self._speech_start + 1) * seconds
+                event = EndpointEvent('start', None, self._seq * seconds, 0.0)
+            elif result is not None:
+                event = self._emit(seq, result)
+        if result == 'start' and self.on_speech_start:
+            self.on_speech_start()
+        self._notify(event)
+        for listener in self.frame_listeners:
+            try:
+                listener(frame, voiced, self.source.sample_rate)
+            except Exception as e:
+                logging.error(f"Error en oyente de audio: {e}")
+
+    def _emit(self, last_seq, reason):
+        """Registra el segmento en curso como listo (llamar con el lock tomado); devuelve el evento de final"""
+        seconds = self._frame_seconds()
+        event = EndpointEvent('end', reason, (last_seq + 1) * seconds, (last_seq - self._speech_start + 1) * seconds)
+        if self.endpointer.voiced < self.phrase_threshold:
+            self._reset_segmenter()
+            return event._replace(reason='discarded')
+        self._segments.append((self._speech_start, last_seq, self._speech_time, time.perf_counter()))
+        self._reset_segmenter()
+        self._cond.notify_all()
+        return event
+
+    def _frame_seconds(self):
+        frame = self._ring[-1] if self._ring else b''
+        return len(frame) / (self.source.sample_width * self.source.sample_rate)
+
+    def _notify(self, event):
+        if event is None:
+            return
+        for listener in self.endpoint_listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logging.error(f"Error en oyente de audio: {e}")
+
+    def _frames(self, first, last):
+        oldest = self._seq - len(self._ring)
+        if first < oldest:
+            logging.warning('Segmento de audio parcialmente sobrescrito en el búfer')
+            first = oldest
+        return b''.join(self._ring[i - oldest] for i in range(first, last + 1))
+
+    def next_segment(self, timeout=None):
+        """Espera el siguiente segmento de voz.
+
+        timeout limita la espera hasta que empieza a hablarse (como en
+        Recognizer.listen); una frase ya empezada se espera hasta su final.
+        Devuelve None si no hubo voz y lanza CaptureClosed si la captura ya
+        terminó y no quedan segmentos.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while not self._segments:
+                if not self._running:
+                    raise CaptureClosed('la captura de audio está detenida')
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0 and self._speech_start is None:
+                    return None
+                self._cond.wait(0.1 if remaining is None or remaining <= 0 else min(remaining, 0.1))
+            first, last, start, end = self._segments.popleft()
+            data = self._frames(first, last)
+        return Segment(data, self.source.sample_rate, self.source.sample_width, start, end)
+
+    def flush(self, before=None):
+        """Descarta los segmentos pendientes y el que esté en curso (p. ej. la propia voz de Leya).
+
+        Con before (perf_counter) sólo los que empezaron antes de ese instante.
+        """
+        with self._cond:
+            if before is None:
+                self._segments.clear()
+                self._reset_segmenter()
+                return
+            self._segments = deque(s for s in self._segments if s[2] >= before)
+            if self._speech_start is not None and self._speech_time < before:
+                self._reset_segmenter()
+
+    def restart_segment(self):
+        """Descarta lo captado hasta ahora; si se está hablando, el segmento sigue desde el próximo bloque"""
+        with self._cond:
+            self._segments.clear()
+            if self._speech_start is not None:
+                self._speech_start = self._seq
+                self._speech_time = time.perf_counter()
+                self.endpointer.restart()
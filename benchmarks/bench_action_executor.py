@@ -0,0 +1,131 @@
+"""Ráfagas de comandos con actuadores falsos: ejecución en línea frente al ejecutor de acciones.
+
+El navegador (webbrowser, pyautogui) y el volumen del sistema se sustituyen
+por actuadores que tardan lo indicado. Se mide cuánto tiempo queda ocupado el
+bucle de escucha con la ráfaga, cuánto tarda en completarse todo y se
+comprueba que cada destino ejecuta sus acciones en el orden recibido. Al
+final se prueba la cancelación a mitad de ráfaga.
+
+    python benchmarks/bench_action_executor.py --burst 40 --browser-ms 150 --audio-ms 30
+"""
+import argparse
+import logging
+import tempfile
+import threading
+import time
+
+from common import make_assistant
+from action_executor import interruptible_sleep
+
+COMMANDS = ['abrir youtube', 'nueva pestaña', 'sube volumen', 'baja un poco', 'sube el volumen a 40',
+            'recargar', 'baja volumen', 'buscar recetas', 'abrir correo', 'más volumen']
+
+
+class FakeActuator:
+    """Sustituye a webbrowser/pyautogui: cada llamada tarda latency segundos (cancelable)"""
+
+    def __init__(self, latency, returns=None):
+        self.latency = latency
+        self.returns = returns or {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+
+        def call(*args, **kwargs):
+            interruptible_sleep(self.latency)
+            with self._lock:
+                self.calls += 1
+            return self.returns.get(attr)
+        return call
+
+
+class FakeVolume:
+    def __init__(self, latency):
+        self.latency = latency
+        self.level = 0.5
+
+    def GetMasterVolumeLevelScalar(self):
+        return self.level
+
+    def SetMasterVolumeLevelScalar(self, level, context):
+        interruptible_sleep(self.latency)
+        self.level = level
+
+
+def build(tmp, async_actions, browser_latency, audio_latency):
+    import config
+    config.ASYNC_ACTIONS = async_actions
+    assistant = make_assistant(tmp, {})
+    import leya
+    leya.webbrowser = FakeActuator(browser_latency)
+    leya.pyautogui = FakeActuator(browser_latency, {'size': (1920, 1080)})
+    assistant._audio_checked = True
+    assistant.volume_ctrl = FakeVolume(audio_latency)
+    # Orden real de ejecución por destino
+    started = {'browser': [], 'audio': []}
+    run_intent = assistant._run_intent
+
+    def recording(intent, command):
+        target = leya.ACTION_TARGETS.get(intent.name)
+        if target:
+            started[target].append(command)
+        return run_intent(intent, command)
+    assistant._run_intent = recording
+    return assistant, started
+
+
+def burst(assistant, commands):
+    t0 = time.perf_counter()
+    blocked = []
+    for cmd in commands:
+        t = time.perf_counter()
+        assistant.process_command(cmd)
+        blocked.append(time.perf_counter() - t)
+    loop_busy = time.perf_counter() - t0
+    if assistant.executor is not None:
+        assistant.executor.wait_idle()
+    return loop_busy, time.perf_counter() - t0, max(blocked)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--burst', type=int, default=40)
+    parser.add_argument('--browser-ms', type=float, default=150)
+    parser.add_argument('--audio-ms', type=float, default=30)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    commands = [COMMANDS[i % len(COMMANDS)] for i in range(args.burst)]
+    import leya
+    expected = {'browser': [], 'audio': []}
+    print(f"{'modo':<10} {'bucle ocupado':>14} {'peor comando':>13} {'total':>9} {'cmd/s':>7} {'orden':>6}")
+    for label, async_actions in (('en línea', False), ('ejecutor', True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            assistant, started = build(tmp, async_actions, args.browser_ms / 1000, args.audio_ms / 1000)
+            if not expected['browser']:
+                for cmd in commands:
+                    intent = assistant.dispatcher.resolve(cmd)
+                    expected[leya.ACTION_TARGETS[intent.name]].append(cmd)
+            busy, total, worst = burst(assistant, commands)
+            ordered = started == expected
+            print(f'{label:<10} {busy * 1e3:>11.0f} ms {worst * 1e3:>10.0f} ms {total * 1e3:>6.0f} ms '
+                  f'{len(commands) / total:>7.1f} {"ok" if ordered else "MAL":>6}')
+
+            if async_actions:
+                # Cancelación: se encola otra ráfaga y se cancela enseguida
+                for cmd in commands:
+                    assistant.process_command(cmd)
+                t = time.perf_counter()
+                assistant.process_command('cancelar')
+                assistant.executor.wait_idle()
+                stats = assistant.executor.stats()
+                print(f"cancelar: {stats['cancelled']} acciones descartadas, todo parado en "
+                      f"{(time.perf_counter() - t) * 1e3:.0f} ms")
+            assistant.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Acciones del navegador: atajos de teclado simulados frente a CDP contra el servidor falso.
+
+Ejecuta la misma secuencia de comandos de navegador con el control por
+teclado (pyautogui sustituido por un registro, pero con sus pausas fijas; cada
+webbrowser.open lanza un proceso como el real) y con CDP sobre fake_cdp, que
+responde tras --browser-ms. Mide la latencia por comando y la lectura de la
+URL activa de "crear comando", comprueba que CDP sólo recurre al teclado
+para el zoom (el de Chrome, Ctrl+/-) y compara la conexión persistente con
+abrir una conexión por orden.
+
+    python benchmarks/bench_browser_control.py --rounds 5 --browser-ms 2
+"""
+import argparse
+import logging
+import statistics
+import subprocess
+import tempfile
+import time
+
+import common
+from cdp import CdpBrowser, CdpConnection
+from fake_cdp import FakeCdpServer
+from window_probe import FakeBackend, ProcessProbe
+
+COMMANDS = ['nueva pestaña', 'abrir youtube', 'buscar recetas', 'volver', 'adelante', 'recargar',
+            'acercar pantalla', 'alejar pantalla', 'baja un poco', 'cerrar pestaña', 'reabrir pestaña',
+            'pantalla completa']
+
+
+class SpawningBrowser:
+    """webbrowser.open real sin abrir nada: lanza un proceso por llamada"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def open(self, url, *args, **kwargs):
+        self.calls += 1
+        subprocess.run(['true'])
+        return True
+
+
+def build(tmp, backend, port):
+    import config
+    config.ASYNC_ACTIONS = False
+    config.BROWSER_BACKEND = backend
+    config.CDP_PORT = port
+    assistant = common.make_assistant(tmp, {})
+    import leya
+    leya.webbrowser = SpawningBrowser()
+    assistant.probe = ProcessProbe(FakeBackend(['chrome'], foreground='chrome'))
+    assistant.chrome_opened = True
+    return assistant, leya
+
+
+def run(assistant, rounds):
+    latencies = {cmd: [] for cmd in COMMANDS}
+    for _ in range(rounds):
+        for cmd in COMMANDS:
+            t = time.perf_counter()
+            assistant.process_command(cmd)
+            latencies[cmd].append(time.perf_counter() - t)
+    reads = []
+    for _ in range(rounds):
+        t = time.perf_counter()
+        assistant._active_url()
+        reads.append(time.perf_counter() - t)
+    return latencies, reads
+
+
+def connection_cost(port, calls):
+    """Orden confirmada por la conexión persistente frente a una conexión nueva por orden"""
+    browser = CdpBrowser(port=port)
+    browser.available()
+    t = time.perf_counter()
+    for _ in range(calls):
+        browser.call('Target.getTargets')
+    pooled = (time.perf_counter() - t) / calls
+    browser.close()
+    ws_url = f'ws://127.0.0.1:{port}/devtools/browser/fake'
+    t = time.perf_counter()
+    for _ in range(calls):
+        conn = CdpConnection(ws_url)
+        conn.call('Target.getTargets')
+        conn.close()
+    fresh = (time.perf_counter() - t) / calls
+    return pooled, fresh
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--browser-ms', type=float, default=2)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    server = FakeCdpServer(latency=args.browser_ms / 1000).start()
+    results = {}
+    for backend in ('keyboard', 'cdp'):
+        with tempfile.TemporaryDirectory() as tmp:
+            assistant, leya = build(tmp, backend, server.port)
+            before, keys_before = len(server.chrome.log), len(leya.pyautogui.calls)
+            latencies, reads = run(assistant, args.rounds)
+            keys = len(leya.pyautogui.calls) - keys_before
+            results[backend] = (latencies, reads, keys, len(server.chrome.log) - before, leya.webbrowser.calls)
+            assistant.close()
+
+    print(f"{'comando':<20} {'teclado':>10} {'cdp':>10}")
+    for cmd in COMMANDS:
+        kb = statistics.median(results['keyboard'][0][cmd]) * 1e3
+        cdp = statistics.median(results['cdp'][0][cmd]) * 1e3
+        print(f'{cmd:<20} {kb:>7.1f} ms {cdp:>7.1f} ms')
+    for label, index in (('total secuencia', 0), ('leer URL activa', 1)):
+        row = []
+        for backend in ('keyboard', 'cdp'):
+            data = results[backend][index]
+            values = [sum(per_round) for per_round in zip(*data.values())] if index == 0 else data
+            row.append(statistics.median(values) * 1e3)
+        print(f'{label:<20} {row[0]:>7.1f} ms {row[1]:>7.1f} ms')
+    for backend in ('keyboard', 'cdp'):
+        _, _, keys, cdp_calls, opened = results[backend]
+        print(f'{backend}: {keys} pulsaciones simuladas, {opened} procesos de webbrowser.open, '
+              f'{cdp_calls} órdenes CDP confirmadas')
+    tab = server.chrome.tab()
+    print(f'estado final del navegador falso: {len(server.chrome.tabs)} pestañas, activa {tab.url}, '
+          f'ventana {server.chrome.window_state}')
+
+    pooled, fresh = connection_cost(server.port, 200)
+    print(f'orden confirmada: {pooled * 1e3:.2f} ms con conexión persistente, '
+          f'{fresh * 1e3:.2f} ms abriendo una conexión por orden')
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Importación masiva de comandos: uno a uno frente a import_commands en una transacción.
+
+Genera N marcadores sintéticos (con un 5 % de duplicados y un 2 % de
+entradas no válidas) en JSON, CSV y HTML de marcadores, los importa en un
+asistente vacío y mide lectura+validación+escritura, la reindexación
+(TF-IDF, que debe reconstruirse una sola vez, y el índice aproximado) y el
+total. Como referencia, añade --legacy comandos uno a uno con
+add_custom_command partiendo de un almacén vacío y de uno con N comandos.
+También exporta y reimporta cada formato para comprobar que nada cambia.
+
+    python benchmarks/bench_bulk_import.py --entries 100000 --legacy 2000
+"""
+import argparse
+import csv
+import html
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+
+from common import make_assistant, synthetic_commands
+from command_index import CommandIndex
+from command_io import export_commands, import_commands
+from command_store import CommandStore
+
+
+def make_entries(n, seed=0):
+    rng = random.Random(seed)
+    names = synthetic_commands(n, seed=seed)
+    entries = []
+    for i, name in enumerate(names):
+        r = rng.random()
+        if r < 0.02:
+            entries.append((name, 'javascript:void(0)'))
+        elif r < 0.07 and entries:
+            entries.append((rng.choice(entries)[0], f'https://dup.example.com/{i}'))
+        else:
+            entries.append((name.title(), f'https://example.com/{i}?q={name.replace(" ", "+")}'))
+    return entries
+
+
+def write_inputs(entries, folder):
+    paths = {}
+    paths['json'] = os.path.join(folder, 'commands.json')
+    with open(paths['json'], 'w', encoding='utf-8') as f:
+        json.dump([{'command': n, 'url': u} for n, u in entries], f, ensure_ascii=False)
+    paths['csv'] = os.path.join(folder, 'commands.csv')
+    with open(paths['csv'], 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name', 'url'])
+        writer.writerows(entries)
+    paths['html'] = os.path.join(folder, 'bookmarks.html')
+    with open(paths['html'], 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE NETSCAPE-Bookmark-file-1>\n<DL><p>\n')
+        for n, u in entries:
+            f.write(f'    <DT><A HREF="{html.escape(u)}" ADD_DATE="1700000000">{html.escape(n)}</A>\n')
+        f.write('</DL><p>\n')
+    return paths
+
+
+def time_store_writes():
+    """Tiempo dentro de command_io.import_commands (lectura, validación y escritura)"""
+    import leya
+    spent = []
+    original = leya.import_commands
+
+    def timed(*args, **kwargs):
+        t = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            spent.append(time.perf_counter() - t)
+    leya.import_commands = timed
+    return spent
+
+
+def count_rebuilds():
+    calls = []
+    original = CommandIndex.rebuild
+
+    def rebuild(self, commands):
+        t = time.perf_counter()
+        original(self, commands)
+        calls.append(time.perf_counter() - t)
+    CommandIndex.rebuild = rebuild
+    return calls
+
+
+def legacy(entries, limit, existing):
+    """Segundos por comando añadiendo limit comandos uno a uno sobre un almacén con existing"""
+    seeded = {f'previo {i}': f'https://example.com/p{i}' for i in range(existing)}
+    with tempfile.TemporaryDirectory() as tmp:
+        assistant = make_assistant(tmp, seeded, cache=False)
+        t = time.perf_counter()
+        for name, url in entries[:limit]:
+            assistant.add_custom_command(name.lower(), url)
+        elapsed = time.perf_counter() - t
+        assistant.close()
+    return elapsed / limit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--legacy', type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    entries = make_entries(args.entries)
+    rebuilds = count_rebuilds()
+    writes = time_store_writes()
+    with tempfile.TemporaryDirectory() as data:
+        paths = write_inputs(entries, data)
+        print(f"{'formato':<7} {'tamaño':>8} {'importar':>10} {'reindexar':>10} {'total':>9} "
+              f"{'entradas/s':>11} {'reconstr.':>9}  resultado")
+        for fmt, path in paths.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                assistant = make_assistant(tmp, {}, cache=False)
+                del rebuilds[:], writes[:]
+                progress = []
+                t = time.perf_counter()
+                report = assistant.import_commands(path, on_progress=progress.append)
+                total = time.perf_counter() - t
+                size = os.path.getsize(path) / 1e6
+                print(f'{fmt:<7} {size:>5.1f} MB {sum(writes) * 1e3:>7.0f} ms {(total - sum(writes)) * 1e3:>7.0f} ms '
+                      f'{total:>7.2f} s {args.entries / total:>11.0f} {len(rebuilds):>9}  {report}')
+                assert report.added == len(assistant.store), 'el almacén no coincide con lo importado'
+                assert assistant.resolve_command(next(iter(assistant.store.commands()))).kind == 'intent'
+
+                # Ida y vuelta: exportar y reimportar en un almacén nuevo
+                original = dict(assistant.store.items())
+                out = os.path.join(tmp, 'export' + os.path.splitext(path)[1])
+                export_commands(assistant.store, out)
+                copy = CommandStore(os.path.join(tmp, 'copy.db'))
+                import_commands(copy, out)
+                same = dict(copy.items()) == original
+                copy.close()
+                print(f'{"":<7} exportar y reimportar: {"idéntico" if same else "DIFERENTE"}; '
+                      f'{len(progress)} avisos de progreso')
+                assistant.close()
+
+    if args.legacy:
+        for existing in (0, args.entries):
+            per = legacy(entries, args.legacy, existing)
+            print(f'uno a uno (add_custom_command) con {existing} ya guardados: {per * 1e3:.2f} ms/comando '
+                  f'-> {args.entries} comandos en ~{per * args.entries:.0f} s')
+
+if __name__ == '__main__':
+    main()
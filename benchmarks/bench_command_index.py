@@ -0,0 +1,63 @@
+"""Mide el coste por inserción de un comando según el tamaño del índice.
+
+Compara el índice incremental (CommandIndex.add) con el reentrenamiento
+completo de TfidfVectorizer que se hacía antes en add_custom_command.
+
+    python benchmarks/bench_command_index.py --sizes 1000 5000 20000
+"""
+import argparse
+import statistics
+import time
+
+from common import spanish_tokenizer, synthetic_commands
+from command_index import CommandIndex
+
+
+def bench_incremental(tokenize, base, extra):
+    index = CommandIndex(tokenizer=tokenize)
+    index.rebuild(base)
+    times = []
+    for cmd in extra:
+        t0 = time.perf_counter()
+        index.add(cmd)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def bench_refit(tokenize, base, extra):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    commands = list(base)
+    times = []
+    for cmd in extra:
+        t0 = time.perf_counter()
+        commands.append(cmd)
+        vectorizer = TfidfVectorizer(tokenizer=tokenize, token_pattern=None, ngram_range=(1, 2))
+        vectorizer.fit(commands)
+        vectorizer.transform(commands)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000, 50000])
+    parser.add_argument('--inserts', type=int, default=500)
+    parser.add_argument('--refit-inserts', type=int, default=5)
+    parser.add_argument('--no-refit', action='store_true', help='omite la comparación con el reentrenamiento')
+    args = parser.parse_args()
+
+    tokenize = spanish_tokenizer()
+    print(f"{'comandos':>10} {'incr media (ms)':>16} {'incr p99 (ms)':>14} {'refit media (ms)':>17}")
+    for size in args.sizes:
+        commands = synthetic_commands(size + args.inserts, seed=size)
+        base, extra = commands[:size], commands[size:]
+        incr = bench_incremental(tokenize, base, extra)
+        p99 = sorted(incr)[int(len(incr) * 0.99) - 1]
+        refit = '-'
+        if not args.no_refit:
+            refit = f'{statistics.mean(bench_refit(tokenize, base, extra[:args.refit_inserts])) * 1e3:.1f}'
+        print(f'{size:>10} {statistics.mean(incr) * 1e3:>16.3f} {p99 * 1e3:>14.3f} {refit:>17}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Buscador compacto (hashing, float32, arrays) frente al índice TF-IDF con vocabulario.
+
+Para cada tamaño construye los dos índices con los mismos comandos y mide
+la memoria que retienen (tracemalloc), el tamaño de la caché en disco
+(pickle), el tiempo de construcción, la latencia de best_match, la primera
+consulta tras añadir un comando y la coincidencia del mejor resultado en
+frases con errores. Después reproduce el corpus de transcripciones
+(bench_pipeline) con el asistente en cada modo (LEYA_MATCHER) para comparar
+precisión y tasa de sugerencias.
+
+    python benchmarks/bench_compact_matcher.py --sizes 10000 100000
+"""
+import argparse
+import json
+import logging
+import pickle
+import statistics
+import time
+import tracemalloc
+
+from bench_pipeline import CORPUS, percentile, run_size
+from common import synthetic_commands
+from command_index import CommandIndex
+from compact_index import CompactIndex
+import config
+from text_processing import TextPreprocessor
+
+
+def perturb(commands, n):
+    """Comandos sin su número final o con una palabra menos (más dudosos que los del corpus)"""
+    out = []
+    for i, command in enumerate(commands[:n]):
+        words = command.split()
+        if i % 2 and len(words) > 2:
+            words.pop(0)
+        else:
+            words = words[:-1] + [str(int(words[-1]) + 1)]
+        out.append(' '.join(words))
+    return out
+
+
+def measure(make, commands, queries):
+    tracemalloc.start()
+    t = time.perf_counter()
+    index = make()
+    index.rebuild(commands)
+    build = time.perf_counter() - t
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    size = len(pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL))
+
+    latencies, results = [], []
+    for q in queries:
+        t = time.perf_counter()
+        results.append(index.best_match(q)[0])
+        latencies.append(time.perf_counter() - t)
+    t = time.perf_counter()
+    index.best_matches(queries)
+    batch = time.perf_counter() - t
+    after_add = []
+    for i in range(5):
+        index.add(f'comando añadido {i}')
+        t = time.perf_counter()
+        index.best_match(queries[i])
+        after_add.append(time.perf_counter() - t)
+    return {
+        'build_s': build,
+        'memory_mb': memory / 2**20,
+        'pickle_mb': size / 1e6,
+        'match_p50_ms': percentile(latencies, 50) * 1e3,
+        'match_p99_ms': percentile(latencies, 99) * 1e3,
+        'batch_per_s': len(queries) / batch,
+        'after_add_ms': statistics.median(after_add) * 1e3,
+    }, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--features', type=int, default=config.MATCHER_FEATURES)
+    parser.add_argument('--repeats', type=int, default=2, help='pasadas del corpus en la prueba de precisión')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    tokenizer = TextPreprocessor('spanish')
+    tokenizer.warm_up()
+    print(f"{'comandos':>9} {'índice':>8} {'memoria MB':>10} {'pickle MB':>9} {'constr. s':>9} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'lote/s':>8} {'tras add ms':>11}  mismo resultado")
+    for size in args.sizes:
+        commands = synthetic_commands(size)
+        queries = perturb(commands, args.queries)
+        # La caché de raíces del tokenizador se llena antes: no cuenta como memoria de ningún índice
+        tokenizer.normalize_many(commands + queries)
+        full, reference = measure(lambda: CommandIndex(tokenizer=tokenizer), commands, queries)
+        compact, results = measure(lambda: CompactIndex(tokenizer=tokenizer, n_features=args.features),
+                                   commands, queries)
+        same = sum(a == b for a, b in zip(reference, results))
+        for name, r, extra in (('tfidf', full, ''), ('compact', compact, f'  {same}/{len(queries)}')):
+            print(f"{size:>9} {name:>8} {r['memory_mb']:>10.1f} {r['pickle_mb']:>9.1f} {r['build_s']:>9.2f} "
+                  f"{r['match_p50_ms']:>7.3f} {r['match_p99_ms']:>7.3f} {r['batch_per_s']:>8.0f} "
+                  f"{r['after_add_ms']:>11.2f}{extra}")
+
+    with open(CORPUS, encoding='utf-8') as f:
+        corpus = json.load(f)
+    print(f"\n{'comandos':>9} {'índice':>8} {'memoria MB':>10} {'precisión':>9} {'sugerencias':>11} {'p50 ms':>8}")
+    for size in args.sizes:
+        for mode in ('tfidf', 'compact'):
+            config.MATCHER_MODE = mode
+            r = run_size(size, corpus, args.repeats, resolution_cache=0)
+            print(f"{size:>9} {mode:>8} {r['model_memory_mb']:>10.1f} {r['accuracy']:>9.1%} "
+                  f"{r['suggestion_rate']:>11.1%} {r['resolve_p50_ms']:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Compara el fin de frase fijo (1 s de silencio, 5 s máximo) con el endpointer adaptativo.
+
+Para cada clip se mide la latencia de fin de frase (desde que se deja de
+hablar hasta el evento de final) y si la frase se cortó antes de acabar
+(truncada por el límite de duración o por una pausa interna). Sin --clips se
+generan frases sintéticas: palabras como ráfagas armónicas, pausas internas
+según el ritmo de cada hablante, finales en fricativa débil y algunas frases
+largas de dictado.
+
+    python benchmarks/bench_endpointing.py --clips 200
+    python benchmarks/bench_endpointing.py --wav-dir grabaciones   # WAV + labels.json {"archivo.wav": {"end": s, "command": true}}
+"""
+import argparse
+import json
+import os
+import statistics
+import wave
+
+import numpy as np
+
+import common  # noqa: F401  (añade la raíz al path)
+from audio_capture import AudioCapture, SyntheticSource
+from endpointing import Endpointer
+
+RATE = 16000
+CHUNK = 1024
+
+
+def synthetic_clip(rng):
+    """Devuelve (muestras int16, fin real de la voz en s, es un comando corto)"""
+    command = rng.random() < 0.5
+    words = int(rng.integers(1, 4)) if command else int(rng.integers(4, 20))
+    gap = rng.uniform(0.08, 0.35)            # ritmo del hablante
+    parts = [rng.normal(0, 40, int(1.5 * RATE))]
+    for i in range(words):
+        n = int(rng.uniform(0.15, 0.45) * RATE)
+        t = np.arange(n) / RATE
+        f0 = rng.uniform(110, 260)
+        tone = sum(np.sin(2 * np.pi * f0 * h * t) / h for h in range(1, 5))
+        parts.append(3000 * tone * np.hanning(n) ** 0.3)
+        if i < words - 1:
+            parts.append(rng.normal(0, 40, int(rng.uniform(0.5, 1.5) * gap * RATE)))
+    if rng.random() < 0.3:
+        # Final en 's' débil: ruido blanco apenas por encima del fondo
+        parts.append(rng.normal(0, 55, int(0.12 * RATE)))
+    end = sum(len(p) for p in parts) / RATE
+    parts.append(rng.normal(0, 40, int(2.5 * RATE)))
+    return np.clip(np.concatenate(parts), -32768, 32767).astype('<i2'), end, command
+
+
+def wav_clips(directory):
+    with open(os.path.join(directory, 'labels.json'), encoding='utf-8') as f:
+        labels = json.load(f)
+    for name, label in sorted(labels.items()):
+        with wave.open(os.path.join(directory, name), 'rb') as w:
+            if w.getframerate() != RATE or w.getnchannels() != 1 or w.getsampwidth() != 2:
+                raise SystemExit(f'{name}: se necesita WAV mono de 16 bits a {RATE} Hz')
+            samples = np.frombuffer(w.readframes(w.getnframes()), dtype='<i2')
+        # Margen de silencio para que el final siempre llegue a producirse
+        samples = np.concatenate([samples, np.zeros(int(2.5 * RATE), dtype='<i2')])
+        yield samples, label['end'], label.get('command', False)
+
+
+def run(clip, end, endpointer, partials):
+    """Pasa el clip por la captura; devuelve los eventos de final y la latencia del primero"""
+    data = clip.tobytes()
+    frames = [data[i:i + 2 * CHUNK] for i in range(0, len(data), 2 * CHUNK)]
+    capture = AudioCapture(SyntheticSource(frames, sample_rate=RATE), endpointer=endpointer)
+    offset = [0.0]
+    capture.frame_listeners.append(lambda frame, voiced, rate: offset.__setitem__(0, offset[0] + len(frame) / 2 / rate))
+    if partials:
+        # Reconocedor parcial ideal: reconoce el comando completo justo al terminar de decirlo
+        endpointer.completion_hint = lambda: offset[0] >= end
+    events = []
+    capture.endpoint_listeners.append(lambda e: events.append(e) if e.kind == 'end' and e.reason != 'discarded' else None)
+    capture.start()
+    capture._thread.join()
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clips', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=3)
+    parser.add_argument('--wav-dir', help='clips grabados con labels.json')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    if args.wav_dir:
+        clips = list(wav_clips(args.wav_dir))
+    else:
+        rng = np.random.default_rng(args.seed)
+        clips = [synthetic_clip(rng) for _ in range(args.clips)]
+
+    setups = {
+        'fijo (1.0 s / 5 s)': (lambda: Endpointer.fixed(1.0, 5), False),
+        'adaptativo': (lambda: Endpointer(), False),
+        'adaptativo + parciales': (lambda: Endpointer(), True),
+    }
+    results = {}
+    for label, (factory, partials) in setups.items():
+        latencies, truncated, dropped, command_latencies = [], 0, 0, []
+        for clip, end, command in clips:
+            events = run(clip, end, factory(), partials and command)
+            if not events:
+                # Demasiado corta para ser frase (phrase_threshold): igual en todas las configuraciones
+                dropped += 1
+                continue
+            first = events[0]
+            # Truncada: la primera frase se cerró antes de acabar de hablar
+            if first.offset < end - 0.05:
+                truncated += 1
+                continue
+            latency = first.offset - end
+            latencies.append(latency)
+            if command:
+                command_latencies.append(latency)
+        latencies.sort()
+        results[label] = {
+            'clips': len(clips),
+            'dropped': dropped,
+            'truncation_rate': round(truncated / (len(clips) - dropped), 4) if len(clips) > dropped else 0.0,
+            'latency_p50_ms': round(statistics.median(latencies) * 1e3, 1) if latencies else None,
+            'latency_p95_ms': round(latencies[int(0.95 * (len(latencies) - 1))] * 1e3, 1) if latencies else None,
+            'command_latency_p50_ms': round(statistics.median(command_latencies) * 1e3, 1)
+            if command_latencies else None,
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+    print(f"{'configuración':<24} {'truncadas':>9} {'p50':>8} {'p95':>8} {'p50 cmd':>8}")
+    for label, r in results.items():
+        print(f"{label:<24} {r['truncation_rate']:>9.1%} {r['latency_p50_ms']:>6} ms {r['latency_p95_ms']:>6} ms "
+              f"{r['command_latency_p50_ms']:>5} ms")
+
+
+if __name__ == '__main__':
+    main()
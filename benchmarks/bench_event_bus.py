@@ -0,0 +1,120 @@
+"""Ráfagas de eventos de estado: bus con fusión frente a actualizar la interfaz desde cada hilo.
+
+Varios hilos (captura, ejecutor, voz) publican --events eventos cada uno
+(estado, transcripción y tiempos por etapa). Con el bus, un consumidor que
+imita al hilo de Qt recoge como mucho cada --interval-ms y tarda
+--paint-ms en pintar. Sin bus, cada evento pinta directamente bajo el
+cerrojo de la interfaz, como el setText del hilo del asistente. Se mide
+cuánto bloquea publish() al hilo que publica y cuántos repintados hay.
+
+    python benchmarks/bench_event_bus.py --threads 4 --events 20000 --paint-ms 2
+"""
+import argparse
+import threading
+import time
+
+import common  # noqa: F401  (añade la raíz al path)
+from event_bus import EventBus
+
+STAGES = ['capture', 'recognition', 'resolve', 'action', 'tts']
+
+
+def workload(publish, events, worker):
+    """Mezcla de eventos de un hilo del asistente; devuelve la duración de cada publish"""
+    costs = []
+    for i in range(events):
+        t = time.perf_counter()
+        if i % 10 == 0:
+            publish('status', state='recognizing' if i % 20 else 'listening')
+        elif i % 10 == 1:
+            publish('transcript', text=f'abrir correo {worker} {i}')
+        else:
+            stage = STAGES[i % len(STAGES)]
+            publish('timing', key=stage, stage=stage, ms=i % 300)
+        costs.append(time.perf_counter() - t)
+    return costs
+
+
+def run(threads, events, publish):
+    results = [None] * threads
+
+    def worker(n):
+        results[n] = workload(publish, events, n)
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - t0, sorted(c for r in results for c in r)
+
+
+def with_bus(args):
+    bus = EventBus()
+    wake = threading.Event()
+    bus.listeners.append(wake.set)
+    stop = threading.Event()
+    paints = []
+
+    def gui():
+        last = 0.0
+        while not stop.is_set() or bus.pending():
+            if not wake.wait(0.05):
+                continue
+            wait = args.interval_ms / 1000 - (time.monotonic() - last)
+            if wait > 0:
+                time.sleep(wait)
+            wake.clear()
+            last = time.monotonic()
+            events = bus.drain()
+            if events:
+                time.sleep(args.paint_ms / 1000)
+                paints.append(len(events))
+    consumer = threading.Thread(target=gui)
+    consumer.start()
+    elapsed, costs = run(args.threads, args.events, bus.publish)
+    stop.set()
+    consumer.join()
+    return elapsed, costs, len(paints), bus.stats()
+
+
+def direct(args):
+    ui_lock = threading.Lock()
+    paints = [0]
+
+    def publish(kind, key=None, **data):
+        with ui_lock:
+            time.sleep(args.paint_ms / 1000)
+            paints[0] += 1
+    elapsed, costs = run(args.threads, args.direct_events, publish)
+    return elapsed, costs, paints[0]
+
+
+def pct(values, p):
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--direct-events', type=int, default=200, help='eventos por hilo sin bus (es lento)')
+    parser.add_argument('--interval-ms', type=float, default=100)
+    parser.add_argument('--paint-ms', type=float, default=2)
+    args = parser.parse_args()
+
+    elapsed, costs, paints, stats = with_bus(args)
+    total = args.threads * args.events
+    print(f'bus:   {total} eventos en {elapsed * 1e3:.0f} ms; publish p50 {pct(costs, 50):.1f} µs, '
+          f'p99 {pct(costs, 99):.1f} µs, máx {costs[-1] * 1e6:.0f} µs')
+    print(f'       {paints} repintados, {stats["notified"]} avisos a la interfaz, '
+          f'{stats["coalesced"]} eventos fusionados, {stats["dropped"]} descartados')
+
+    elapsed, costs, paints = direct(args)
+    total = args.threads * args.direct_events
+    print(f'directo: {total} eventos en {elapsed * 1e3:.0f} ms; publish p50 {pct(costs, 50):.0f} µs, '
+          f'p99 {pct(costs, 99):.0f} µs, máx {costs[-1] * 1e6:.0f} µs; {paints} repintados')
+
+
+if __name__ == '__main__':
+    main()
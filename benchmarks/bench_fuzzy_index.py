@@ -0,0 +1,92 @@
+"""Compara el respaldo aproximado con difflib sobre toda la lista frente a FuzzyIndex.
+
+Las consultas son comandos con errores de reconocimiento (letras cambiadas,
+perdidas o sobrantes) y frases que no corresponden a ningún comando. Se mide
+la latencia por consulta y cuántas veces el mejor candidato coincide con el
+de difflib (o empata con él en similitud).
+
+    python benchmarks/bench_fuzzy_index.py --sizes 1000 10000 100000
+"""
+import argparse
+import random
+import statistics
+import time
+from difflib import SequenceMatcher, get_close_matches
+
+from common import WORDS, synthetic_commands
+from fuzzy_index import FuzzyIndex
+
+LETTERS = 'abcdefghijklmnopqrstuvwxyzáéíóúñ '
+
+
+def corrupt(text, rng, edits):
+    chars = list(text)
+    for _ in range(edits):
+        i = rng.randrange(len(chars))
+        op = rng.random()
+        if op < 0.4:
+            chars[i] = rng.choice(LETTERS)
+        elif op < 0.7 and len(chars) > 3:
+            del chars[i]
+        else:
+            chars.insert(i, rng.choice(LETTERS))
+    return ''.join(chars)
+
+
+def make_queries(commands, n, seed):
+    rng = random.Random(seed)
+    queries = []
+    for i in range(n):
+        if i % 4 == 3:
+            queries.append(' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 4))))
+        else:
+            queries.append(corrupt(rng.choice(commands), rng, rng.randint(1, 3)))
+    return queries
+
+
+def timed(fn, queries):
+    times, results = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results.append(fn(q))
+        times.append(time.perf_counter() - t0)
+    return times, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--difflib-queries', type=int, default=40, help='consultas a difflib en tamaños grandes')
+    args = parser.parse_args()
+
+    print(f"{'comandos':>9} {'difflib media':>14} {'índice media':>13} {'índice p99':>11} "
+          f"{'construir':>10} {'acuerdo':>8}")
+    for size in args.sizes:
+        commands = synthetic_commands(size, seed=size)
+        queries = make_queries(commands, args.queries, seed=size)
+        t0 = time.perf_counter()
+        index = FuzzyIndex()
+        index.rebuild(commands)
+        build = time.perf_counter() - t0
+
+        fuzzy_times, fuzzy_results = timed(lambda q: index.get_close_matches(q, n=1, cutoff=0.6), queries)
+        # difflib es lineal: con muchos comandos sólo se prueba una muestra
+        sample = queries if size <= 10000 else queries[:args.difflib_queries]
+        diff_times, diff_results = timed(lambda q: get_close_matches(q, commands, n=1, cutoff=0.6), sample)
+
+        agree = 0
+        for q, expected, got in zip(sample, diff_results, fuzzy_results):
+            if expected == got:
+                agree += 1
+            elif expected and got:
+                # Empate en similitud: difflib desempata por orden alfabético inverso
+                ratio = lambda c: SequenceMatcher(None, q, c).ratio()
+                agree += abs(ratio(expected[0]) - ratio(got[0])) < 1e-9
+        p99 = sorted(fuzzy_times)[int(0.99 * (len(fuzzy_times) - 1))]
+        print(f'{size:>9} {statistics.mean(diff_times) * 1e3:>11.2f} ms {statistics.mean(fuzzy_times) * 1e3:>10.3f} ms '
+              f'{p99 * 1e3:>8.3f} ms {build:>8.2f} s {agree / len(sample):>8.1%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Reproduce un corpus de transcripciones contra process_command y _find_best_match.
+
+Las transcripciones (exactas, con errores, parafraseadas y fuera de dominio)
+están en benchmarks/transcripts.json. Para cada tamaño de conjunto de
+comandos personalizados se mide la latencia p50/p99 de resolución, el
+rendimiento, la memoria del modelo y la precisión / tasa de sugerencias.
+La caché de resoluciones está desactivada por defecto: las pasadas repetidas
+medirían aciertos de caché. Con --resolution-cache N cada pasada empieza con
+la caché vacía (en frío) y va seguida de otra con la caché llena (en
+caliente), y se informa de ambas latencias por separado.
+pyautogui, webbrowser, subprocess y la voz se sustituyen por dobles.
+
+    python benchmarks/bench_pipeline.py --sizes 10 1000 100000 --json resultados.json
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+from common import base_dir, make_assistant, record_intents, stub_side_effects, synthetic_commands
+
+CORPUS = os.path.join(base_dir, 'benchmarks', 'transcripts.json')
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def replay(assistant, executed, transcripts):
+    """Procesa cada transcripción y devuelve (latencias, resultados)"""
+    latencies, outcomes = [], []
+    for t in transcripts:
+        assistant.last_suggestion = None
+        before = len(executed)
+        t0 = time.perf_counter()
+        assistant.process_command(t['text'])
+        latencies.append(time.perf_counter() - t0)
+        if len(executed) > before:
+            outcomes.append(('executed', executed[-1]))
+        elif assistant.last_suggestion:
+            outcomes.append(('suggested', assistant.last_suggestion))
+        else:
+            outcomes.append(('none', None))
+    return latencies, outcomes
+
+
+def run_size(size, corpus, repeats, trace=False, resolution_cache=None):
+    import config
+    if resolution_cache is not None:
+        config.RESOLUTION_CACHE_SIZE = resolution_cache
+    with tempfile.TemporaryDirectory() as tmp:
+        custom = dict(corpus['custom_commands'])
+        custom.update({c: f'https://example.com/{i}' for i, c in enumerate(synthetic_commands(size))})
+        # Los imports no cuentan como memoria del modelo
+        stub_side_effects()
+        from text_processing import TextPreprocessor
+        TextPreprocessor().warm_up()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        assistant = make_assistant(tmp, custom, cache=False, trace=trace)
+        build = time.perf_counter() - t0
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        executed = record_intents(assistant)
+        transcripts = corpus['transcripts']
+        latencies, warm_latencies = [], []
+        cached = config.RESOLUTION_CACHE_SIZE > 0
+        for _ in range(repeats):
+            assistant.resolutions.invalidate()
+            lat, outcomes = replay(assistant, executed, transcripts)
+            latencies.extend(lat)
+            if cached:
+                warm_latencies.extend(replay(assistant, executed, transcripts)[0])
+
+        match_latencies = []
+        for t in transcripts:
+            t0 = time.perf_counter()
+            assistant._find_best_match(t['text'])
+            match_latencies.append(time.perf_counter() - t0)
+
+        by_category = {}
+        for t, (kind, label) in zip(transcripts, outcomes):
+            stats = by_category.setdefault(t['category'], {'total': 0, 'correct': 0, 'suggested': 0})
+            stats['total'] += 1
+            stats['suggested'] += kind == 'suggested'
+            stats['correct'] += (kind == 'executed' and label == t['expected']) or \
+                                (t['expected'] is None and kind == 'none')
+        stages = assistant.tracer.stats()
+        cache_stats = assistant.resolutions.stats()
+        assistant.close()
+
+    correct = sum(s['correct'] for s in by_category.values())
+    suggested = sum(s['suggested'] for s in by_category.values())
+    return {
+        'custom_commands': size,
+        'build_s': build,
+        'model_memory_mb': memory / 2**20,
+        'resolve_p50_ms': percentile(latencies, 50) * 1e3,
+        'resolve_p99_ms': percentile(latencies, 99) * 1e3,
+        'throughput_per_s': len(latencies) / sum(latencies),
+        'warm_p50_ms': percentile(warm_latencies, 50) * 1e3 if warm_latencies else None,
+        'warm_p99_ms': percentile(warm_latencies, 99) * 1e3 if warm_latencies else None,
+        'match_p50_ms': percentile(match_latencies, 50) * 1e3,
+        'match_p99_ms': percentile(match_latencies, 99) * 1e3,
+        'accuracy': correct / len(transcripts),
+        'suggestion_rate': suggested / len(transcripts),
+        'by_category': by_category,
+        'stages': stages,
+        'resolution_cache': cache_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 10000, 100000])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--corpus', default=CORPUS)
+    parser.add_argument('--trace', action='store_true', help='activa las trazas por etapa (mide su coste)')
+    parser.add_argument('--resolution-cache', type=int, default=0,
+                        help='tamaño de la caché de resoluciones (por defecto 0: desactivada)')
+    parser.add_argument('--json', help='guarda los resultados en este archivo para comparar ejecuciones')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with open(args.corpus, encoding='utf-8') as f:
+        corpus = json.load(f)
+
+    results = []
+    print(f"{'comandos':>9} {'memoria MB':>10} {'p50 ms':>8} {'p99 ms':>8} {'cmd/s':>8} "
+          f"{'match p50':>9} {'match p99':>9} {'precisión':>9} {'sugerencias':>11}", end='')
+    print(f" {'cal. p50':>8} {'cal. p99':>8} {'caché':>6}" if args.resolution_cache else '')
+    for size in args.sizes:
+        r = run_size(size, corpus, args.repeats, trace=args.trace, resolution_cache=args.resolution_cache)
+        results.append(r)
+        print(f"{size:>9} {r['model_memory_mb']:>10.1f} {r['resolve_p50_ms']:>8.3f} {r['resolve_p99_ms']:>8.3f} "
+              f"{r['throughput_per_s']:>8.0f} {r['match_p50_ms']:>9.3f} {r['match_p99_ms']:>9.3f} "
+              f"{r['accuracy']:>9.1%} {r['suggestion_rate']:>11.1%}", end='')
+        if args.resolution_cache:
+            print(f" {r['warm_p50_ms']:>8.3f} {r['warm_p99_ms']:>8.3f} {r['resolution_cache']['hit_rate']:>6.0%}")
+        else:
+            print()
+
+    if args.trace:
+        for r in results:
+            print(f"\n{r['custom_commands']} comandos, etapas:")
+            for name, st in sorted(r['stages'].items()):
+                print(f"  {name:>16} n={st['count']:<5} p50 {st['p50_ms']:.3f} ms  p99 {st['p99_ms']:.3f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'corpus': os.path.basename(args.corpus), 'results': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
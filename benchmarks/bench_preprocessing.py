@@ -0,0 +1,48 @@
+"""Compara el preprocesado original con TextPreprocessor (caché de raíces y lotes).
+
+Entrena el índice con N comandos y lanza M consultas con cada tokenizador.
+
+    python benchmarks/bench_preprocessing.py --commands 50000 --queries 10000
+"""
+import argparse
+import random
+import time
+
+from common import spanish_tokenizer, synthetic_commands
+from command_index import CommandIndex
+from text_processing import TextPreprocessor, fold_accents
+
+
+def run(name, tokenizer, commands, queries):
+    index = CommandIndex(tokenizer=tokenizer)
+    t0 = time.perf_counter()
+    index.rebuild(commands)
+    fit = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    hits = sum(index.best_match(q)[0] == expected for q, expected in queries)
+    query = time.perf_counter() - t0
+    print(f'{name:>12} {fit:>10.2f} {query:>12.2f} {len(queries) / query:>12.0f} {hits / len(queries):>10.1%}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--commands', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=10000)
+    args = parser.parse_args()
+
+    commands = synthetic_commands(args.commands)
+    rng = random.Random(1)
+    # La mitad de las consultas llegan sin tildes, como suele devolverlas el reconocedor
+    queries = []
+    for cmd in rng.sample(commands, min(args.queries, len(commands))):
+        queries.append((fold_accents(cmd) if rng.random() < 0.5 else cmd, cmd))
+
+    print(f"{'tokenizador':>12} {'fit (s)':>10} {'consultas (s)':>12} {'consultas/s':>12} {'aciertos':>10}")
+    run('original', spanish_tokenizer(), commands, queries)
+    pre = TextPreprocessor('spanish')
+    run('cacheado', pre, commands, queries)
+    print(f'caché de raíces: {pre.cache_info()}')
+
+
+if __name__ == '__main__':
+    main()
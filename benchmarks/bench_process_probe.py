@@ -0,0 +1,51 @@
+"""Coste del sondeo de procesos/ventanas en ráfagas de atajos de teclado.
+
+Simula N comandos de atajo (cada uno comprueba si Chrome está abierto y lo
+enfoca) con un sondeo falso que tarda lo que tasklist/PowerShell (--probe-ms)
+y compara consultar siempre (ttl=0) con la caché. También mide el sondeo real
+de /proc en esta máquina, sin y con caché.
+
+    python benchmarks/bench_process_probe.py --commands 50 --probe-ms 250
+"""
+import argparse
+import os
+import time
+
+import common  # noqa: F401  (añade la raíz al path)
+from window_probe import FakeBackend, ProcBackend, ProcessProbe
+
+
+def shortcut_burst(probe, commands):
+    t0 = time.perf_counter()
+    for _ in range(commands):
+        if probe.is_running('chrome.exe'):
+            probe.focus('chrome')
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--commands', type=int, default=50)
+    parser.add_argument('--probe-ms', type=float, default=250)
+    args = parser.parse_args()
+
+    print(f"{'sondeo':<26} {'total':>10} {'por comando':>12} {'consultas':>10}")
+    for label, ttl in (('sin caché (como antes)', 0.0), ('con caché', 5.0)):
+        backend = FakeBackend(['chrome.exe', 'explorer.exe'], foreground='explorer.exe', latency=args.probe_ms / 1000)
+        probe = ProcessProbe(backend, ttl=ttl, foreground_ttl=ttl and 1.0)
+        total = shortcut_burst(probe, args.commands)
+        calls = sum(backend.calls.values())
+        print(f'{label:<26} {total * 1e3:>7.0f} ms {total / args.commands * 1e3:>9.1f} ms {calls:>10}')
+
+    if os.path.isdir('/proc'):
+        for label, ttl in (('/proc sin caché', 0.0), ('/proc con caché', 5.0)):
+            probe = ProcessProbe(ProcBackend(), ttl=ttl)
+            t0 = time.perf_counter()
+            for _ in range(args.commands):
+                probe.is_running('chrome')
+            total = time.perf_counter() - t0
+            print(f'{label:<26} {total * 1e3:>7.1f} ms {total / args.commands * 1e3:>9.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
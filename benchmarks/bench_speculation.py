@@ -0,0 +1,184 @@
+"""Resolución especulativa sobre hipótesis parciales: latencia desde la transcripción final.
+
+Un reconocedor guionizado da, mientras se «habla», las hipótesis parciales
+de cada frase (una palabra más cada --word-ms) y la transcripción final tras
+--pause-ms de silencio. Se mide el tiempo desde la transcripción final hasta
+que termina la acción, con y sin especulación (LEYA_SPECULATE). El sondeo de
+procesos y ventanas tarda --probe-ms por consulta y cada host nuevo --dns-ms
+en resolverse (caché DNS simulada compartida por la precarga y el
+navegador falso). Incluye una hipótesis parcial equivocada que es otro
+comando (se prepara y se deshace) y comandos que no usan Chrome (no se
+prepara nada); al final se comprueba que las acciones y la ventana activa
+tras cada frase son las mismas con y sin especulación.
+
+    python benchmarks/bench_speculation.py --probe-ms 100 --dns-ms 40 --repeats 3
+"""
+import argparse
+import logging
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+from common import Recorder, make_assistant
+import config
+from endpointing import EndpointEvent
+from recognizers import RecognizerBackend
+from window_probe import FakeBackend
+
+CUSTOM = {
+    'mi banco': 'https://www.mibanco.example',
+    'campus virtual': 'https://campus.universidad.example',
+    'panel de ventas': 'https://ventas.example',
+}
+
+# Frase final, o (frase final, hipótesis parciales) si el reconocedor se corrige por el camino
+SCRIPT = [
+    'abrir correo',
+    'nueva pestaña',
+    'mi banco',
+    'recargar',
+    ('baja un poco', ['volver', 'baja un', 'baja un poco']),   # «volver» se prepara y se deshace
+    'sube volumen',                                           # no usa Chrome: nada que preparar
+    'campus virtual',
+    'volver',
+    'abrir youtube',
+    'panel de ventas',
+    'captura de pantalla',
+    'cerrar pestaña',
+]
+
+
+class ScriptedRecognizer(RecognizerBackend):
+    """Hipótesis parciales y transcripción final fijadas por la prueba"""
+
+    name = 'scripted'
+    partials = True
+
+    def __init__(self):
+        self.partial = ''
+        self.final = ''
+
+    def accept_partial(self, frame):
+        return self.partial
+
+    def recognize(self, segment):
+        return self.final
+
+
+class FakeDns:
+    """getaddrinfo con caché: la primera consulta de cada host tarda latency segundos"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.cache = set()
+        self.lock = threading.Lock()
+        self.misses = 0
+
+    def getaddrinfo(self, host, port, *args, **kwargs):
+        with self.lock:
+            hit = host in self.cache
+            self.cache.add(host)
+        if not hit:
+            self.misses += 1
+            time.sleep(self.latency)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', port))]
+
+
+class FakeBrowser(Recorder):
+    """webbrowser falso: abrir una URL resuelve su host como haría el navegador"""
+
+    def __init__(self, dns):
+        super().__init__('webbrowser')
+        self.dns = dns
+
+    def open(self, url):
+        from urllib.parse import urlparse
+        self.calls.append(('open', (url,), {}))
+        self.dns.getaddrinfo(urlparse(url).hostname, 443)
+
+
+def utterance(assistant, recognizer, backend, text, partials, args):
+    """Dice una frase: parciales palabra a palabra, silencio final y acción; devuelve segundos"""
+    backend.active = 'explorer'
+    assistant.probe.invalidate()
+    assistant._mode = 'listening'
+    assistant._on_endpoint(EndpointEvent('start', 'voice', 0, 0))
+    for partial in partials:
+        recognizer.partial = partial
+        assistant._on_capture_frame(b'', True, 16000)
+        time.sleep(args.word_ms / 1000)
+    time.sleep(args.pause_ms / 1000)
+    assistant._on_endpoint(EndpointEvent('end', 'silence', 0, 0))
+    t = time.perf_counter()
+    assistant.process_command(text)
+    assistant.executor.wait_idle()
+    return time.perf_counter() - t
+
+
+def script():
+    """(frase final, parciales); por defecto una palabra más en cada parcial"""
+    for item in SCRIPT:
+        if isinstance(item, tuple):
+            yield item
+        else:
+            words = item.split()
+            yield item, [' '.join(words[:n]) for n in range(1, len(words) + 1)]
+
+
+def run(args, speculate):
+    config.SPECULATE = speculate
+    dns = FakeDns(args.dns_ms / 1000)
+    socket.getaddrinfo = dns.getaddrinfo
+    recognizer = ScriptedRecognizer()
+    backend = FakeBackend(['chrome.exe', 'explorer.exe'], foreground='explorer.exe', latency=args.probe_ms / 1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        assistant = make_assistant(tmp, CUSTOM, cache=False, recognizer=recognizer, probe_backend=backend)
+        import leya
+        leya.webbrowser = FakeBrowser(dns)
+        pyautogui = leya.pyautogui
+        before = len(pyautogui.calls)
+        latencies = {text: [] for text, _ in script()}
+        foreground = []
+        for _ in range(args.repeats):
+            dns.cache.clear()
+            assistant.chrome_opened = False
+            for text, partials in script():
+                latencies[text].append(utterance(assistant, recognizer, backend, text, partials, args))
+                foreground.append(backend.active)
+        # Efectos observables para comparar los dos modos
+        effects = [c[:2] for c in leya.webbrowser.calls] + [c[:2] for c in pyautogui.calls[before:]] + foreground
+        stats = assistant.speculation.stats() if assistant.speculation is not None else None
+        assistant.close()
+    return latencies, effects, stats, backend.active
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--probe-ms', type=float, default=100)
+    parser.add_argument('--dns-ms', type=float, default=40)
+    parser.add_argument('--word-ms', type=float, default=300, help='duración de cada palabra dicha')
+    parser.add_argument('--pause-ms', type=float, default=350, help='silencio final hasta cerrar la frase')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    base, base_effects, _, _ = run(args, speculate=False)
+    spec, spec_effects, stats, _ = run(args, speculate=True)
+
+    print(f"{'frase':<26} {'sin especular':>14} {'especulando':>12} {'ahorro':>9}")
+    for text in base:
+        a, b = statistics.median(base[text]) * 1e3, statistics.median(spec[text]) * 1e3
+        print(f'{text:<26} {a:>11.0f} ms {b:>9.0f} ms {a - b:>6.0f} ms')
+    a = [x for v in base.values() for x in v]
+    b = [x for v in spec.values() for x in v]
+    print(f"{'media':<26} {statistics.mean(a) * 1e3:>11.0f} ms {statistics.mean(b) * 1e3:>9.0f} ms "
+          f"{(statistics.mean(a) - statistics.mean(b)) * 1e3:>6.0f} ms")
+    print(f"parciales {stats['partials']}, preparadas {stats['prewarmed']}, confirmadas {stats['committed']}, "
+          f"deshechas {stats['rolled_back']}; preparación {stats['prewarm_seconds'] * 1e3:.0f} ms en segundo plano")
+    print(f"mismas acciones en los dos modos: {'sí' if base_effects == spec_effects else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Mide la latencia de la cola de voz con un motor silencioso.
+
+Simula ráfagas de confirmaciones (incluidos cambios de volumen seguidos que
+se fusionan) y compara el tiempo que queda bloqueado quien llama con la
+versión síncrona (say + runAndWait en el propio hilo).
+
+    python benchmarks/bench_speech_queue.py --messages 200 --ms-per-char 0.5
+"""
+import argparse
+import statistics
+import time
+
+import common  # noqa: F401  (añade la raíz al path)
+from speech_output import SilentEngine, SpeechQueue
+
+MESSAGES = ['Abriendo youtube', 'Nueva pestaña', 'Recargando', 'Bajando un poco', 'Buscando recetas']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--ms-per-char', type=float, default=0.5)
+    args = parser.parse_args()
+
+    spc = args.ms_per_char / 1000
+    # Síncrono: cada confirmación bloquea al que llama mientras suena
+    engine = SilentEngine(spc)
+    t0 = time.perf_counter()
+    for i in range(args.messages):
+        engine.say(MESSAGES[i % len(MESSAGES)] if i % 3 else f'Volumen ahora {i}')
+    sync_blocked = time.perf_counter() - t0
+
+    engine = SilentEngine(spc)
+    queue = SpeechQueue(engine)
+    blocked, done = [], []
+    t0 = time.perf_counter()
+    for i in range(args.messages):
+        t = time.perf_counter()
+        if i % 3:
+            f = queue.say(MESSAGES[i % len(MESSAGES)])
+        else:
+            f = queue.say(f'Volumen ahora {i}', key='volume')
+        blocked.append(time.perf_counter() - t)
+        f.add_done_callback(lambda _, t=t: done.append(time.perf_counter() - t))
+    queue.wait_idle()
+    total = time.perf_counter() - t0
+
+    print(f'síncrono: llamador bloqueado {sync_blocked * 1e3:.1f} ms en total')
+    print(f'cola:     llamador bloqueado {sum(blocked) * 1e3:.2f} ms en total '
+          f'(p50 {statistics.median(blocked) * 1e6:.0f} µs por mensaje)')
+    print(f'cola:     {len(engine.spoken)} de {args.messages} mensajes dichos tras fusionar, '
+          f'todo hablado en {total * 1e3:.1f} ms')
+    print(f'cola:     latencia hasta completar p50 {statistics.median(done) * 1e3:.1f} ms, '
+          f'máx {max(done) * 1e3:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Mide el arranque: tiempo de importar leya y tiempo hasta el primer listen().
+
+Cada medida se hace en un proceso nuevo, en un directorio temporal con una
+copia de commands.db, primero sin caché del modelo (arranque en frío) y
+después con la caché ya creada. El micrófono, el reconocedor y la voz se
+sustituyen por una fuente sintética, un reconocedor de pruebas y un motor
+silencioso.
+
+    python benchmarks/bench_startup.py --runs 5 --custom-commands 5000
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import base_dir, synthetic_commands
+
+PROBE = r'''
+import json, time
+t0 = time.perf_counter()
+import leya
+t_import = time.perf_counter() - t0
+from audio_capture import SyntheticSource
+from recognizers import FixtureRecognizer
+from speech_output import SilentEngine
+source = SyntheticSource.from_pattern([(0.6, 3000), (1.2, 0)])
+assistant = leya.ChromeVoiceAssistant(audio_source=source, recognizer=FixtureRecognizer(['surge']),
+                                      tts_engine=SilentEngine())
+t_init = time.perf_counter() - t0
+assistant.capture.start()
+heard = assistant.listen(timeout=5)
+t_listen = time.perf_counter() - t0
+print(json.dumps({'import': t_import, 'init': t_init, 'first_listen': t_listen, 'heard': heard}))
+'''
+
+
+def probe(cwd):
+    env = dict(os.environ, PYTHONPATH=base_dir)
+    out = subprocess.run([sys.executable, '-c', PROBE], cwd=cwd, env=env, capture_output=True,
+                         text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--custom-commands', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, 'commands.db')
+        shutil.copy(os.path.join(base_dir, 'commands.db'), db)
+        conn = sqlite3.connect(db)
+        conn.executemany('INSERT INTO commands (command, url) VALUES (?, ?)',
+                         [(c, f'https://example.com/{i}') for i, c in enumerate(synthetic_commands(args.custom_commands))])
+        conn.commit()
+        conn.close()
+
+        print(f"{'arranque':>10} {'import (ms)':>12} {'init (ms)':>10} {'1er listen (ms)':>16}")
+        results = {}
+        for label in ('frío', 'caché'):
+            runs = []
+            for _ in range(args.runs):
+                if label == 'frío' and os.path.exists(os.path.join(tmp, 'matcher_cache.pkl')):
+                    os.remove(os.path.join(tmp, 'matcher_cache.pkl'))
+                runs.append(probe(tmp))
+            row = {k: statistics.median(r[k] for r in runs) for k in ('import', 'init', 'first_listen')}
+            results[label] = row
+            print(f"{label:>10} {row['import'] * 1e3:>12.1f} {row['init'] * 1e3:>10.1f} {row['first_listen'] * 1e3:>16.1f}")
+        if args.runs:
+            print(json.dumps(results, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
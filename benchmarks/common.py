@@ -0,0 +1,126 @@
+import os
+import random
+import re
+import sys
+
+# Añade la carpeta raíz al path para importar los módulos de leya
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if base_dir not in sys.path:
+    sys.path.insert(0, base_dir)
+
+WORDS = [
+    'abrir', 'banco', 'correo', 'trabajo', 'noticias', 'deportes', 'música', 'radio',
+    'calendario', 'tareas', 'facturas', 'nómina', 'clientes', 'proveedores', 'informe',
+    'ventas', 'tienda', 'pedidos', 'mapa', 'oficina', 'escuela', 'biblioteca', 'recetas',
+    'cocina', 'viajes', 'vuelos', 'hotel', 'películas', 'series', 'fotos', 'documentos',
+    'hoja', 'cálculo', 'presentación', 'equipo', 'proyecto', 'soporte', 'ayuda', 'foro',
+    'blog', 'revista', 'periódico', 'tiempo', 'clima', 'bolsa', 'precios', 'compras',
+    'juegos', 'cursos', 'clases', 'universidad', 'portal', 'intranet', 'nube', 'panel',
+]
+
+
+def synthetic_commands(n, seed=0, words=3):
+    """Genera n comandos personalizados sintéticos y únicos"""
+    rng = random.Random(seed)
+    seen = set()
+    out = []
+    while len(out) < n:
+        cmd = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, words))) + f' {len(out)}'
+        if cmd not in seen:
+            seen.add(cmd)
+            out.append(cmd)
+    return out
+
+
+def spanish_tokenizer():
+    """Tokenizador equivalente al preprocess_text original"""
+    from nltk.stem import SnowballStemmer
+    stemmer = SnowballStemmer('spanish')
+
+    def tokenize(text):
+        return [stemmer.stem(t) for t in re.findall(r"\b\w+\b", text.lower())]
+    return tokenize
+
+
+class Recorder:
+    """Doble de un módulo con efectos secundarios: registra las llamadas y no hace nada"""
+
+    def __init__(self, name, returns=None):
+        self.__name__ = name
+        self.calls = []
+        self._returns = returns or {}
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+
+        def call(*args, **kwargs):
+            self.calls.append((attr, args, kwargs))
+            return self._returns.get(attr)
+        return call
+
+
+def stub_side_effects():
+    """Sustituye pyautogui, pyperclip, webbrowser y subprocess de leya por dobles"""
+    sys.modules['pyautogui'] = Recorder('pyautogui', {'size': (1920, 1080)})
+    sys.modules['pyperclip'] = Recorder('pyperclip', {'paste': ''})
+    import leya
+    leya.webbrowser = Recorder('webbrowser')
+    leya.subprocess = Recorder('subprocess', {'check_output': b''})
+    return leya
+
+
+def seed_database(path, commands):
+    """Crea commands.db con los comandos personalizados dados (nombre -> url o lista de nombres)"""
+    import sqlite3
+    if not isinstance(commands, dict):
+        commands = {c: f'https://example.com/{i}' for i, c in enumerate(commands)}
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE IF NOT EXISTS commands (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                 'command TEXT NOT NULL, url TEXT NOT NULL)')
+    conn.executemany('INSERT INTO commands (command, url) VALUES (?, ?)', commands.items())
+    conn.commit()
+    conn.close()
+
+
+def make_assistant(workdir, custom_commands=(), cache=True, trace=False, recognizer=None, probe_backend=None):
+    """Crea un ChromeVoiceAssistant sin micrófono, voz ni efectos secundarios en workdir"""
+    leya = stub_side_effects()
+    import config
+    from audio_capture import SyntheticSource
+    from recognizers import FixtureRecognizer
+    from speech_output import SilentEngine
+    from window_probe import FakeBackend
+
+    config.COMMANDS_DB_PATH = os.path.join(workdir, 'commands.db')
+    config.MATCHER_CACHE_PATH = os.path.join(workdir, 'matcher_cache.pkl')
+    config.TRACE_ENABLED = trace
+    config.TRACE_PATH = None
+    if not cache and os.path.exists(config.MATCHER_CACHE_PATH):
+        os.remove(config.MATCHER_CACHE_PATH)
+    seed_database(config.COMMANDS_DB_PATH, custom_commands)
+    return leya.ChromeVoiceAssistant(audio_source=SyntheticSource([]), recognizer=recognizer or FixtureRecognizer([]),
+                                     tts_engine=SilentEngine(), probe_backend=probe_backend or FakeBackend())
+
+
+def intent_label(intent, command):
+    """Etiqueta comparable de una intención: el comando canónico que la representa"""
+    slots = intent.slots
+    if intent.name == 'action':
+        return slots['key']
+    if intent.name == 'website':
+        return f"abrir {slots['site']}"
+    if intent.name == 'custom':
+        return command
+    return intent.name
+
+
+def record_intents(assistant):
+    """Sustituye la ejecución de acciones por un registro de las intenciones resueltas"""
+    executed = []
+
+    def execute(intent, command):
+        executed.append(intent_label(intent, command))
+        return intent.name != 'exit'
+    assistant._execute_intent = execute
+    return executed
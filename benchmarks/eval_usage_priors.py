@@ -0,0 +1,216 @@
+"""Evalúa el orden por uso (LEYA_USAGE_PRIORS) reproduciendo un registro de interacciones.
+
+El registro (JSONL: sesión, segundo, texto dicho y comando que se quería)
+se genera con hábitos de un usuario: comandos favoritos, secuencias
+habituales (correo -> nueva pestaña, banco -> captura...), repeticiones
+(«baja un poco» varias veces), un 30 % de frases con errores o
+parafraseadas y algunas fuera de dominio; --log reproduce uno guardado
+con --save-log. Se reproduce con y sin estadísticas de uso simulando al
+usuario: ante «¿Quisiste decir X?» dice «confirmo» si X era lo que quería
+y si no (o si no se entendió o se ejecutó otra cosa) repite la frase
+exacta. Se cuentan las confirmaciones pedidas, las vueltas extra, los
+comandos equivocados y la latencia de process_command. El reloj de las
+estadísticas es el del registro; el hilo de escritura se sustituye por
+flush() cada vez que ese reloj avanza USAGE_FLUSH_SECONDS.
+
+    python benchmarks/eval_usage_priors.py --sessions 60 --commands 1000
+    python benchmarks/eval_usage_priors.py --log interacciones.jsonl
+"""
+import argparse
+import json
+import logging
+import random
+import tempfile
+import time
+
+from bench_pipeline import CORPUS, percentile
+from common import make_assistant, record_intents, synthetic_commands
+import config
+
+# Comandos favoritos, de más a menos usado
+FAVORITES = [
+    'abrir correo', 'correo del trabajo', 'mi banco', 'campus virtual', 'nueva pestaña', 'cerrar pestaña',
+    'abrir youtube', 'recetas de cocina', 'captura de pantalla', 'portal del empleado', 'abrir traductor',
+    'recargar', 'abrir whatsapp', 'volver', 'reabrir pestaña', 'abrir chrome',
+]
+# Lo que suele decirse después de cada comando
+FOLLOWS = {
+    'abrir correo': ['nueva pestaña', 'baja un poco'],
+    'correo del trabajo': ['baja un poco', 'cerrar pestaña'],
+    'mi banco': ['captura de pantalla'],
+    'captura de pantalla': ['cerrar pestaña'],
+    'campus virtual': ['baja un poco', 'captura de pantalla'],
+    'recetas de cocina': ['baja un poco', 'acercar pantalla'],
+    'abrir youtube': ['pantalla completa'],
+    'nueva pestaña': ['abrir traductor', 'abrir youtube'],
+    'portal del empleado': ['sube un poco'],
+    'cerrar pestaña': ['reabrir pestaña', 'volver'],
+}
+# Probabilidad de repetir el mismo comando
+REPEATS = {'baja un poco': 0.7, 'sube un poco': 0.5, 'volver': 0.4, 'acercar pantalla': 0.5, 'alejar pantalla': 0.4}
+
+
+def typo(rng, text):
+    """Error de reconocimiento sintético: letra perdida, letras cambiadas o sin eñes ni tildes"""
+    words = text.split()
+    i = max(range(len(words)), key=lambda j: len(words[j]))
+    w = words[i]
+    r = rng.random()
+    if r < 0.35 and len(w) > 4:
+        j = rng.randrange(1, len(w) - 1)
+        words[i] = w[:j] + w[j + 1:]
+    elif r < 0.7 and len(w) > 4:
+        j = rng.randrange(1, len(w) - 2)
+        words[i] = w[:j] + w[j + 1] + w[j] + w[j + 2:]
+    else:
+        words[i] = w.translate(str.maketrans('ñáéíóú', 'naeiou')) + ('s' if w.isascii() else '')
+    return ' '.join(words)
+
+
+def make_log(corpus, sessions, seed=0, noisy=0.3, out_of_domain=0.04):
+    """Registro sintético de interacciones: lista de {session, t, text, expected}"""
+    rng = random.Random(seed)
+    variants, ood = {}, []
+    for t in corpus['transcripts']:
+        if t['expected'] is None:
+            ood.append(t['text'])
+        elif t['category'] != 'exact':
+            variants.setdefault(t['expected'], []).append(t['text'])
+    weights = [1 / (i + 1) for i in range(len(FAVORITES))]
+    log, clock = [], 0.0
+    for session in range(sessions):
+        clock += rng.uniform(2, 30) * 3600
+        current = None
+        for _ in range(rng.randint(8, 20)):
+            clock += rng.uniform(3, 25)
+            if rng.random() < out_of_domain:
+                log.append({'session': session, 't': round(clock, 1), 'text': rng.choice(ood), 'expected': None})
+                continue
+            if current in REPEATS and rng.random() < REPEATS[current]:
+                pass
+            elif current in FOLLOWS and rng.random() < 0.6:
+                current = rng.choice(FOLLOWS[current])
+            else:
+                current = rng.choices(FAVORITES, weights)[0]
+            text = current
+            if rng.random() < noisy:
+                text = rng.choice(variants[current]) if current in variants and rng.random() < 0.6 else typo(rng, current)
+            log.append({'session': session, 't': round(clock, 1), 'text': text, 'expected': current})
+    return log
+
+
+def replay(args, corpus, log, priors):
+    config.USAGE_PRIORS = priors
+    # El hilo de escritura no actúa: se llama a flush() según el reloj del registro
+    flush_every, config.USAGE_FLUSH_SECONDS = config.USAGE_FLUSH_SECONDS, 1e9
+    with tempfile.TemporaryDirectory() as tmp:
+        custom = dict(corpus['custom_commands'])
+        custom.update({c: f'https://example.com/{i}' for i, c in enumerate(synthetic_commands(args.commands))})
+        assistant = make_assistant(tmp, custom, cache=False)
+        executed = record_intents(assistant)
+        now = [0.0]
+        if assistant.usage is not None:
+            assistant.usage.clock = lambda: now[0]
+        flushed = 0.0
+        stats = {'commands': 0, 'first_try': 0, 'prompts': 0, 'confirmed': 0, 'wrong_suggestions': 0,
+                 'wrong_executions': 0, 'not_understood': 0, 'utterances': 0, 'false_executions': 0}
+        latencies, flush_seconds = [], []
+
+        def say(text):
+            # «confirmo» responde a la sugerencia anterior; cualquier otra frase la descarta
+            if text != 'confirmo':
+                assistant.last_suggestion = None
+            before = len(executed)
+            t = time.perf_counter()
+            assistant.process_command(text)
+            latencies.append(time.perf_counter() - t)
+            stats['utterances'] += 1
+            return executed[-1] if len(executed) > before else None
+
+        for entry in log:
+            now[0] = entry['t']
+            if assistant.usage is not None and now[0] - flushed >= flush_every:
+                t = time.perf_counter()
+                assistant.usage.flush()
+                flush_seconds.append(time.perf_counter() - t)
+                flushed = now[0]
+            expected = entry['expected']
+            done = say(entry['text'])
+            if expected is None:
+                stats['false_executions'] += done is not None
+                continue
+            stats['commands'] += 1
+            if done == expected:
+                stats['first_try'] += 1
+                continue
+            suggestion = assistant.last_suggestion
+            if done is not None:
+                stats['wrong_executions'] += 1
+            elif suggestion is not None:
+                stats['prompts'] += 1
+                if suggestion == expected:
+                    stats['confirmed'] += 1
+                    now[0] += 3
+                    say('confirmo')
+                    continue
+                stats['wrong_suggestions'] += 1
+            else:
+                stats['not_understood'] += 1
+            # Lo repite exacto
+            now[0] += 3
+            say(expected)
+        stats['usage'] = assistant.usage.stats() if assistant.usage is not None else None
+        assistant.close()
+    config.USAGE_FLUSH_SECONDS = flush_every
+    stats['p50_ms'] = percentile(latencies, 50) * 1e3
+    stats['p99_ms'] = percentile(latencies, 99) * 1e3
+    stats['flush_ms'] = percentile(flush_seconds, 50) * 1e3 if flush_seconds else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--log', help='registro JSONL a reproducir (si no, se genera uno)')
+    parser.add_argument('--save-log', help='guarda el registro generado en este archivo')
+    parser.add_argument('--sessions', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--commands', type=int, default=1000, help='comandos personalizados sintéticos añadidos')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with open(CORPUS, encoding='utf-8') as f:
+        corpus = json.load(f)
+    if args.log:
+        with open(args.log, encoding='utf-8') as f:
+            log = [json.loads(line) for line in f if line.strip()]
+    else:
+        log = make_log(corpus, args.sessions, args.seed)
+        if args.save_log:
+            with open(args.save_log, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(entry, ensure_ascii=False) + '\n' for entry in log)
+    print(f"{len(log)} frases en {len({e['session'] for e in log})} sesiones, "
+          f"{args.commands + len(corpus['custom_commands'])} comandos personalizados")
+
+    base = replay(args, corpus, log, priors=False)
+    usage = replay(args, corpus, log, priors=True)
+
+    rows = [
+        ('a la primera', 'first_try'), ('confirmaciones pedidas', 'prompts'), ('  aceptadas', 'confirmed'),
+        ('  sugerencia equivocada', 'wrong_suggestions'), ('comando equivocado', 'wrong_executions'),
+        ('no entendido', 'not_understood'), ('fuera de dominio ejecutado', 'false_executions'),
+        ('frases dichas', 'utterances'),
+    ]
+    print(f"{'':<28} {'sin uso':>9} {'con uso':>9}")
+    for label, key in rows:
+        print(f'{label:<28} {base[key]:>9} {usage[key]:>9}')
+    for label, key in (('frases por comando', None), ('process_command p50 ms', 'p50_ms'),
+                       ('process_command p99 ms', 'p99_ms')):
+        a, b = (base['utterances'] / base['commands'], usage['utterances'] / usage['commands']) if key is None \
+            else (base[key], usage[key])
+        print(f'{label:<28} {a:>9.3f} {b:>9.3f}')
+    print(f"escritura por lotes: {usage['flush_ms']:.3f} ms (mediana, fuera de process_command); "
+          f"{usage['usage']['commands']} comandos y {usage['usage']['pairs']} pares guardados")
+
+
+if __name__ == '__main__':
+    main()
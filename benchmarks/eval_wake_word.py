@@ -0,0 +1,165 @@
+"""Evalúa el detector local de activación sobre clips WAV etiquetados.
+
+Estructura de los clips: CLIPS/<palabra>/*.wav contienen la palabra de
+activación y CLIPS/negative/*.wav no (conversación, ruido, la tele...). Para
+cada umbral se informa de la tasa de rechazos falsos (FR), de activaciones
+falsas (FA) por clip y por hora de audio negativo, y del coste por segundo de
+audio.
+
+    python benchmarks/eval_wake_word.py --templates wake_words --clips clips
+    python benchmarks/eval_wake_word.py --synthetic        # sin grabaciones: pseudo-palabras sintéticas
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+import common  # noqa: F401  (añade la raíz al path)
+from audio_capture import frame_energy
+from wake_word import WakeWordSpotter
+
+CHUNK = 1024
+
+
+def run_clip(spotter, path, energy_threshold):
+    """Pasa un clip por el detector bloque a bloque; devuelve (distancia mínima, segundos)"""
+    spotter.reset()
+    with wave.open(path, 'rb') as w:
+        rate = w.getframerate()
+        seconds = w.getnframes() / rate
+        while True:
+            frame = w.readframes(CHUNK)
+            if not frame:
+                break
+            voiced = frame_energy(frame) > energy_threshold
+            spotter.process(frame, voiced, rate)
+    return spotter.min_distance, seconds
+
+
+def evaluate(templates_dir, clips_dir, words, thresholds, energy_threshold):
+    # Umbral negativo: nunca dispara, sólo se registra la mejor distancia de cada clip
+    spotter = WakeWordSpotter.from_directory(templates_dir, words, threshold=-1.0)
+    if spotter is None:
+        raise SystemExit(f'No hay plantillas en {templates_dir} para {", ".join(words)}')
+    clips = [(path, True) for word in words for path in sorted(glob.glob(os.path.join(clips_dir, word, '*.wav')))]
+    clips += [(path, False) for path in sorted(glob.glob(os.path.join(clips_dir, 'negative', '*.wav')))]
+    if not clips:
+        raise SystemExit(f'No hay clips en {clips_dir}')
+
+    scores, audio_seconds = [], 0.0
+    t0 = time.perf_counter()
+    for path, positive in clips:
+        distance, seconds = run_clip(spotter, path, energy_threshold)
+        scores.append((distance, positive, seconds))
+        audio_seconds += seconds
+    cpu = time.perf_counter() - t0
+
+    positives = [d for d, p, _ in scores if p]
+    negatives = [d for d, p, _ in scores if not p]
+    negative_hours = sum(s for _, p, s in scores if not p) / 3600
+    rows = []
+    for th in thresholds:
+        fr = sum(d > th for d in positives) / len(positives) if positives else 0.0
+        fa = sum(d <= th for d in negatives)
+        rows.append({
+            'threshold': round(th, 4),
+            'false_reject': round(fr, 4),
+            'false_accept': round(fa / len(negatives), 4) if negatives else 0.0,
+            'false_accept_per_hour': round(fa / negative_hours, 2) if negative_hours else 0.0,
+        })
+    # Punto de igual error: umbral con FR y FA por clip más parecidas
+    eer = min(rows, key=lambda r: abs(r['false_reject'] - r['false_accept']))
+    return {
+        'clips': {'positive': len(positives), 'negative': len(negatives)},
+        'audio_seconds': round(audio_seconds, 1),
+        'ms_per_audio_second': round(cpu / audio_seconds * 1e3, 2) if audio_seconds else 0.0,
+        'thresholds': rows,
+        'equal_error': eer,
+    }
+
+
+def _write_wav(path, samples, rate):
+    pcm = np.clip(samples * 32767, -32768, 32767).astype('<i2')
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm.tobytes())
+
+
+def _pseudo_word(rng, formants, seconds, rate, stretch=1.0, pitch=1.0):
+    """Barrido de dos 'formantes' con envolvente: sustituto sintético de una palabra"""
+    n = int(seconds * stretch * rate)
+    t = np.linspace(0, 1, n)
+    out = np.zeros(n)
+    for f_start, f_end in formants:
+        freq = pitch * (f_start + (f_end - f_start) * t)
+        out += np.sin(2 * np.pi * np.cumsum(freq) / rate)
+    return 0.3 * out * np.sin(np.pi * t) ** 0.5
+
+
+def make_synthetic(root, rate=16000, positives=40, negatives=40, seed=7):
+    """Genera plantillas y clips con una pseudo-palabra 'surge' y otras distintas"""
+    rng = np.random.default_rng(seed)
+    word = [(300, 700), (2200, 1200)]
+    others = [[(800, 300), (1200, 2400)], [(500, 500), (1800, 1800)], [(250, 900), (3000, 2500)]]
+    silence = lambda s: np.zeros(int(s * rate))
+    noise = lambda n: rng.normal(0, 0.01, n)
+    for kind in ('templates/surge', 'clips/surge', 'clips/negative'):
+        os.makedirs(os.path.join(root, kind), exist_ok=True)
+    for i in range(5):
+        w = _pseudo_word(rng, word, 0.5, rate, rng.uniform(0.9, 1.1), rng.uniform(0.97, 1.03))
+        _write_wav(os.path.join(root, 'templates/surge', f'{i}.wav'), w + noise(len(w)), rate)
+    for i in range(positives):
+        w = _pseudo_word(rng, word, 0.5, rate, rng.uniform(0.8, 1.2), rng.uniform(0.95, 1.05))
+        clip = np.concatenate([silence(0.5), w, silence(0.7)])
+        _write_wav(os.path.join(root, 'clips/surge', f'{i}.wav'), clip + noise(len(clip)), rate)
+    for i in range(negatives):
+        parts = [silence(0.3)]
+        for _ in range(3):
+            parts += [_pseudo_word(rng, others[rng.integers(len(others))], rng.uniform(0.2, 0.6), rate), silence(0.2)]
+        clip = np.concatenate(parts)
+        _write_wav(os.path.join(root, 'clips/negative', f'{i}.wav'), clip + noise(len(clip)), rate)
+    return os.path.join(root, 'templates'), os.path.join(root, 'clips')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--templates', default='wake_words')
+    parser.add_argument('--clips', default='clips')
+    parser.add_argument('--words', default='surge', help='palabras separadas por comas')
+    parser.add_argument('--thresholds', default='0.10:0.60:0.05', help='inicio:fin:paso')
+    parser.add_argument('--energy', type=float, default=300, help='umbral de energía para comparar')
+    parser.add_argument('--synthetic', action='store_true')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    start, stop, step = (float(x) for x in args.thresholds.split(':'))
+    thresholds = list(np.arange(start, stop + step / 2, step))
+    words = [w.strip() for w in args.words.split(',') if w.strip()]
+    with tempfile.TemporaryDirectory() as tmp:
+        templates, clips = args.templates, args.clips
+        if args.synthetic:
+            templates, clips = make_synthetic(tmp)
+        result = evaluate(templates, clips, words, thresholds, args.energy)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"clips: {result['clips']['positive']} positivos, {result['clips']['negative']} negativos, "
+          f"{result['audio_seconds']} s de audio, {result['ms_per_audio_second']} ms de CPU por segundo")
+    print(f"{'umbral':>7} {'FR':>7} {'FA':>7} {'FA/hora':>9}")
+    for row in result['thresholds']:
+        print(f"{row['threshold']:>7.3f} {row['false_reject']:>7.2%} {row['false_accept']:>7.2%} "
+              f"{row['false_accept_per_hour']:>9.1f}")
+    eer = result['equal_error']
+    print(f"igual error cerca de {eer['threshold']:.3f} (FR {eer['false_reject']:.2%}, FA {eer['false_accept']:.2%})")
+
+
+if __name__ == '__main__':
+    main()
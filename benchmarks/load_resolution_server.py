@@ -0,0 +1,171 @@
+"""Prueba de carga del servidor de resolución: peticiones por segundo y latencia de cola.
+
+--clients clientes asyncio con conexión persistente envían POST /resolve
+durante --seconds segundos con transcripciones del corpus y variantes con
+errores de comandos sintéticos (para que la mayoría pase por el buscador).
+Sin --url se arranca el servidor en este proceso con --commands comandos y
+se compara la agrupación de consultas (--max-batch) con una consulta por
+petición (max_batch=1); los clientes comparten proceso con el servidor, así
+que las cifras absolutas son conservadoras. Al final se comprueba que cada
+respuesta coincide con resolve_command frase a frase.
+
+    python benchmarks/load_resolution_server.py --commands 20000 --clients 64 --seconds 5
+    python benchmarks/load_resolution_server.py --url http://127.0.0.1:8765/
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from urllib.parse import urlparse
+
+from common import base_dir, make_assistant, synthetic_commands
+import config
+from resolution_cache import normalize_utterance
+from resolution_server import ResolutionServer, describe
+
+CORPUS = os.path.join(base_dir, 'benchmarks', 'transcripts.json')
+
+
+def make_queries(commands, n, seed=0):
+    """Transcripciones del corpus más variantes con errores de los comandos personalizados"""
+    rng = random.Random(seed)
+    with open(CORPUS, encoding='utf-8') as f:
+        queries = [t['text'] for t in json.load(f)['transcripts']]
+    while len(queries) < n:
+        words = rng.choice(commands).split()
+        r = rng.random()
+        if r < 0.4 and len(words) > 1:
+            words.pop(rng.randrange(len(words)))                 # palabra perdida
+        elif r < 0.8:
+            i = rng.randrange(len(words))
+            w = words[i]
+            if len(w) > 3:
+                j = rng.randrange(len(w) - 1)
+                words[i] = w[:j] + w[j + 1] + w[j] + w[j + 2:]   # letras cambiadas
+        else:
+            words.insert(0, rng.choice(['abre', 'quiero', 'pon']))
+        queries.append(' '.join(words))
+    return queries
+
+
+def expected(assistant, text):
+    """Respuesta de referencia: resolve_command frase a frase, siguiendo las correcciones"""
+    text = normalize_utterance(text.lower())
+    resolution = assistant.resolve_command(text)
+    if resolution.kind == 'redirect':
+        target = assistant.resolve_command(resolution.value)
+        if target.kind == 'intent':
+            out = describe(text, target)
+            out.update(resolution='redirect', match=resolution.value)
+            return out
+    return describe(text, resolution)
+
+
+async def client(host, port, queries, deadline, latencies, answers, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            text = rng.choice(queries)
+            body = json.dumps({'text': text}, ensure_ascii=False).encode('utf-8')
+            t = time.perf_counter()
+            writer.write(f'POST /resolve HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+                         f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+            await writer.drain()
+            status = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            payload = await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t)
+            if b' 200 ' not in status:
+                raise RuntimeError(f'{status!r}: {payload!r}')
+            answers[text] = json.loads(payload)
+    finally:
+        writer.close()
+
+
+async def load(host, port, queries, clients, seconds):
+    latencies, answers = [], {}
+    deadline = time.perf_counter() + seconds
+    t = time.perf_counter()
+    await asyncio.gather(*(client(host, port, queries, deadline, latencies, answers, random.Random(i))
+                           for i in range(clients)))
+    return time.perf_counter() - t, sorted(latencies), answers
+
+
+def pct(values, p):
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] * 1e3
+
+
+def report(label, elapsed, latencies, extra=''):
+    print(f'{label:<22} {len(latencies) / elapsed:>8.0f} pet/s   p50 {pct(latencies, 50):>6.1f} ms   '
+          f'p95 {pct(latencies, 95):>6.1f} ms   p99 {pct(latencies, 99):>6.1f} ms{extra}')
+
+
+async def in_process(args, assistant, queries, max_batch):
+    server = ResolutionServer(assistant, max_batch, args.max_delay_ms / 1000)
+    await server.start('127.0.0.1', 0)
+    try:
+        elapsed, latencies, answers = await load('127.0.0.1', server.port, queries, args.clients, args.seconds)
+        return elapsed, latencies, answers, server.resolver.stats()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='servidor ya en marcha (si no, se arranca uno aquí)')
+    parser.add_argument('--commands', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--max-batch', type=int, default=config.SERVER_MAX_BATCH)
+    parser.add_argument('--max-delay-ms', type=float, default=config.SERVER_MAX_DELAY_MS)
+    parser.add_argument('--resolution-cache', type=int, default=0,
+                        help='tamaño de la caché de resoluciones (0: todas las peticiones llegan al buscador)')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    commands = synthetic_commands(args.commands)
+    queries = make_queries(commands, args.queries)
+    print(f'{args.clients} clientes, {len(queries)} frases distintas, {args.seconds:.0f} s por prueba')
+
+    if args.url:
+        url = urlparse(args.url)
+        elapsed, latencies, _ = asyncio.run(load(url.hostname, url.port or 80, queries, args.clients, args.seconds))
+        report('servidor externo', elapsed, latencies)
+        return
+
+    config.RESOLUTION_CACHE_SIZE = args.resolution_cache
+    with tempfile.TemporaryDirectory() as tmp:
+        assistant = make_assistant(tmp, commands, cache=False)
+        print(f'{len(assistant.all_commands)} comandos cargados')
+        runs = []
+        for label, max_batch in ((f'por lotes (máx. {args.max_batch})', args.max_batch), ('una a una', 1)):
+            assistant.resolutions.invalidate()
+            elapsed, latencies, answers, stats = asyncio.run(in_process(args, assistant, queries, max_batch))
+            report(label, elapsed, latencies, f'   lote medio {stats["mean_batch"]:.1f}')
+            runs.append(answers)
+
+        # Cada respuesta debe coincidir con la resolución frase a frase
+        assistant.resolutions.invalidate()
+        wrong = total = 0
+        for answers in runs:
+            for text, answer in answers.items():
+                total += 1
+                wrong += answer != json.loads(json.dumps(expected(assistant, text), ensure_ascii=False))
+        print(f'respuestas iguales a resolve_command: {total - wrong}/{total}')
+        assistant.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,361 @@
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future
+from urllib.parse import urlparse
+
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+class CdpError(Exception):
+    """Error del protocolo o de la conexión con el navegador"""
+
+
+def accept_key(key):
+    """Valor de Sec-WebSocket-Accept para la clave del cliente"""
+    return base64.b64encode(hashlib.sha1((key + _GUID).encode()).digest()).decode()
+
+
+def send_frame(sock, opcode, payload, mask):
+    """Envía una trama WebSocket completa (los clientes enmascaran, el servidor no)"""
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack('!H', length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack('!Q', length)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    sock.sendall(bytes(header) + payload)
+
+
+def _read_exact(stream, n):
+    data = stream.read(n)
+    if len(data) < n:
+        raise ConnectionError('Conexión WebSocket cerrada')
+    return data
+
+
+def recv_message(stream):
+    """Lee un mensaje completo (uniendo fragmentos); devuelve (opcode, payload)"""
+    opcode, chunks = None, []
+    while True:
+        b1, b2 = _read_exact(stream, 2)
+        fin, op = b1 & 0x80, b1 & 0x0F
+        length = b2 & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', _read_exact(stream, 2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', _read_exact(stream, 8))[0]
+        key = _read_exact(stream, 4) if b2 & 0x80 else None
+        payload = _read_exact(stream, length)
+        if key:
+            payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+        if op >= 0x8:
+            return op, payload            # las tramas de control no se fragmentan
+        if op != OP_CONT:
+            opcode = op
+        chunks.append(payload)
+        if fin:
+            return opcode, b''.join(chunks)
+
+
+class CdpConnection:
+    """Conexión WebSocket persistente con el navegador; las respuestas se emparejan por id"""
+
+    def __init__(self, ws_url, on_event=None, timeout=5.0):
+        self.on_event = on_event
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self.closed = False
+        url = urlparse(ws_url)
+        self._sock = socket.create_connection((url.hostname, url.port or 80), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)   # órdenes pequeñas, sin esperar ACK
+        key = base64.b64encode(os.urandom(16)).decode()
+        self._sock.sendall((f'GET {url.path or "/"} HTTP/1.1\r\nHost: {url.netloc}\r\n'
+                            f'Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n'
+                            f'Sec-WebSocket-Version: 13\r\n\r\n').encode())
+        self._stream = self._sock.makefile('rb')
+        status = self._stream.readline()
+        headers = {}
+        while True:
+            line = self._stream.readline().decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if b' 101 ' not in status or headers.get('sec-websocket-accept') != accept_key(key):
+            self._sock.close()
+            raise CdpError(f'El navegador rechazó la conexión: {status.decode("latin-1").strip()}')
+        self._sock.settimeout(None)
+        self._reader = threading.Thread(target=self._read_loop, name='cdp-reader', daemon=True)
+        self._reader.start()
+
+    def call(self, method, params=None, session_id=None, timeout=None):
+        """Envía una orden y espera su respuesta (result); lanza CdpError si falla"""
+        if self.closed:
+            raise CdpError('Conexión con el navegador cerrada')
+        msg_id = next(self._ids)
+        future = Future()
+        message = {'id': msg_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        with self._lock:
+            self._pending[msg_id] = future
+        try:
+            with self._send_lock:
+                send_frame(self._sock, OP_TEXT, json.dumps(message).encode('utf-8'), mask=True)
+            return future.result(timeout or self.timeout)
+        except CdpError:
+            raise
+        except Exception as e:
+            raise CdpError(f'{method}: {e or type(e).__name__}')
+        finally:
+            with self._lock:
+                self._pending.pop(msg_id, None)
+
+    def _read_loop(self):
+        try:
+            while True:
+                opcode, payload = recv_message(self._stream)
+                if opcode == OP_CLOSE:
+                    break
+                if opcode == OP_PING:
+                    with self._send_lock:
+                        send_frame(self._sock, OP_PONG, payload, mask=True)
+                    continue
+                if opcode != OP_TEXT:
+                    continue
+                message = json.loads(payload)
+                if 'id' in message:
+                    with self._lock:
+                        future = self._pending.get(message['id'])
+                    if future is None:
+                        continue
+                    if 'error' in message:
+                        future.set_exception(CdpError(message['error'].get('message', 'error')))
+                    else:
+                        future.set_result(message.get('result', {}))
+                elif self.on_event:
+                    self.on_event(message.get('method'), message.get('params', {}), message.get('sessionId'))
+        except (OSError, ValueError, ConnectionError) as e:
+            if not self.closed:
+                logging.warning(f"Conexión con el navegador perdida: {e}")
+        finally:
+            self.closed = True
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(CdpError('Conexión con el navegador cerrada'))
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            with self._send_lock:
+                send_frame(self._sock, OP_CLOSE, b'', mask=True)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+class CdpBrowser:
+    """Acciones del navegador por CDP: pestañas, navegación, historial, URL activa y desplazamiento.
+
+    Chrome debe arrancarse con --remote-debugging-port (open_chrome lo hace
+    si LEYA_BROWSER=cdp). Usa una sola conexión al navegador (nivel browser)
+    y sesiones planas por pestaña; si la conexión se pierde se vuelve a abrir
+    en la siguiente orden. Cada orden espera la confirmación del navegador,
+    sin pausas fijas como los atajos de teclado.
+    """
+
+    def __init__(self, host='127.0.0.1', port=9222, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._conn = None
+        self._lock = threading.RLock()
+        self._sessions = {}       # targetId -> sessionId
+        self._active = None       # pestaña sobre la que actúan las órdenes
+        self._closed_urls = []    # para reabrir pestañas
+
+    def _connection(self):
+        with self._lock:
+            if self._conn is None or self._conn.closed:
+                self._sessions.clear()
+                try:
+                    with urllib.request.urlopen(f'http://{self.host}:{self.port}/json/version',
+                                                timeout=self.timeout) as r:
+                        ws_url = json.load(r)['webSocketDebuggerUrl']
+                except (OSError, ValueError, KeyError) as e:
+                    raise CdpError(f'Navegador sin depuración remota en el puerto {self.port}: {e}')
+                self._conn = CdpConnection(ws_url, on_event=self._on_event, timeout=self.timeout)
+                self._conn.call('Target.setDiscoverTargets', {'discover': True})
+                logging.info('Conectado al navegador por CDP (%s)', ws_url)
+            return self._conn
+
+    def wait_ready(self, timeout=10.0):
+        """Espera a que el navegador recién lanzado acepte conexiones (en vez de una pausa fija)"""
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while True:
+            try:
+                self._connection()
+                return True
+            except CdpError:
+                if time.monotonic() + delay > deadline:
+                    return False
+                time.sleep(delay)
+                delay = min(delay * 2, 0.5)
+
+    def available(self):
+        """¿Hay un navegador escuchando en el puerto de depuración?"""
+        try:
+            self._connection()
+            return True
+        except CdpError:
+            return False
+
+    def call(self, method, params=None, session_id=None):
+        return self._connection().call(method, params, session_id)
+
+    def _on_event(self, method, params, session_id):
+        if method == 'Target.targetDestroyed':
+            target = params.get('targetId')
+            with self._lock:
+                self._sessions.pop(target, None)
+                if self._active == target:
+                    self._active = None
+        elif method == 'Target.detachedFromTarget':
+            with self._lock:
+                for target, session in list(self._sessions.items()):
+                    if session == params.get('sessionId'):
+                        del self._sessions[target]
+
+    def _pages(self):
+        infos = self.call('Target.getTargets').get('targetInfos', [])
+        return [t for t in infos if t.get('type') == 'page']
+
+    def _visible(self, target):
+        result = self.call('Runtime.evaluate', {'expression': "document.visibilityState === 'visible'"},
+                           session_id=self._session(target))
+        return result.get('result', {}).get('value') is True
+
+    def active_target(self):
+        """Pestaña visible: primero la última usada por el asistente y, si el usuario cambió, se busca"""
+        with self._lock:
+            last = self._active
+        if last is not None and self._visible(last):
+            return last
+        pages = self._pages()
+        if not pages:
+            return self.new_tab()
+        target = next((p['targetId'] for p in pages if p['targetId'] != last and self._visible(p['targetId'])),
+                      pages[0]['targetId'])
+        with self._lock:
+            self._active = target
+        return target
+
+    def _session(self, target):
+        with self._lock:
+            session = self._sessions.get(target)
+        if session is None:
+            session = self.call('Target.attachToTarget', {'targetId': target, 'flatten': True})['sessionId']
+            with self._lock:
+                self._sessions[target] = session
+        return session
+
+    def _page_call(self, method, params=None):
+        target = self.active_target()
+        return self.call(method, params, session_id=self._session(target))
+
+    def new_tab(self, url='about:blank'):
+        target = self.call('Target.createTarget', {'url': url})['targetId']
+        with self._lock:
+            self._active = target
+        return target
+
+    def close_tab(self):
+        target = self.active_target()
+        url = self.call('Target.getTargetInfo', {'targetId': target})['targetInfo'].get('url')
+        self.call('Target.closeTarget', {'targetId': target})
+        with self._lock:
+            if url:
+                self._closed_urls.append(url)
+            self._active = None
+            self._sessions.pop(target, None)
+
+    def reopen_tab(self):
+        with self._lock:
+            url = self._closed_urls.pop() if self._closed_urls else None
+        if url is None:
+            raise CdpError('No hay pestañas cerradas que reabrir')
+        return self.new_tab(url)
+
+    def activate(self, target):
+        self.call('Target.activateTarget', {'targetId': target})
+        with self._lock:
+            self._active = target
+
+    def navigate(self, url):
+        self._page_call('Page.navigate', {'url': url})
+
+    def reload(self):
+        self._page_call('Page.reload')
+
+    def _history(self, step):
+        history = self._page_call('Page.getNavigationHistory')
+        index = history['currentIndex'] + step
+        entries = history['entries']
+        if not 0 <= index < len(entries):
+            return False
+        self._page_call('Page.navigateToHistoryEntry', {'entryId': entries[index]['id']})
+        return True
+
+    def back(self):
+        return self._history(-1)
+
+    def forward(self):
+        return self._history(1)
+
+    def scroll(self, amount):
+        """Desplaza la página; amount positivo sube, como pyautogui.scroll"""
+        self._page_call('Runtime.evaluate', {'expression': f'window.scrollBy(0, {-int(amount)})'})
+
+    def active_url(self):
+        target = self.active_target()
+        return self.call('Target.getTargetInfo', {'targetId': target})['targetInfo'].get('url', '')
+
+    def toggle_fullscreen(self):
+        window = self.call('Browser.getWindowForTarget', {'targetId': self.active_target()})
+        state = window.get('bounds', {}).get('windowState')
+        self.call('Browser.setWindowBounds', {
+            'windowId': window['windowId'],
+            'bounds': {'windowState': 'normal' if state == 'fullscreen' else 'fullscreen'}})
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,261 @@
+import hashlib
+import heapq
+import logging
+import math
+import os
+import pickle
+from collections import Counter
+
+# Cambiar si cambia el formato del índice o el preprocesado: invalida las cachés en disco
+CACHE_VERSION = 2
+
+
+class CommandIndex:
+    """Índice TF-IDF incremental de comandos (equivalente a TfidfVectorizer con smooth_idf y norma l2)"""
+
+    def __init__(self, tokenizer, ngram_range=(1, 2), rebuild_ratio=0.25, min_drift=64):
+        self.tokenizer = tokenizer
+        self.ngram_range = ngram_range
+        # Reconstrucción completa cuando los cambios acumulados superan este umbral
+        self.rebuild_ratio = rebuild_ratio
+        self.min_drift = min_drift
+
+        self._ids = {}        # comando -> id
+        self._commands = {}   # id -> comando
+        self._counts = {}     # id -> Counter de términos
+        self._df = Counter()  # término -> nº de comandos que lo contienen
+        self._postings = {}   # término -> {id: peso}
+        self._next_id = 0
+        self._drift = 0
+        self._matrix = None   # caché (términos, matriz términos x ids) para consultas por lotes
+
+    def __len__(self):
+        return len(self._commands)
+
+    def __getstate__(self):
+        # El tokenizador no se guarda en la caché: se vuelve a asignar al cargar
+        state = self.__dict__.copy()
+        state['tokenizer'] = None
+        state['_matrix'] = None
+        return state
+
+    def __contains__(self, command):
+        return command in self._ids
+
+    @property
+    def commands(self):
+        """Lista de comandos indexados en orden de inserción"""
+        return list(self._commands.values())
+
+    def _terms(self, text, tokens=None):
+        """Genera los n-gramas de tokens del texto"""
+        if tokens is None:
+            tokens = self.tokenizer(text)
+        lo, hi = self.ngram_range
+        terms = []
+        for n in range(lo, hi + 1):
+            for i in range(len(tokens) - n + 1):
+                terms.append(' '.join(tokens[i:i + n]))
+        return Counter(terms)
+
+    def _idf(self, term):
+        n = len(self._commands)
+        return math.log((1 + n) / (1 + self._df[term])) + 1.0
+
+    def _weights(self, counts):
+        """Calcula el vector tf-idf normalizado para unos conteos de términos"""
+        weights = {t: tf * self._idf(t) for t, tf in counts.items() if self._df[t]}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        if norm:
+            for t in weights:
+                weights[t] /= norm
+        return weights
+
+    def _post(self, doc_id):
+        self._matrix = None
+        for term, w in self._weights(self._counts[doc_id]).items():
+            self._postings.setdefault(term, {})[doc_id] = w
+
+    def _unpost(self, doc_id):
+        self._matrix = None
+        for term in self._counts[doc_id]:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+
+    def _insert(self, doc_id, command):
+        counts = self._terms(command)
+        self._ids[command] = doc_id
+        self._commands[doc_id] = command
+        self._counts[doc_id] = counts
+        self._df.update(counts.keys())
+        self._post(doc_id)
+
+    def _delete(self, doc_id):
+        self._unpost(doc_id)
+        counts = self._counts.pop(doc_id)
+        self._df.subtract(counts.keys())
+        for term in counts:
+            if self._df[term] <= 0:
+                del self._df[term]
+        del self._ids[self._commands.pop(doc_id)]
+
+    def _touch(self):
+        """Registra un cambio y reconstruye si la deriva del IDF es excesiva"""
+        self._drift += 1
+        if self._drift > max(self.min_drift, self.rebuild_ratio * len(self._commands)):
+            self.reindex()
+
+    def add(self, command):
+        """Añade un comando al índice sin reentrenar el resto"""
+        if command in self._ids:
+            return self._ids[command]
+        doc_id = self._next_id
+        self._next_id += 1
+        self._insert(doc_id, command)
+        self._touch()
+        return doc_id
+
+    def remove(self, command):
+        """Elimina un comando del índice"""
+        doc_id = self._ids.get(command)
+        if doc_id is None:
+            return False
+        self._delete(doc_id)
+        self._touch()
+        return True
+
+    def rename(self, old, new):
+        """Renombra un comando conservando su id"""
+        doc_id = self._ids.get(old)
+        if doc_id is None or new in self._ids:
+            return False
+        self._delete(doc_id)
+        self._insert(doc_id, new)
+        self._touch()
+        return True
+
+    def reindex(self):
+        """Recalcula los pesos de todos los comandos con el IDF actual"""
+        self._matrix = None
+        self._postings = {}
+        for doc_id in self._commands:
+            self._post(doc_id)
+        self._drift = 0
+
+    def rebuild(self, commands):
+        """Reconstruye el índice completo a partir de una lista de comandos"""
+        self._ids, self._commands, self._counts = {}, {}, {}
+        self._df = Counter()
+        self._next_id = 0
+        commands = list(dict.fromkeys(commands))
+        # Si el tokenizador admite lotes, se normalizan todos los comandos de una vez
+        normalize_many = getattr(self.tokenizer, 'normalize_many', None)
+        token_lists = normalize_many(commands) if normalize_many else [None] * len(commands)
+        for command, tokens in zip(commands, token_lists):
+            counts = self._terms(command, tokens)
+            self._ids[command] = self._next_id
+            self._commands[self._next_id] = command
+            self._counts[self._next_id] = counts
+            self._df.update(counts.keys())
+            self._next_id += 1
+        self.reindex()
+        logging.info('Índice de comandos reconstruido con %d comandos', len(self._commands))
+
+    def query(self, text, k=1):
+        """Devuelve los k comandos más similares como lista de (comando, similitud)"""
+        qvec = self._weights(self._terms(text))
+        scores = {}
+        for term, qw in qvec.items():
+            for doc_id, w in self._postings.get(term, {}).items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + qw * w
+        top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self._commands[doc_id], score) for doc_id, score in top]
+
+    def best_match(self, text):
+        """Devuelve el comando más similar y su similitud"""
+        top = self.query(text, k=1)
+        return top[0] if top else (None, 0.0)
+
+    def _sparse_matrix(self, sparse):
+        if getattr(self, '_matrix', None) is None:
+            terms = {term: i for i, term in enumerate(self._postings)}
+            rows, cols, vals = [], [], []
+            for term, posting in self._postings.items():
+                i = terms[term]
+                for doc_id, w in posting.items():
+                    rows.append(i)
+                    cols.append(doc_id)
+                    vals.append(w)
+            matrix = sparse.csr_matrix((vals, (rows, cols)), shape=(len(terms), self._next_id))
+            self._matrix = (terms, matrix)
+        return self._matrix
+
+    def best_matches(self, texts):
+        """best_match de varios textos con una sola multiplicación de matrices dispersas (scipy)"""
+        return [top[0] if top else (None, 0.0) for top in self.top_matches(texts)]
+
+    def top_matches(self, texts, k=1):
+        """query de varios textos con una sola multiplicación de matrices dispersas (scipy)"""
+        if not texts:
+            return []
+        try:
+            import numpy as np
+            from scipy import sparse
+        except ImportError:
+            return [self.query(text, k) for text in texts]
+        terms, matrix = self._sparse_matrix(sparse)
+        normalize_many = getattr(self.tokenizer, 'normalize_many', None)
+        token_lists = normalize_many(texts) if normalize_many else [None] * len(texts)
+        rows, cols, vals = [], [], []
+        for r, (text, tokens) in enumerate(zip(texts, token_lists)):
+            for term, w in self._weights(self._terms(text, tokens)).items():
+                col = terms.get(term)
+                if col is not None:
+                    rows.append(r)
+                    cols.append(col)
+                    vals.append(w)
+        queries = sparse.csr_matrix((vals, (rows, cols)), shape=(len(texts), len(terms)))
+        scores = (queries @ matrix).tocsr()
+        out = []
+        for r in range(len(texts)):
+            lo, hi = scores.indptr[r], scores.indptr[r + 1]
+            values, ids = scores.data[lo:hi], scores.indices[lo:hi]
+            # Empates: el id más bajo, como query()
+            order = np.lexsort((ids, -values))[:k]
+            out.append([(self._commands[int(ids[i])], float(values[i])) for i in order])
+        return out
+
+
+def commands_digest(commands, ngram_range=(1, 2), mode='tfidf', n_features=None):
+    """Huella del conjunto de comandos (y del tipo de índice y su nº de columnas) con la que se valida la caché"""
+    h = hashlib.sha256(f'{CACHE_VERSION}|{mode}|{ngram_range}|{n_features}'.encode())
+    for command in commands:
+        h.update(b'\0' + command.encode('utf-8'))
+    return h.hexdigest()
+
+
+def save_index(index, path, digest):
+    """Guarda el índice entrenado en disco junto con la huella de sus comandos"""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump((digest, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load_index(path, digest, tokenizer):
+    """Carga el índice de la caché si su huella coincide; si no, devuelve None"""
+    try:
+        with open(path, 'rb') as f:
+            cached_digest, index = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"Caché del índice ilegible, se reentrenará: {e}")
+        return None
+    if cached_digest != digest:
+        return None
+    index.tokenizer = tokenizer
+    return index
@@ -0,0 +1,282 @@
+"""Importación y exportación masiva de comandos personalizados (JSON, CSV, marcadores HTML).
+
+Los ficheros se leen en streaming, se validan y deduplican y se guardan en
+una sola transacción; el asistente reconstruye el índice una única vez al
+final (o en el siguiente arranque si se importa desde la línea de órdenes):
+
+    python command_io.py import marcadores.html
+    python command_io.py export comandos.csv
+"""
+import argparse
+import csv
+import html
+import json
+import logging
+import os
+import re
+import sys
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+import config
+
+FORMATS = {'.json': 'json', '.jsonl': 'json', '.ndjson': 'json', '.csv': 'csv', '.html': 'html', '.htm': 'html'}
+MAX_NAME_LENGTH = 100
+_CHUNK = 1 << 16
+_NON_WORD_RE = re.compile(r'[^\w]+')
+_URL_RE = re.compile(r'(?:https?://[^\s/?#]+|file://)\S*\Z', re.IGNORECASE)
+
+
+def detect_format(path):
+    """Formato por la extensión del fichero"""
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f'Formato no reconocido para {path} (usa json, csv o html)')
+    return fmt
+
+
+def normalize_name(text):
+    """Nombre de comando como lo devuelve el reconocedor: minúsculas, sin signos, espacios simples"""
+    return ' '.join(_NON_WORD_RE.sub(' ', text.lower()).replace('_', ' ').split())
+
+
+def valid_url(url):
+    """URL http(s) con host o file://, sin espacios (una expresión regular: urlparse es lento a 100k)"""
+    return _URL_RE.match(url) is not None
+
+
+def _pair(item):
+    """(nombre, url) de un objeto JSON con claves command/name/title y url/href"""
+    if not isinstance(item, dict):
+        return None, None
+    name = item.get('command') or item.get('name') or item.get('title')
+    url = item.get('url') or item.get('href')
+    return name, url
+
+
+def iter_json(f):
+    """Lee una lista JSON de objetos (sin cargarla entera), JSON Lines o un objeto {nombre: url}"""
+    decoder = json.JSONDecoder()
+    buf = f.read(_CHUNK)
+    start = len(buf) - len(buf.lstrip())
+    if buf[start:start + 1] == '{':
+        first, _, tail = buf[start:].partition('\n')
+        try:
+            item = json.loads(first)
+        except ValueError:
+            item = None
+        if not isinstance(item, dict) or not ('url' in item or 'href' in item):
+            # Objeto {nombre: url}: se carga entero
+            data = json.loads(buf + f.read())
+            yield from ((name, url) for name, url in data.items() if isinstance(url, str))
+            return
+        # JSON Lines: un objeto por línea
+        yield _pair(item)
+        # El resto del búfer termina a media línea: se completa con readline y se sigue con el fichero
+        for line in _chain((tail + f.readline()).splitlines(), f):
+            if line.strip():
+                yield _pair(json.loads(line))
+        return
+    if buf[start:start + 1] != '[':
+        raise ValueError('Se esperaba una lista JSON, JSON Lines o un objeto {nombre: url}')
+    pos, eof = start + 1, False
+    while True:
+        # Salta separadores y recarga el búfer cuando el siguiente objeto puede estar cortado
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            buf, pos = f.read(_CHUNK), 0
+            eof = not buf
+        if pos >= len(buf) or buf[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except ValueError:
+            if eof:
+                raise
+            more = f.read(_CHUNK)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+            continue
+        yield _pair(item)
+        pos = end
+        if pos > _CHUNK:
+            buf, pos = buf[pos:], 0
+
+
+def iter_csv(f):
+    """Filas nombre,url; la cabecera (command/name/title, url/href) es opcional"""
+    reader = csv.reader(f)
+    first = next(reader, None)
+    if first is None:
+        return
+    header = [h.strip().lower() for h in first]
+    name_col = next((header.index(k) for k in ('command', 'name', 'title', 'comando', 'nombre') if k in header), None)
+    url_col = next((header.index(k) for k in ('url', 'href') if k in header), None)
+    if name_col is None or url_col is None:
+        name_col, url_col = 0, 1
+        reader = _chain([first], reader)
+    for row in reader:
+        if len(row) > max(name_col, url_col):
+            yield row[name_col], row[url_col]
+        elif row:
+            yield None, None
+
+
+def _chain(head, rest):
+    yield from head
+    yield from rest
+
+
+class _BookmarkParser(HTMLParser):
+    """Marcadores exportados por los navegadores (formato Netscape): <A HREF="...">título</A>"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.found = []
+        self._href = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            self._href = dict(attrs).get('href') or ''
+            self._text = []
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._href is not None:
+            title = ''.join(self._text).strip() or urlparse(self._href).netloc
+            self.found.append((title, self._href))
+            self._href = None
+
+
+def iter_bookmarks(f):
+    parser = _BookmarkParser()
+    while True:
+        chunk = f.read(_CHUNK)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        yield from parser.found
+        parser.found.clear()
+    parser.close()
+    yield from parser.found
+
+
+READERS = {'json': iter_json, 'csv': iter_csv, 'html': iter_bookmarks}
+
+
+class ImportReport:
+    """Recuento de una importación"""
+
+    def __init__(self):
+        self.read = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.reserved = 0
+        self.added = 0
+        self.updated = 0
+        self.unchanged = 0
+
+    def __str__(self):
+        return (f'{self.read} leídos: {self.added} nuevos, {self.updated} actualizados, '
+                f'{self.unchanged} sin cambios, {self.duplicates} duplicados, '
+                f'{self.invalid} no válidos, {self.reserved} con nombre reservado')
+
+
+def clean_commands(pairs, report, reserved=(), on_progress=None, every=10000):
+    """Normaliza, valida y deduplica (gana la primera aparición de cada nombre)"""
+    seen = set()
+    for name, url in pairs:
+        report.read += 1
+        if on_progress is not None and report.read % every == 0:
+            on_progress(report.read)
+        name = normalize_name(name) if isinstance(name, str) else ''
+        url = url.strip() if isinstance(url, str) else ''
+        if not name or len(name) > MAX_NAME_LENGTH or not valid_url(url):
+            report.invalid += 1
+            continue
+        if name in reserved:
+            report.reserved += 1
+            continue
+        if name in seen:
+            report.duplicates += 1
+            continue
+        seen.add(name)
+        yield name, url
+    if on_progress is not None:
+        on_progress(report.read)
+
+
+def import_commands(store, path, fmt=None, reserved=(), on_progress=None, batch_size=5000):
+    """Importa un fichero al almacén en una transacción; devuelve un ImportReport"""
+    fmt = fmt or detect_format(path)
+    report = ImportReport()
+    newline = '' if fmt == 'csv' else None
+    with open(path, encoding='utf-8-sig', newline=newline) as f:
+        rows = clean_commands(READERS[fmt](f), report, reserved, on_progress)
+        report.added, report.updated, report.unchanged = store.bulk_upsert(rows, batch_size)
+    logging.info('Importación de %s: %s', path, report)
+    return report
+
+
+def export_commands(store, path, fmt=None):
+    """Escribe los comandos del almacén en JSON, CSV o marcadores HTML; devuelve cuántos"""
+    fmt = fmt or detect_format(path)
+    items = store.items()
+    with open(path, 'w', encoding='utf-8', newline='' if fmt == 'csv' else None) as f:
+        if fmt == 'json':
+            f.write('[\n')
+            for i, (name, url) in enumerate(items):
+                f.write(('  ' if i == 0 else ',\n  ') + json.dumps({'command': name, 'url': url}, ensure_ascii=False))
+            f.write('\n]\n')
+        elif fmt == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(['command', 'url'])
+            writer.writerows(items)
+        else:
+            f.write('<!DOCTYPE NETSCAPE-Bookmark-file-1>\n'
+                    '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">\n'
+                    '<TITLE>Bookmarks</TITLE>\n<H1>Bookmarks</H1>\n<DL><p>\n'
+                    '    <DT><H3>Leya</H3>\n    <DL><p>\n')
+            for name, url in items:
+                f.write(f'        <DT><A HREF="{html.escape(url)}">{html.escape(name)}</A>\n')
+            f.write('    </DL><p>\n</DL><p>\n')
+    logging.info('Exportados %d comandos a %s', len(items), path)
+    return len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importa o exporta comandos personalizados')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    for name, help_text in (('import', 'añade o actualiza comandos desde un fichero'),
+                            ('export', 'guarda los comandos en un fichero')):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('path')
+        p.add_argument('--format', choices=sorted(set(FORMATS.values())), help='por defecto, según la extensión')
+        p.add_argument('--db', default=config.COMMANDS_DB_PATH)
+    args = parser.parse_args()
+
+    from command_store import CommandStore
+    store = CommandStore(args.db)
+    try:
+        if args.cmd == 'import':
+            # Los nombres de los comandos integrados no se pueden importar (leya importa este módulo)
+            from leya import builtin_commands
+            report = import_commands(store, args.path, args.format, set(builtin_commands()),
+                                     on_progress=lambda n: print(f'\r{n} leídos...', end='', file=sys.stderr))
+            print(file=sys.stderr)
+            print(report)
+        else:
+            print(f'{export_commands(store, args.path, args.format)} comandos exportados a {args.path}')
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+import logging
+import sqlite3
+import threading
+
+
+class CommandStore:
+    """Almacén de comandos personalizados: una conexión SQLite persistente y caché en memoria"""
+
+    def __init__(self, path='commands.db', compact=False):
+        self.path = path
+        # Serializa las escrituras entre el hilo de la GUI y el de escucha
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._create_schema()
+        # Caché write-through comando -> url; las lecturas nunca tocan disco
+        rows = self._conn.execute('SELECT command, url FROM commands ORDER BY id')
+        if compact:
+            # Modo compacto (LEYA_MATCHER=compact): nombres y URLs en bloques UTF-8, no un dict de cadenas
+            from compact_index import PackedMap
+            self._cache = PackedMap(rows)
+        else:
+            self._cache = dict(rows)
+        logging.info('Almacén de comandos cargado con %d comandos', len(self._cache))
+
+    def _create_schema(self):
+        """Crea la tabla de comandos y el índice único sobre el nombre"""
+        with self._lock, self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS commands (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    command TEXT NOT NULL,
+                    url TEXT NOT NULL
+                )
+            ''')
+            indexed = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_commands_command'").fetchone()
+            if not indexed:
+                # Sólo bases antiguas, sin índice único, pueden tener duplicados: se limpian una vez
+                self._dedupe()
+            self._conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_commands_command ON commands (command)')
+            # Estadísticas de uso (ver UsageStats): pesos con decaimiento por comando y por comando anterior
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS usage (
+                    command TEXT PRIMARY KEY,
+                    weight REAL NOT NULL
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS usage_pairs (
+                    previous TEXT NOT NULL,
+                    command TEXT NOT NULL,
+                    weight REAL NOT NULL,
+                    PRIMARY KEY (previous, command)
+                )
+            ''')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS usage_meta (key TEXT PRIMARY KEY, value REAL NOT NULL)')
+
+    def _dedupe(self):
+        """Elimina los duplicados conservando el primero, como en la búsqueda original, y registra lo descartado"""
+        dropped = self._conn.execute('''
+            SELECT d.command, d.url, k.url
+            FROM (SELECT command, MIN(id) AS id FROM commands GROUP BY command) f
+            JOIN commands k ON k.id = f.id
+            JOIN commands d ON d.command = f.command AND d.id != f.id
+            ORDER BY d.id
+        ''').fetchall()
+        if not dropped:
+            return
+        self._conn.execute('''
+            DELETE FROM commands
+            WHERE id NOT IN (SELECT MIN(id) FROM commands GROUP BY command)
+        ''')
+        logging.warning('Eliminadas %d filas duplicadas de comandos personalizados', len(dropped))
+        for command, url, kept in dropped:
+            if url != kept:
+                logging.warning('Comando "%s": se conserva %s y se descarta %s', command, kept, url)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, command):
+        return command in self._cache
+
+    def __iter__(self):
+        """Recorre los nombres sin copiarlos (ver commands())"""
+        return iter(self._cache)
+
+    def get(self, command):
+        """Devuelve la URL de un comando o None"""
+        return self._cache.get(command)
+
+    def commands(self):
+        """Lista de comandos personalizados en orden de creación"""
+        return list(self._cache)
+
+    def row_ids(self, commands=None):
+        """Id de la fila de cada comando en la base de datos (de todos o de los dados)"""
+        with self._lock:
+            if commands is None:
+                return dict(self._conn.execute('SELECT command, id FROM commands'))
+            out = {}
+            for command in commands:
+                row = self._conn.execute('SELECT id FROM commands WHERE command = ?', (command,)).fetchone()
+                if row is not None:
+                    out[command] = row[0]
+            return out
+
+    def add(self, command, url):
+        """Guarda un comando; si ya existe actualiza su URL"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    'INSERT INTO commands (command, url) VALUES (?, ?) '
+                    'ON CONFLICT (command) DO UPDATE SET url = excluded.url',
+                    (command, url))
+            self._cache[command] = url
+
+    def remove(self, command):
+        """Elimina un comando; devuelve False si no existía"""
+        with self._lock:
+            with self._conn:
+                cur = self._conn.execute('DELETE FROM commands WHERE command = ?', (command,))
+            self._cache.pop(command, None)
+            return cur.rowcount > 0
+
+    def rename(self, old, new):
+        """Renombra un comando; lanza sqlite3.IntegrityError si el nuevo nombre ya existe"""
+        with self._lock:
+            with self._conn:
+                cur = self._conn.execute('UPDATE commands SET command = ? WHERE command = ?', (new, old))
+            if cur.rowcount == 0:
+                return False
+            self._cache[new] = self._cache.pop(old)
+            return True
+
+    def bulk_upsert(self, rows, batch_size=5000, on_progress=None):
+        """Guarda muchos (comando, url) en una sola transacción, por lotes.
+
+        Si algo falla no se guarda nada. Devuelve (nuevos, actualizados,
+        sin cambios); on_progress(escritos) se llama tras cada lote.
+        """
+        added = updated = unchanged = done = 0
+        pending = {}
+        with self._lock:
+            # Si algo falla la transacción se deshace y la caché no cambia
+            with self._conn:
+                batch = []
+                for command, url in rows:
+                    current = pending.get(command, self._cache.get(command))
+                    if current == url:
+                        unchanged += 1
+                        continue
+                    if current is None:
+                        added += 1
+                    else:
+                        updated += 1
+                    pending[command] = url
+                    batch.append((command, url))
+                    if len(batch) >= batch_size:
+                        done = self._write_batch(batch, done, on_progress)
+                if batch:
+                    done = self._write_batch(batch, done, on_progress)
+            # Los nuevos quedan al final en orden de importación, como los añade add()
+            self._cache.update(pending)
+        return added, updated, unchanged
+
+    def _write_batch(self, batch, done, on_progress):
+        self._conn.executemany(
+            'INSERT INTO commands (command, url) VALUES (?, ?) '
+            'ON CONFLICT (command) DO UPDATE SET url = excluded.url',
+            batch)
+        done += len(batch)
+        batch.clear()
+        if on_progress is not None:
+            on_progress(done)
+        return done
+
+    def load_usage(self):
+        """Estadísticas de uso guardadas: (época, {comando: peso}, {(anterior, comando): peso})"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM usage_meta WHERE key = 'epoch'").fetchone()
+            commands = dict(self._conn.execute('SELECT command, weight FROM usage'))
+            pairs = {(p, c): w for p, c, w in self._conn.execute('SELECT previous, command, weight FROM usage_pairs')}
+        return (row[0] if row else None), commands, pairs
+
+    def save_usage(self, epoch, commands, pairs, removed=(), removed_pairs=(), rebase=False):
+        """Escribe en una transacción los pesos cambiados y borra los descartados.
+
+        rebase=True indica que todos los pesos cambiaron de escala (época nueva):
+        commands y pairs son entonces las tablas completas.
+        """
+        with self._lock:
+            with self._conn:
+                if rebase:
+                    self._conn.execute('DELETE FROM usage')
+                    self._conn.execute('DELETE FROM usage_pairs')
+                self._conn.execute("INSERT OR REPLACE INTO usage_meta (key, value) VALUES ('epoch', ?)", (epoch,))
+                self._conn.executemany('INSERT OR REPLACE INTO usage (command, weight) VALUES (?, ?)',
+                                       commands.items())
+                self._conn.executemany('INSERT OR REPLACE INTO usage_pairs (previous, command, weight) VALUES (?, ?, ?)',
+                                       [(p, c, w) for (p, c), w in pairs.items()])
+                self._conn.executemany('DELETE FROM usage WHERE command = ?', [(c,) for c in removed])
+                self._conn.executemany('DELETE FROM usage_pairs WHERE previous = ? AND command = ?', removed_pairs)
+
+    def items(self):
+        """Pares (comando, url) en orden de creación"""
+        return list(self._cache.items())
+
+    def close(self):
+        """Cierra la conexión con la base de datos"""
+        with self._lock:
+            self._conn.close()
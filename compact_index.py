@@ -0,0 +1,545 @@
+import hashlib
+import logging
+import zlib
+from array import array
+
+import numpy as np
+from scipy import sparse
+
+from fuzzy_index import FuzzyIndex
+
+
+def _key(command):
+    """Huella de 64 bits del nombre de un comando (para buscarlo sin guardar un dict de cadenas)"""
+    return int.from_bytes(hashlib.blake2b(command.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class PackedStrings:
+    """Cadenas distintas en un bloque UTF-8 con offsets, sin un objeto str por cadena.
+
+    Cada cadena conserva su id (su posición) hasta compact(); las que se
+    quitan quedan como huecos. Se buscan por su huella de 64 bits: un array
+    ordenado más un dict pequeño con las añadidas desde la última fusión.
+    """
+
+    def __init__(self, strings=()):
+        self._data = bytearray()
+        self._offsets = array('q', [0])  # id -> inicio de la cadena en _data
+        self._alive = bytearray()        # id -> 1 si sigue en el conjunto
+        self._keys = np.zeros(0, dtype=np.uint64)    # huellas ordenadas ...
+        self._key_ids = np.zeros(0, dtype=np.int32)  # ... y su id
+        self._recent = {}                # huella -> id de lo añadido desde la última fusión
+        self._live = 0
+        self.extend(strings)
+
+    def __len__(self):
+        return self._live
+
+    def __contains__(self, string):
+        return self.find(string) is not None
+
+    def __getitem__(self, string_id):
+        return self._data[self._offsets[string_id]:self._offsets[string_id + 1]].decode('utf-8')
+
+    def __iter__(self):
+        """Las cadenas vivas en orden de inserción"""
+        for string_id in range(len(self._alive)):
+            if self._alive[string_id]:
+                yield self[string_id]
+
+    @property
+    def slots(self):
+        """Nº de ids usados, contando los huecos"""
+        return len(self._alive)
+
+    @property
+    def holes(self):
+        return len(self._alive) - self._live
+
+    def alive(self, string_id):
+        return self._alive[string_id] == 1
+
+    def alive_mask(self):
+        """Array booleano id -> sigue en el conjunto"""
+        return np.frombuffer(self._alive, dtype=np.uint8) == 1
+
+    def find(self, string):
+        """Id de la cadena o None"""
+        return self._find(string, _key(string))
+
+    def _find(self, string, key):
+        string_id = self._recent.get(key)
+        if string_id is None and len(self._keys):
+            pos = int(self._keys.searchsorted(np.uint64(key)))
+            if pos < len(self._keys) and int(self._keys[pos]) == key:
+                string_id = int(self._key_ids[pos])
+        # Colisiones de 64 bits: despreciables, pero se comprueba la cadena igualmente
+        if string_id is None or not self._alive[string_id] or self[string_id] != string:
+            return None
+        return string_id
+
+    def _push(self, string, key):
+        string_id = len(self._alive)
+        self._data += string.encode('utf-8')
+        self._offsets.append(len(self._data))
+        self._alive.append(1)
+        self._recent[key] = string_id
+        self._live += 1
+        return string_id
+
+    def append(self, string):
+        """Añade una cadena al final y devuelve su id (el que ya tenía si estaba)"""
+        key = _key(string)
+        string_id = self._find(string, key)
+        if string_id is None:
+            string_id = self._push(string, key)
+            if len(self._recent) > max(4096, len(self._keys) // 8):
+                self._merge()
+        return string_id
+
+    def extend(self, strings):
+        """append() de muchas cadenas, fusionando las huellas una sola vez al final; devuelve sus ids"""
+        ids = []
+        for string in strings:
+            key = _key(string)
+            string_id = self._find(string, key)
+            ids.append(self._push(string, key) if string_id is None else string_id)
+        self._merge()
+        return ids
+
+    def remove(self, string):
+        """Quita una cadena; devuelve el id que tenía o None si no estaba"""
+        string_id = self.find(string)
+        if string_id is None:
+            return None
+        self._alive[string_id] = 0
+        self._live -= 1
+        self._recent.pop(_key(string), None)
+        return string_id
+
+    def compact(self):
+        """Quita los huecos (los ids cambian); devuelve el id antiguo de cada cadena que queda"""
+        keep = [i for i in range(len(self._alive)) if self._alive[i]]
+        data, offsets = bytearray(), array('q', [0])
+        for i in keep:
+            data += self._data[self._offsets[i]:self._offsets[i + 1]]
+            offsets.append(len(data))
+        self._data, self._offsets = data, offsets
+        self._alive = bytearray(b'\x01') * len(keep)
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._key_ids = np.zeros(0, dtype=np.int32)
+        self._recent = {_key(self[i]): i for i in range(len(keep))}
+        self._merge()
+        return keep
+
+    def _merge(self):
+        """Pasa las huellas recientes al array ordenado (y descarta las de cadenas quitadas)"""
+        if not self._recent and len(self._keys) <= self._live:
+            return
+        keys = np.concatenate([self._keys, np.fromiter(self._recent.keys(), dtype=np.uint64, count=len(self._recent))])
+        ids = np.concatenate([self._key_ids, np.fromiter(self._recent.values(), dtype=np.int32, count=len(self._recent))])
+        live = self.alive_mask()[ids]
+        keys, ids = keys[live], ids[live]
+        order = np.argsort(keys, kind='stable')
+        self._keys, self._key_ids = keys[order], ids[order]
+        self._recent = {}
+
+
+class PackedMap:
+    """dict de cadena a cadena con las claves en PackedStrings y los valores en otro bloque UTF-8.
+
+    Mismo orden que un dict: una clave nueva va al final y cambiar el valor
+    de una existente no la mueve. Los valores sustituidos se recuperan al
+    compactar, cuando el espacio perdido es mucho.
+    """
+
+    def __init__(self, items=()):
+        self._keys = PackedStrings()
+        self._data = bytearray()
+        self._start = array('q')         # id de la clave -> inicio del valor en _data
+        self._end = array('q')
+        self._waste = 0
+        self.update(items)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def _value(self, key_id):
+        return self._data[self._start[key_id]:self._end[key_id]].decode('utf-8')
+
+    def get(self, key, default=None):
+        key_id = self._keys.find(key)
+        return default if key_id is None else self._value(key_id)
+
+    def __getitem__(self, key):
+        key_id = self._keys.find(key)
+        if key_id is None:
+            raise KeyError(key)
+        return self._value(key_id)
+
+    def __setitem__(self, key, value):
+        key_id = self._keys.append(key)
+        if key_id == len(self._start):
+            self._start.append(0)
+            self._end.append(0)
+        else:
+            self._waste += self._end[key_id] - self._start[key_id]
+        self._start[key_id] = len(self._data)
+        self._data += value.encode('utf-8')
+        self._end[key_id] = len(self._data)
+        self._maybe_compact()
+
+    def pop(self, key, default=None):
+        key_id = self._keys.remove(key)
+        if key_id is None:
+            return default
+        value = self._value(key_id)
+        self._waste += self._end[key_id] - self._start[key_id]
+        self._maybe_compact()
+        return value
+
+    def update(self, items):
+        items = list(items.items() if hasattr(items, 'items') else items)
+        known = len(self._start)
+        for (key, value), key_id in zip(items, self._keys.extend(key for key, _ in items)):
+            if key_id >= known:
+                self._start.append(0)
+                self._end.append(0)
+                known += 1
+            else:
+                self._waste += self._end[key_id] - self._start[key_id]
+            self._start[key_id] = len(self._data)
+            self._data += value.encode('utf-8')
+            self._end[key_id] = len(self._data)
+        self._maybe_compact()
+
+    def items(self):
+        """Pares (clave, valor) en orden de inserción"""
+        for key_id in range(self._keys.slots):
+            if self._keys.alive(key_id):
+                yield self._keys[key_id], self._value(key_id)
+
+    def _maybe_compact(self):
+        if self._keys.holes <= max(64, len(self._keys) // 4) and self._waste <= max(1 << 16, len(self._data) // 2):
+            return
+        data, start, end = bytearray(), array('q'), array('q')
+        for key_id in self._keys.compact():
+            start.append(len(data))
+            data += self._data[self._start[key_id]:self._end[key_id]]
+            end.append(len(data))
+        self._data, self._start, self._end = data, start, end
+        self._waste = 0
+
+
+class CommandList:
+    """all_commands en modo compacto: los comandos integrados más los del almacén, sin copiarlos.
+
+    Se lee como la lista (iterar, len, in, sumarle otra lista). append(),
+    remove() y replace() no hacen nada: los comandos personalizados ya se
+    guardan, quitan o renombran en el almacén antes de llamarlos.
+    """
+
+    def __init__(self, builtins, store):
+        self.builtins = list(builtins)
+        self._builtin_set = set(self.builtins)
+        self.store = store
+
+    def __iter__(self):
+        yield from self.builtins
+        yield from self.store
+
+    def __len__(self):
+        return len(self.builtins) + len(self.store)
+
+    def __contains__(self, command):
+        return command in self._builtin_set or command in self.store
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def append(self, command):
+        pass
+
+    def remove(self, command):
+        pass
+
+    def replace(self, old, new):
+        pass
+
+
+class CompactFuzzyIndex(FuzzyIndex):
+    """FuzzyIndex con los nombres en PackedStrings y las listas de n-gramas en arrays de ids.
+
+    Quitar un comando sólo lo marca como hueco: sus ids se saltan al buscar
+    y el índice se rehace cuando los huecos son muchos.
+    """
+
+    def _reset(self):
+        self._names = PackedStrings()
+        self._sizes = array('I')          # id -> nº de n-gramas distintos
+        self._postings = {}               # n-grama -> array de ids
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, command):
+        return command in self._names
+
+    def _command(self, doc_id):
+        return self._names[doc_id]
+
+    def add(self, command):
+        if command in self._names:
+            return False
+        doc_id = self._names.append(command)
+        grams = self._grams(command)
+        self._sizes.append(len(grams))
+        for g in grams:
+            ids = self._postings.get(g)
+            if ids is None:
+                ids = self._postings[g] = array('I')
+            ids.append(doc_id)
+        return True
+
+    def remove(self, command):
+        if self._names.remove(command) is None:
+            return False
+        if self._names.holes > max(64, len(self._names) // 4):
+            self.rebuild(list(self._names))
+        return True
+
+    def rebuild(self, commands):
+        self._reset()
+        commands = list(commands)
+        known = 0
+        for command, doc_id in zip(commands, self._names.extend(commands)):
+            if doc_id < known:
+                continue    # repetido
+            known += 1
+            grams = self._grams(command)
+            self._sizes.append(len(grams))
+            for g in grams:
+                ids = self._postings.get(g)
+                if ids is None:
+                    ids = self._postings[g] = array('I')
+                ids.append(doc_id)
+
+    def _live(self, counts):
+        if not self._names.holes:
+            return counts
+        alive = self._names.alive
+        return {doc_id: c for doc_id, c in counts.items() if alive(doc_id)}
+
+
+class CompactIndex:
+    """Índice TF-IDF compacto para conjuntos de comandos muy grandes (misma interfaz que CommandIndex).
+
+    Los n-gramas se proyectan en un espacio fijo de n_features columnas
+    (truco del hashing, CRC32: sin vocabulario de cadenas y con colisiones
+    despreciables); los conteos, los nombres y los ids se guardan en arrays
+    planos y la matriz de pesos es float32 con norma l2 y sólo tiene filas
+    para las columnas usadas. El IDF se recalcula entero (con numpy) al
+    reconstruir la matriz en la primera consulta tras un cambio, así que no
+    hay deriva. Con un store (CommandStore) cada
+    comando guarda el id de su fila en commands.db: row_id(comando).
+    n_features=2^32 es todo el rango de CRC32: un espacio menor sólo añade
+    colisiones, porque la matriz ya sólo tiene filas para las columnas usadas.
+    """
+
+    def __init__(self, tokenizer, ngram_range=(1, 2), n_features=1 << 32, store=None):
+        self.tokenizer = tokenizer
+        self.ngram_range = ngram_range
+        self.n_features = n_features
+        self.store = store
+        self._clear()
+
+    def _clear(self):
+        self._indptr = array('q', [0])   # doc -> inicio de sus columnas en _features
+        self._features = array('I')      # columnas (n-gramas con hashing)
+        self._tf = array('f')            # frecuencia de cada columna en el comando
+        self._names = PackedStrings()    # doc -> nombre (el id del doc es el de su nombre)
+        self._rows = array('q')          # doc -> id en commands.db (-1 si no tiene)
+        self._matrix = None
+
+    def __len__(self):
+        return len(self._names)
+
+    def __getstate__(self):
+        # El tokenizador, el almacén y la matriz no se guardan en la caché: se asignan al cargar
+        state = self.__dict__.copy()
+        state['tokenizer'] = None
+        state['store'] = None
+        state['_matrix'] = None
+        return state
+
+    def __contains__(self, command):
+        return command in self._names
+
+    def _name(self, doc_id):
+        return self._names[doc_id]
+
+    @property
+    def commands(self):
+        """Lista de comandos indexados en orden de inserción"""
+        return list(self._names)
+
+    def row_id(self, command):
+        """Id de la fila del comando en commands.db (-1 si es integrado, None si no está)"""
+        doc_id = self._names.find(command)
+        return None if doc_id is None else self._rows[doc_id]
+
+    def _columns(self, text, tokens=None):
+        """n-gramas de tokens del texto -> {columna: frecuencia}"""
+        if tokens is None:
+            tokens = self.tokenizer(text)
+        lo, hi = self.ngram_range
+        counts = {}
+        for n in range(lo, hi + 1):
+            for i in range(len(tokens) - n + 1):
+                col = zlib.crc32(' '.join(tokens[i:i + n]).encode('utf-8')) % self.n_features
+                counts[col] = counts.get(col, 0) + 1
+        return counts
+
+    def _append(self, command, counts, row_id):
+        doc_id = self._names.append(command)
+        self._features.extend(counts.keys())
+        self._tf.extend(counts.values())
+        self._indptr.append(len(self._features))
+        self._rows.append(row_id)
+        return doc_id
+
+    def add(self, command, row_id=None):
+        """Añade un comando; la matriz se recalcula en la siguiente consulta"""
+        doc_id = self._names.find(command)
+        if doc_id is not None:
+            return doc_id
+        if row_id is None:
+            row_id = self.store.row_ids([command]).get(command, -1) if self.store is not None else -1
+        doc_id = self._append(command, self._columns(command), row_id)
+        self._matrix = None
+        return doc_id
+
+    def remove(self, command):
+        """Elimina un comando del índice"""
+        if self._names.remove(command) is None:
+            return False
+        self._matrix = None
+        # Los huecos se recuperan cuando son muchos
+        if self._names.holes > max(64, len(self._names) // 4):
+            self.reindex()
+        return True
+
+    def rename(self, old, new):
+        """Renombra un comando conservando su fila en commands.db"""
+        doc_id = self._names.find(old)
+        if doc_id is None or new in self._names:
+            return False
+        row_id = self._rows[doc_id]
+        self.remove(old)
+        self.add(new, row_id)
+        return True
+
+    def reindex(self):
+        """Compacta los arrays (quita los comandos eliminados; los ids internos cambian)"""
+        indptr, features, tf, rows = array('q', [0]), array('I'), array('f'), array('q')
+        for i in self._names.compact():
+            features.extend(self._features[self._indptr[i]:self._indptr[i + 1]])
+            tf.extend(self._tf[self._indptr[i]:self._indptr[i + 1]])
+            indptr.append(len(features))
+            rows.append(self._rows[i])
+        self._indptr, self._features, self._tf, self._rows = indptr, features, tf, rows
+        self._matrix = None
+
+    def rebuild(self, commands):
+        """Reconstruye el índice completo a partir de una lista de comandos"""
+        self._clear()
+        row_ids = self.store.row_ids() if self.store is not None else {}
+        commands = list(dict.fromkeys(commands))
+        normalize_many = getattr(self.tokenizer, 'normalize_many', None)
+        token_lists = normalize_many(commands) if normalize_many else [None] * len(commands)
+        self._names.extend(commands)
+        for command, tokens in zip(commands, token_lists):
+            counts = self._columns(command, tokens)
+            self._features.extend(counts.keys())
+            self._tf.extend(counts.values())
+            self._indptr.append(len(self._features))
+            self._rows.append(row_ids.get(command, -1))
+        self._weights()
+        logging.info('Índice compacto reconstruido con %d comandos', len(self._names))
+
+    def _weights(self):
+        """(columnas usadas, idf, matriz columnas x docs float32 de pesos tf-idf normalizados)"""
+        if self._matrix is None:
+            n_docs = self._names.slots
+            indptr = np.frombuffer(self._indptr, dtype=np.int64)
+            doc_of = np.repeat(np.arange(n_docs, dtype=np.int32), np.diff(indptr))
+            live = self._names.alive_mask()[doc_of]
+            doc_of = doc_of[live]
+            # Sólo las columnas con algún comando: df, idf y filas de la matriz no dependen de n_features
+            used, rows, df = np.unique(np.frombuffer(self._features, dtype=np.uint32)[live],
+                                       return_inverse=True, return_counts=True)
+            idf = (np.log((1 + len(self._names)) / (1 + df)) + 1).astype(np.float32)
+            weights = np.frombuffer(self._tf, dtype=np.float32)[live] * idf[rows]
+            norms = np.sqrt(np.bincount(doc_of, weights=weights * weights, minlength=n_docs)).astype(np.float32)
+            weights /= norms[doc_of]
+            matrix = sparse.csr_matrix((weights, (rows.ravel(), doc_of)), shape=(len(used), n_docs))
+            self._matrix = (used, idf, matrix)
+        return self._matrix
+
+    def _query_matrix(self, texts, used, idf):
+        normalize_many = getattr(self.tokenizer, 'normalize_many', None)
+        token_lists = normalize_many(texts) if normalize_many else [None] * len(texts)
+        indptr, cols, vals = [0], [], []
+        for text, tokens in zip(texts, token_lists):
+            counts = self._columns(text, tokens)
+            c = np.fromiter(counts.keys(), dtype=np.uint32, count=len(counts))
+            w = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            # Las columnas que no aparecen en ningún comando no puntúan (como los términos desconocidos)
+            pos = np.minimum(np.searchsorted(used, c), max(len(used) - 1, 0))
+            known = used[pos] == c if len(used) else np.zeros(len(c), dtype=bool)
+            pos, w = pos[known], w[known] * idf[pos[known]]
+            norm = np.sqrt((w * w).sum())
+            cols.append(pos)
+            vals.append(w / norm if norm else w)
+            indptr.append(indptr[-1] + len(pos))
+        return sparse.csr_matrix((np.concatenate(vals), np.concatenate(cols), indptr),
+                                 shape=(len(texts), len(used)), dtype=np.float32)
+
+    def _scores(self, texts):
+        used, idf, matrix = self._weights()
+        return (self._query_matrix(texts, used, idf) @ matrix).tocsr()
+
+    @staticmethod
+    def _top(scores, r, k):
+        """k mejores (doc, similitud) de la fila r; empates: el id más bajo"""
+        lo, hi = scores.indptr[r], scores.indptr[r + 1]
+        values, ids = scores.data[lo:hi], scores.indices[lo:hi]
+        order = np.lexsort((ids, -values))[:k]
+        return [(int(ids[i]), float(values[i])) for i in order if values[i] > 0]
+
+    def query(self, text, k=1):
+        """Devuelve los k comandos más similares como lista de (comando, similitud)"""
+        return [(self._name(doc_id), score) for doc_id, score in self._top(self._scores([text]), 0, k)]
+
+    def best_match(self, text):
+        """Devuelve el comando más similar y su similitud"""
+        top = self.query(text, k=1)
+        return top[0] if top else (None, 0.0)
+
+    def best_matches(self, texts):
+        """best_match de varios textos con una sola multiplicación de matrices dispersas"""
+        return [top[0] if top else (None, 0.0) for top in self.top_matches(texts)]
+
+    def top_matches(self, texts, k=1):
+        """query de varios textos con una sola multiplicación de matrices dispersas"""
+        if not texts:
+            return []
+        scores = self._scores(texts)
+        return [[(self._name(doc_id), score) for doc_id, score in self._top(scores, r, k)]
+                for r in range(len(texts))]
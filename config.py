@@ -0,0 +1,100 @@
+import os
+
+# Configuración de Leya; cada valor puede sobrescribirse con una variable de entorno
+
+# Base de datos de comandos personalizados
+COMMANDS_DB_PATH = os.environ.get('LEYA_DB', 'commands.db')
+
+# Idioma del reconocimiento de voz
+LANGUAGE = os.environ.get('LEYA_LANGUAGE', 'es-ES')
+
+# Reconocedor de voz: 'google' (en la nube), 'vosk' (sin conexión) o 'fixture' (pruebas)
+RECOGNIZER_BACKEND = os.environ.get('LEYA_RECOGNIZER', 'google')
+
+# Modelo de Vosk en español (https://alphacephei.com/vosk/models)
+VOSK_MODEL_PATH = os.environ.get('LEYA_VOSK_MODEL', os.path.join('models', 'vosk-model-small-es-0.42'))
+
+# Restringir el vocabulario del reconocedor sin conexión a los comandos conocidos
+RECOGNIZER_CONSTRAINED = os.environ.get('LEYA_RECOGNIZER_CONSTRAINED', '1') == '1'
+
+# Transcripciones para el reconocedor de pruebas (JSON, ver FixtureRecognizer); obligatorio con 'fixture'
+RECOGNIZER_FIXTURE = os.environ.get('LEYA_RECOGNIZER_FIXTURE')
+
+# Cortar la voz de Leya cuando el usuario empieza a hablar. Recomendado sólo con
+# auriculares: con altavoces el micrófono capta a la propia Leya y se interrumpiría
+BARGE_IN = os.environ.get('LEYA_BARGE_IN', '0') == '1'
+
+# Caché en disco del buscador de comandos entrenado (se invalida si cambian los comandos)
+MATCHER_CACHE_PATH = os.environ.get('LEYA_MATCHER_CACHE', 'matcher_cache.pkl')
+
+# Buscador de comandos: 'tfidf' (índice incremental con vocabulario) o 'compact' (n-gramas con
+# hashing en un espacio de MATCHER_FEATURES columnas, arrays planos y pesos float32; nombres y URLs
+# empaquetados también en el almacén y en la búsqueda aproximada: mucha menos memoria con 100k+
+# comandos). 2^32 es todo el rango de CRC32, así que no se añaden colisiones al hash. Un espacio
+# menor no ahorra memoria (la matriz sólo tiene filas para las columnas usadas y cada columna ocupa
+# 4 bytes igualmente) y con 2^18 a 100k comandos las colisiones costaban unos 10 puntos de precisión
+MATCHER_MODE = os.environ.get('LEYA_MATCHER', 'tfidf')
+MATCHER_FEATURES = int(os.environ.get('LEYA_MATCHER_FEATURES', str(1 << 32)))
+
+# Trazas de latencia por etapa: JSONL por interacción y estadísticas en http://127.0.0.1:PUERTO/
+TRACE_ENABLED = os.environ.get('LEYA_TRACE', '0') == '1'
+TRACE_PATH = os.environ.get('LEYA_TRACE_FILE', 'leya_trace.jsonl')
+TRACE_STATS_PORT = int(os.environ.get('LEYA_TRACE_PORT', '0'))
+
+# Palabras de activación (separadas por comas); la primera es la que se anuncia
+WAKE_WORDS = [w.strip() for w in os.environ.get('LEYA_WAKE_WORDS', 'surge').split(',') if w.strip()]
+
+# Detector local de activación: plantillas WAV en DIR/<palabra>/*.wav (sin plantillas se
+# usa el reconocedor completo). Umbral de distancia: más bajo = menos falsas activaciones.
+# benchmarks/eval_wake_word.py --synthetic: 0 % de rechazos y 0 % de falsas activaciones hasta
+# 0.20; 10 % de falsas a 0.25, 92,5 % a 0.30 y 100 % a 0.35. 0.15 deja margen por ambos lados
+WAKE_TEMPLATES_DIR = os.environ.get('LEYA_WAKE_TEMPLATES', 'wake_words')
+WAKE_THRESHOLD = float(os.environ.get('LEYA_WAKE_THRESHOLD', '0.15'))
+
+# Fin de frase: silencio final entre MIN y MAX segundos según la frase (MIN cuando ya se
+# reconoce un comando completo) y duración máxima de una frase. ADAPTIVE=0 vuelve al
+# silencio fijo de MAX segundos y frases de hasta 5 s
+ENDPOINT_ADAPTIVE = os.environ.get('LEYA_ENDPOINT_ADAPTIVE', '1') == '1'
+ENDPOINT_MIN_PAUSE = float(os.environ.get('LEYA_ENDPOINT_MIN_PAUSE', '0.35'))
+ENDPOINT_MAX_PAUSE = float(os.environ.get('LEYA_ENDPOINT_MAX_PAUSE', '1.0'))
+MAX_UTTERANCE_SECONDS = float(os.environ.get('LEYA_MAX_UTTERANCE', '15'))
+
+# Con un reconocedor que da hipótesis parciales (vosk): preparar la intención (DNS, conexión CDP,
+# foco de Chrome) en cuanto la hipótesis es un comando completo; se deshace si la frase final es otra
+SPECULATE = os.environ.get('LEYA_SPECULATE', '1') == '1'
+
+# Frases resueltas que se recuerdan (0 desactiva la caché de resoluciones)
+RESOLUTION_CACHE_SIZE = int(os.environ.get('LEYA_RESOLUTION_CACHE', '1024'))
+
+# Ordenar las coincidencias dudosas también por el uso guardado en commands.db: frecuencia de cada
+# comando (su peso se reduce a la mitad cada USAGE_HALF_LIFE_DAYS días) y comando anterior. Con
+# USAGE_WEIGHT 1 un comando que casi siempre se dice en ese contexto se ejecuta sin pedir confirmación.
+# Los contadores se escriben por lotes cada USAGE_FLUSH_SECONDS y se guardan como mucho
+# USAGE_MAX_COMMANDS comandos y USAGE_MAX_PAIRS pares (anterior, comando)
+USAGE_PRIORS = os.environ.get('LEYA_USAGE_PRIORS', '1') == '1'
+USAGE_WEIGHT = float(os.environ.get('LEYA_USAGE_WEIGHT', '1.0'))
+USAGE_HALF_LIFE_DAYS = float(os.environ.get('LEYA_USAGE_HALF_LIFE_DAYS', '14'))
+USAGE_FLUSH_SECONDS = float(os.environ.get('LEYA_USAGE_FLUSH_SECONDS', '2'))
+USAGE_MAX_COMMANDS = int(os.environ.get('LEYA_USAGE_MAX_COMMANDS', '2000'))
+USAGE_MAX_PAIRS = int(os.environ.get('LEYA_USAGE_MAX_PAIRS', '10000'))
+
+# Ejecutar las acciones en segundo plano (en orden por destino) para seguir escuchando,
+# y segundos tras los que una acción colgada se abandona
+ASYNC_ACTIONS = os.environ.get('LEYA_ASYNC_ACTIONS', '1') == '1'
+ACTION_TIMEOUT = float(os.environ.get('LEYA_ACTION_TIMEOUT', '15'))
+
+# Segundos que se reutiliza la lista de procesos en ejecución antes de volver a consultarla
+PROBE_TTL = float(os.environ.get('LEYA_PROBE_TTL', '5'))
+
+# Control del navegador: 'keyboard' (atajos simulados con pyautogui) o 'cdp' (protocolo DevTools de
+# Chrome por una conexión persistente; Chrome se abre con --remote-debugging-port=CDP_PORT). Chrome
+# 136+ sólo acepta la depuración remota con un perfil propio (CDP_PROFILE, vacío = perfil por defecto)
+BROWSER_BACKEND = os.environ.get('LEYA_BROWSER', 'keyboard')
+CDP_PORT = int(os.environ.get('LEYA_CDP_PORT', '9222'))
+CDP_PROFILE_DIR = os.environ.get('LEYA_CDP_PROFILE', '')
+
+# Servidor de resolución sin interfaz (resolution_server.py): puerto local, máximo de frases por
+# consulta conjunta al buscador y milisegundos que se espera a juntar más peticiones
+SERVER_PORT = int(os.environ.get('LEYA_SERVER_PORT', '8765'))
+SERVER_MAX_BATCH = int(os.environ.get('LEYA_SERVER_MAX_BATCH', '64'))
+SERVER_MAX_DELAY_MS = float(os.environ.get('LEYA_SERVER_MAX_DELAY_MS', '1'))
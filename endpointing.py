@@ -0,0 +1,109 @@
+from array import array
+from collections import namedtuple
+
+# kind: 'start' o 'end'; reason (sólo en 'end'): 'silence', 'complete' o 'limit'.
+# offset: segundos de audio desde que empezó la captura; length: duración de la frase
+EndpointEvent = namedtuple('EndpointEvent', ['kind', 'reason', 'offset', 'length'])
+
+
+def zero_crossing_rate(frame):
+    """Fracción de cambios de signo en un bloque PCM de 16 bits (alta en fricativas como la 's')"""
+    samples = array('h', frame)
+    if len(samples) < 2:
+        return 0.0
+    crossings = sum(1 for a, b in zip(samples, samples[1:]) if (a < 0) != (b < 0))
+    return crossings / (len(samples) - 1)
+
+
+class Endpointer:
+    """Detecta el principio y el final de cada frase bloque a bloque.
+
+    El silencio final exigido se adapta a la frase: parte de max_pause, se
+    acorta según las pausas internas del hablante (pause_factor veces la
+    mediana) y baja a min_pause en cuanto completion_hint() indica que lo
+    dicho ya es un comando completo. Con adaptive=False se comporta como el
+    umbral fijo de antes (pause_threshold/phrase_time_limit).
+    """
+
+    def __init__(self, min_pause=0.35, max_pause=1.0, max_length=15.0, pause_factor=2.5,
+                 min_gap=0.08, weak_ratio=0.5, fricative_zcr=0.25, noise_margin=1.2, adaptive=True):
+        self.min_pause = min_pause
+        self.max_pause = max_pause
+        self.max_length = max_length
+        self.pause_factor = pause_factor
+        # Pausas internas más cortas que esto no cuentan (huecos entre sílabas)
+        self.min_gap = min_gap
+        # Con la frase en curso, un bloque débil pero con muchos cruces por cero sigue siendo voz
+        self.weak_ratio = weak_ratio
+        self.fricative_zcr = fricative_zcr
+        # ... siempre que supere el ruido de fondo en este factor (el ruido blanco también cruza mucho)
+        self.noise_margin = noise_margin
+        self.adaptive = adaptive
+        self.completion_hint = None   # callable opcional: True si lo dicho ya es un comando completo
+        self.reset()
+
+    @classmethod
+    def fixed(cls, pause_threshold=1.0, phrase_time_limit=5):
+        """Segmentación clásica: silencio final y duración máxima fijos"""
+        return cls(min_pause=pause_threshold, max_pause=pause_threshold, max_length=phrase_time_limit,
+                   adaptive=False)
+
+    def reset(self):
+        self.in_speech = False
+        self.length = 0.0
+        self.voiced = 0.0
+        self.silence = 0.0
+        self._gaps = []
+
+    def restart(self):
+        """Vuelve a empezar la frase en curso (sin salir de ella)"""
+        in_speech = self.in_speech
+        self.reset()
+        self.in_speech = in_speech
+
+    def is_voice(self, frame, energy, threshold, noise_floor=0.0):
+        """VAD de trama: energía sobre el umbral, o fricativa débil dentro de una frase"""
+        if energy > threshold:
+            return True
+        weak = max(threshold * self.weak_ratio, noise_floor * self.noise_margin)
+        if not self.adaptive or not self.in_speech or energy <= weak:
+            return False
+        return zero_crossing_rate(frame) >= self.fricative_zcr
+
+    def _speaker_pause(self):
+        if not self.adaptive or len(self._gaps) < 2:
+            return self.max_pause
+        gaps = sorted(self._gaps)
+        return min(self.max_pause, max(self.min_pause, gaps[len(gaps) // 2] * self.pause_factor))
+
+    def _complete(self):
+        return self.adaptive and self.completion_hint is not None and bool(self.completion_hint())
+
+    def required_pause(self):
+        """Silencio final que cerraría la frase ahora mismo"""
+        return self.min_pause if self._complete() else self._speaker_pause()
+
+    def update(self, seconds, voiced):
+        """Procesa un bloque; devuelve 'start', el motivo del final o None"""
+        if not self.in_speech:
+            if not voiced:
+                return None
+            self.in_speech = True
+            self.length = self.voiced = seconds
+            return 'start'
+        self.length += seconds
+        if voiced:
+            if self.silence >= self.min_gap:
+                self._gaps.append(self.silence)
+            self.silence = 0.0
+            self.voiced += seconds
+        else:
+            self.silence += seconds
+        if self.length >= self.max_length:
+            return 'limit'
+        if self.silence >= self.min_pause:
+            # La pista (p. ej. la hipótesis parcial) sólo se consulta cuando ya hay silencio
+            complete = self._complete()
+            if self.silence >= (self.min_pause if complete else self._speaker_pause()):
+                return 'complete' if complete else 'silence'
+        return None
@@ -0,0 +1,64 @@
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+Event = namedtuple('Event', ['kind', 'data', 'time', 'seq'])
+
+
+class EventBus:
+    """Eventos de estado del asistente para la interfaz (escuchando, intención, tiempos...).
+
+    publish() no bloquea nunca al hilo que publica (captura, ejecutor, voz):
+    guarda sólo el último evento de cada (kind, key), de modo que una ráfaga
+    se fusiona, y avisa a los listeners únicamente cuando la cola pasa de
+    vacía a tener algo. Los avisos deben ser baratos (p. ej. emitir una señal
+    Qt); el consumidor recoge los eventos con drain() a su ritmo.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._latest = OrderedDict()      # (kind, key) -> Event, en orden de publicación
+        self._seq = itertools.count(1)
+        self._stats = {'published': 0, 'coalesced': 0, 'dropped': 0, 'notified': 0, 'drained': 0}
+
+    def publish(self, kind, key=None, **data):
+        """Publica un evento; sustituye al pendiente con el mismo kind y key"""
+        event = Event(kind, data, time.monotonic(), next(self._seq))
+        slot = (kind, key)
+        with self._lock:
+            notify = not self._latest
+            if self._latest.pop(slot, None) is not None:
+                self._stats['coalesced'] += 1
+            self._latest[slot] = event
+            if len(self._latest) > self.maxsize:
+                self._latest.popitem(last=False)
+                self._stats['dropped'] += 1
+            self._stats['published'] += 1
+            if notify:
+                self._stats['notified'] += 1
+        if notify:
+            for listener in self.listeners:
+                try:
+                    listener()
+                except Exception as e:
+                    logging.error(f"Error al avisar de eventos: {e}")
+
+    def drain(self):
+        """Devuelve los eventos pendientes (el último de cada clave) en orden y vacía la cola"""
+        with self._lock:
+            events = list(self._latest.values())
+            self._latest.clear()
+            self._stats['drained'] += len(events)
+        return events
+
+    def pending(self):
+        with self._lock:
+            return len(self._latest)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=len(self._latest))
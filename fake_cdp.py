@@ -0,0 +1,266 @@
+"""Servidor CDP falso para probar el control del navegador sin Chrome.
+
+Implementa /json/version, /json/list y, por WebSocket, el subconjunto del
+protocolo que usa cdp.CdpBrowser (pestañas, sesiones planas, navegación,
+historial, desplazamiento y estado de la ventana) sobre pestañas en
+memoria. Cada orden recibida queda en el registro (log).
+
+    python fake_cdp.py --port 9222
+"""
+import argparse
+import itertools
+import json
+import re
+import socket
+import socketserver
+import threading
+import time
+
+from cdp import OP_CLOSE, OP_PING, OP_PONG, OP_TEXT, accept_key, recv_message, send_frame
+
+
+class _Tab:
+    __slots__ = ('target_id', 'entries', 'index', 'scroll', 'reloads')
+
+    def __init__(self, target_id, entry):
+        self.target_id = target_id
+        self.entries = [entry]           # (entryId, url)
+        self.index = 0
+        self.scroll = 0
+        self.reloads = 0
+
+    @property
+    def url(self):
+        return self.entries[self.index][1]
+
+    def info(self):
+        return {'targetId': self.target_id, 'type': 'page', 'title': self.url, 'url': self.url, 'attached': False}
+
+
+class FakeChrome:
+    """Estado del navegador simulado y respuesta a cada orden CDP"""
+
+    def __init__(self, urls=('https://www.google.com',)):
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.tabs = {}
+        self.active = None
+        self.sessions = {}               # sessionId -> targetId
+        self.window_state = 'normal'
+        self.log = []
+        for url in urls:
+            self._create(url)
+
+    def _create(self, url):
+        target = f'TAB{next(self._ids)}'
+        self.tabs[target] = _Tab(target, (next(self._ids), url))
+        self.active = target
+        return target
+
+    def tab(self, target=None):
+        return self.tabs[target or self.active]
+
+    def handle(self, method, params, session_id):
+        """Devuelve (result, eventos) o lanza KeyError/ValueError con el mensaje de error"""
+        with self._lock:
+            self.log.append((method, params))
+            if session_id is not None:
+                if session_id not in self.sessions:
+                    raise ValueError(f'Session with given id not found: {session_id}')
+                return self._page(method, params, self.tabs[self.sessions[session_id]]), []
+            return self._browser(method, params)
+
+    def _browser(self, method, params):
+        if method == 'Target.setDiscoverTargets':
+            return {}, []
+        if method == 'Target.getTargets':
+            return {'targetInfos': [t.info() for t in self.tabs.values()]}, []
+        if method == 'Target.createTarget':
+            target = self._create(params.get('url', 'about:blank'))
+            return {'targetId': target}, [('Target.targetCreated', {'targetInfo': self.tabs[target].info()})]
+        if method == 'Target.closeTarget':
+            target = self._known(params)
+            del self.tabs[target]
+            events = [('Target.targetDestroyed', {'targetId': target})]
+            for session, attached in list(self.sessions.items()):
+                if attached == target:
+                    del self.sessions[session]
+                    events.append(('Target.detachedFromTarget', {'sessionId': session, 'targetId': target}))
+            if self.active == target:
+                self.active = next(reversed(self.tabs), None)
+            return {'success': True}, events
+        if method == 'Target.activateTarget':
+            self.active = self._known(params)
+            return {}, []
+        if method == 'Target.attachToTarget':
+            target = self._known(params)
+            session = f'S{next(self._ids)}'
+            self.sessions[session] = target
+            return {'sessionId': session}, [('Target.attachedToTarget', {
+                'sessionId': session, 'targetInfo': self.tabs[target].info(), 'waitingForDebugger': False})]
+        if method == 'Target.getTargetInfo':
+            return {'targetInfo': self.tabs[self._known(params)].info()}, []
+        if method == 'Browser.getWindowForTarget':
+            self._known(params)
+            return {'windowId': 1, 'bounds': {'windowState': self.window_state}}, []
+        if method == 'Browser.setWindowBounds':
+            self.window_state = params['bounds'].get('windowState', self.window_state)
+            return {}, []
+        raise KeyError(method)
+
+    def _known(self, params):
+        target = params.get('targetId')
+        if target not in self.tabs:
+            raise ValueError(f'No target with given id found: {target}')
+        return target
+
+    def _page(self, method, params, tab):
+        if method == 'Page.navigate':
+            del tab.entries[tab.index + 1:]
+            tab.entries.append((next(self._ids), params['url']))
+            tab.index += 1
+            return {'frameId': tab.target_id, 'loaderId': f'L{next(self._ids)}'}
+        if method == 'Page.reload':
+            tab.reloads += 1
+            return {}
+        if method == 'Page.getNavigationHistory':
+            return {'currentIndex': tab.index,
+                    'entries': [{'id': i, 'url': u, 'userTypedURL': u, 'title': u} for i, u in tab.entries]}
+        if method == 'Page.navigateToHistoryEntry':
+            ids = [i for i, _ in tab.entries]
+            if params.get('entryId') not in ids:
+                raise ValueError('No entry with passed id')
+            tab.index = ids.index(params['entryId'])
+            return {}
+        if method == 'Runtime.evaluate':
+            expression = params.get('expression', '')
+            if 'visibilityState' in expression:
+                return {'result': {'type': 'boolean', 'value': tab.target_id == self.active}}
+            match = re.search(r'scrollBy\(\s*0\s*,\s*(-?\d+)', expression)
+            if match:
+                tab.scroll = max(0, tab.scroll + int(match.group(1)))
+            return {'result': {'type': 'undefined'}}
+        raise KeyError(method)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        request_line = self.rfile.readline().decode('latin-1')
+        headers = {}
+        while True:
+            line = self.rfile.readline().decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        path = request_line.split(' ')[1] if request_line.count(' ') >= 2 else '/'
+        if headers.get('upgrade', '').lower() == 'websocket':
+            self._websocket(headers)
+        elif path.startswith('/json/version'):
+            self._json({'Browser': 'FakeChrome/1.0', 'Protocol-Version': '1.3',
+                        'webSocketDebuggerUrl': f'ws://{server.host}:{server.port}/devtools/browser/fake'})
+        elif path.startswith('/json'):
+            self._json([dict(t.info(), webSocketDebuggerUrl=f'ws://{server.host}:{server.port}/devtools/page/{t.target_id}')
+                        for t in list(server.chrome.tabs.values())])
+        else:
+            self.wfile.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n')
+
+    def _json(self, data):
+        body = json.dumps(data).encode('utf-8')
+        self.wfile.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                         + f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body)
+
+    def _websocket(self, headers):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.wfile.write(('HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                          f'Sec-WebSocket-Accept: {accept_key(headers.get("sec-websocket-key", ""))}\r\n\r\n').encode())
+        lock = threading.Lock()
+        self.server.clients.append((self.request, lock))
+        try:
+            while True:
+                opcode, payload = recv_message(self.rfile)
+                if opcode == OP_CLOSE:
+                    with lock:
+                        send_frame(self.request, OP_CLOSE, b'', mask=False)
+                    return
+                if opcode == OP_PING:
+                    with lock:
+                        send_frame(self.request, OP_PONG, payload, mask=False)
+                    continue
+                if opcode != OP_TEXT:
+                    continue
+                self._command(json.loads(payload), lock)
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            self.server.clients.remove((self.request, lock))
+
+    def _command(self, message, lock):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        events = []
+        try:
+            result, events = server.chrome.handle(message.get('method'), message.get('params', {}),
+                                                  message.get('sessionId'))
+            reply = {'id': message['id'], 'result': result}
+        except KeyError as e:
+            reply = {'id': message['id'], 'error': {'code': -32601, 'message': f"'{e.args[0]}' wasn't found"}}
+        except ValueError as e:
+            reply = {'id': message['id'], 'error': {'code': -32000, 'message': str(e)}}
+        if 'sessionId' in message:
+            reply['sessionId'] = message['sessionId']
+        with lock:
+            send_frame(self.request, OP_TEXT, json.dumps(reply).encode('utf-8'), mask=False)
+        for method, params in events:
+            data = json.dumps({'method': method, 'params': params}).encode('utf-8')
+            for sock, client_lock in list(server.clients):
+                try:
+                    with client_lock:
+                        send_frame(sock, OP_TEXT, data, mask=False)
+                except OSError:
+                    pass
+
+
+class FakeCdpServer(socketserver.ThreadingTCPServer):
+    """Servidor en un hilo propio; port=0 elige un puerto libre. latency simula lo que tarda el navegador"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, urls=('https://www.google.com',)):
+        super().__init__((host, port), _Handler)
+        self.host = host
+        self.port = self.server_address[1]
+        self.latency = latency
+        self.chrome = FakeChrome(urls)
+        self.clients = []
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-cdp', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        for sock, _ in list(self.clients):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=9222)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    args = parser.parse_args()
+    server = FakeCdpServer(port=args.port, latency=args.latency_ms / 1000)
+    print(f'CDP falso en http://{server.host}:{server.port}/json/version (Ctrl+C para salir)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
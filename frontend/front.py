@@ -1,8 +1,10 @@
 import sys, os
+import logging
 import threading
+import time
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton
 from PyQt5.QtGui import QMovie, QFont, QColor, QPalette
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, QTimer, pyqtSignal
 
 # Añade la carpeta padre (LEYA-BASE) al path para que encuentre leya.py
 base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
@@ -13,15 +15,54 @@ images_dir = os.path.join(base_dir, "imagenes")
 # 3) Ruta completa al GIF
 gif_path = os.path.join(images_dir, "chromegif.gif")
 # Importa tu backend demo.py
+import config
+from event_bus import EventBus
 from leya import ChromeVoiceAssistant
 
+# Como mucho una actualización de la interfaz cada UI_INTERVAL_MS; entre medias los eventos se fusionan
+UI_INTERVAL_MS = 100
+
+STATUS_TEXT = {
+    'loading': 'Cargando...',
+    'ready': 'Standby',
+    'waiting': f'Di "{config.WAKE_WORDS[0]}"',
+    'listening': 'Escuchando',
+    'recognizing': 'Reconociendo...',
+    'offline': 'Offline',
+}
+TIMING_STAGES = [('recognition', 'reconocer'), ('resolve', 'resolver'), ('action', 'acción'),
+                 ('speech_to_action', 'total')]
+
+
+class EventBridge(QObject):
+    """Lleva el aviso del bus de eventos al hilo de la interfaz (la señal se encola entre hilos)"""
+    pending = pyqtSignal()
+
+
 class AssistantGUI(QMainWindow):
     def __init__(self):
         super().__init__()
         self.initUI()
-        # Instancia del asistente de voz
-        self.assistant = ChromeVoiceAssistant()
+        self.assistant = None
         self.assistant_thread = None
+        self._timings = {}
+        self._state = 'loading'
+        self._speaking = False
+
+        # Eventos del backend: se publican desde cualquier hilo y se pintan sólo en éste
+        self.events = EventBus()
+        self.bridge = EventBridge()
+        self.bridge.pending.connect(self.on_events)
+        self.events.listeners.append(self.bridge.pending.emit)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self.on_events)
+        self._last_flush = 0.0
+
+        # Instancia del asistente de voz, en segundo plano para que la ventana aparezca al momento
+        self.activate_button.setEnabled(False)
+        self.render_status()
+        threading.Thread(target=self.build_assistant, daemon=True).start()
 
     def initUI(self):
         # Configuración de la ventana principal
@@ -69,12 +110,77 @@ class AssistantGUI(QMainWindow):
         # Conecta el botón al método on_activate
         self.activate_button.clicked.connect(self.on_activate)
 
+        # Última frase, intención o acción y tiempos por etapa
+        self.detail_label = QLabel('', self)
+        self.detail_label.setFont(QFont('Arial', 12))
+        self.detail_label.setStyleSheet('color: white;')
+        self.detail_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.detail_label)
+
+        self.timing_label = QLabel('', self)
+        self.timing_label.setFont(QFont('Arial', 10))
+        self.timing_label.setStyleSheet('color: #7f8c8d;')
+        self.timing_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.timing_label)
+
     def update_status(self, text: str):
-        """Actualiza el texto de estado dinámicamente."""
+        """Actualiza el texto de estado dinámicamente (sólo desde el hilo de la interfaz)."""
         self.status_label.setText(text)
 
+    def build_assistant(self):
+        """Crea el asistente fuera del hilo de la interfaz y avisa por el bus cuando está listo."""
+        try:
+            self.assistant = ChromeVoiceAssistant(event_bus=self.events)
+            self.events.publish('loaded')
+        except Exception as e:
+            logging.error(f"Error al iniciar el asistente: {e}")
+            self.events.publish('error', message=str(e))
+
+    def on_events(self):
+        """Recoge los eventos pendientes, como mucho cada UI_INTERVAL_MS, y actualiza las etiquetas."""
+        wait = UI_INTERVAL_MS - (time.monotonic() - self._last_flush) * 1000
+        if wait > 0:
+            if not self._flush_timer.isActive():
+                self._flush_timer.start(int(wait) + 1)
+            return
+        self._last_flush = time.monotonic()
+        for event in self.events.drain():
+            self.apply_event(event)
+        self.render_status()
+        self.render_timings()
+
+    def apply_event(self, event):
+        data = event.data
+        if event.kind == 'status':
+            self._state = data['state']
+        elif event.kind == 'loaded':
+            self.activate_button.setEnabled(True)
+        elif event.kind == 'speech':
+            self._speaking = data['speaking']
+        elif event.kind == 'transcript':
+            self.detail_label.setText(f"«{data['text']}»")
+        elif event.kind == 'intent':
+            self.detail_label.setText(f"«{data['command']}» → {data['phrase'] or 'sin coincidencia'}")
+        elif event.kind == 'action':
+            self.detail_label.setText(f"{data['name']}: {data['state']}")
+        elif event.kind == 'timing':
+            self._timings[data['stage']] = data['ms']
+        elif event.kind == 'error':
+            self._state = 'error'
+            self.detail_label.setText(data['message'])
+
+    def render_status(self):
+        text = 'Error' if self._state == 'error' else STATUS_TEXT.get(self._state, self._state)
+        self.update_status(f"Status : {text}{' · hablando' if self._speaking else ''}")
+
+    def render_timings(self):
+        parts = [f'{label} {self._timings[stage]:.0f} ms' for stage, label in TIMING_STAGES if stage in self._timings]
+        self.timing_label.setText('   '.join(parts))
+
     def on_activate(self):
         """Inicia el asistente en un hilo separado y actualiza el estado."""
+        if self.assistant is None:
+            return
         if self.assistant_thread and self.assistant_thread.is_alive():
             # Si ya está corriendo, ignorar
             return
@@ -86,11 +192,16 @@ class AssistantGUI(QMainWindow):
 
     def run_assistant(self):
         # Ejecuta el backend y actualiza el estado cuando termine
-        try:
-            self.assistant.run()
-        finally:
-            # Cuando el asistente termina
-            self.update_status('Status : Offline')
+        # El estado (incluido Offline al terminar) llega por el bus de eventos
+        self.assistant.run()
+
+    def closeEvent(self, event):
+        """Al cerrar la ventana se para la escucha y se liberan los recursos del asistente."""
+        if self.assistant is not None:
+            self.assistant.close()
+            if self.assistant_thread is not None:
+                self.assistant_thread.join(timeout=2)
+        super().closeEvent(event)
 
 
 def main():
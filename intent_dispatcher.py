@@ -0,0 +1,136 @@
+import logging
+from collections import deque, namedtuple
+
+# name: tipo de intención, slots: parámetros extraídos, phrase: frase clave que la activó
+Intent = namedtuple('Intent', ['name', 'slots', 'phrase'])
+
+
+class KeywordAutomaton:
+    """Autómata Aho-Corasick: encuentra todas las frases clave de un texto en una sola pasada"""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+    def add(self, phrase, value):
+        """Registra una frase clave con un valor asociado"""
+        node = 0
+        for ch in phrase:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._out[node].append((phrase, value))
+
+    def build(self):
+        """Calcula los enlaces de fallo; llamar tras añadir todas las frases"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def search(self, text):
+        """Genera (posición, frase, valor) por cada aparición de una frase clave"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for phrase, value in out[node]:
+                yield i - len(phrase) + 1, phrase, value
+
+
+class IntentDispatcher:
+    """Resuelve un texto a una intención y sus parámetros en una sola pasada.
+
+    Las reglas se registran en orden de prioridad: si varias coinciden gana
+    la primera registrada y el resto se informa como ambigüedad.
+    """
+
+    def __init__(self):
+        self._rules = []
+        self._automaton = None
+
+    def add(self, name, phrases, slots=None, grammar=None, anchored=False):
+        """Añade una regla.
+
+        grammar: función texto -> dict de parámetros (o None si no encaja),
+        se evalúa sólo cuando aparece alguna de las frases clave.
+        anchored: la frase debe estar al principio del texto.
+        """
+        self._rules.append((name, tuple(phrases), dict(slots or {}), grammar, anchored))
+        self._automaton = None
+
+    def clear(self):
+        self._rules = []
+        self._automaton = None
+
+    def build(self):
+        """Compila el autómata de frases clave"""
+        automaton = KeywordAutomaton()
+        for priority, (_, phrases, _, _, _) in enumerate(self._rules):
+            for phrase in phrases:
+                automaton.add(phrase, priority)
+        automaton.build()
+        self._automaton = automaton
+        logging.info('Despachador de intenciones compilado con %d reglas', len(self._rules))
+
+    def _candidates(self, text):
+        """Prioridades de las reglas cuyas frases aparecen en el texto"""
+        found = {}
+        for pos, phrase, priority in self._automaton.search(text):
+            if self._rules[priority][4] and pos != 0:
+                continue
+            found.setdefault(priority, phrase)
+        return found
+
+    def match(self, text):
+        """Devuelve (intención ganadora o None, lista de intenciones descartadas)"""
+        if self._automaton is None:
+            self.build()
+        matches = []
+        for priority, phrase in sorted(self._candidates(text).items()):
+            name, _, slots, grammar, _ = self._rules[priority]
+            if grammar is not None:
+                extra = grammar(text)
+                if extra is None:
+                    continue
+                slots = {**slots, **extra}
+            matches.append(Intent(name, slots, phrase))
+        if not matches:
+            return None, []
+        if len(matches) > 1:
+            logging.debug('Ambigüedad en "%s": gana %s, descartadas %s',
+                          text, matches[0].phrase, [m.phrase for m in matches[1:]])
+        return matches[0], matches[1:]
+
+    def resolve(self, text):
+        """Devuelve la intención ganadora o None"""
+        return self.match(text)[0]
+
+    def phrases(self):
+        """Todas las frases clave registradas"""
+        return [p for _, phrases, _, _, _ in self._rules for p in phrases]
+
+    def conflicts(self):
+        """Pares (frase, frase ocultada) en los que una regla prioritaria tapa siempre a otra"""
+        out = []
+        for hi, (_, hi_phrases, _, hi_grammar, hi_anchored) in enumerate(self._rules):
+            if hi_grammar is not None or hi_anchored:
+                continue
+            for _, lo_phrases, _, _, _ in self._rules[hi + 1:]:
+                for lo in lo_phrases:
+                    out.extend((p, lo) for p in hi_phrases if p in lo)
+        return out
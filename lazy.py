@@ -0,0 +1,21 @@
+import importlib
+
+
+class LazyModule:
+    """Módulo que se importa la primera vez que se usa uno de sus atributos"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'cargado' if self._module is not None else 'sin cargar'
+        return f'<LazyModule {self._name} ({state})>'
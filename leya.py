@@ -1,86 +1,197 @@
-import speech_recognition as sr
-import pyttsx3
-import pyautogui
 import webbrowser
 import subprocess
 import time
 import os
-import keyboard
 import logging
-import numpy as np  
 import re
-import pyperclip
-import sqlite3
-from difflib import get_close_matches
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from nltk.stem import SnowballStemmer
-
-
-# Audio control (requires 'pycaw' and 'comtypes')
-try:
-    from ctypes import cast, POINTER
-    from comtypes import CLSCTX_ALL
-    from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-    AUDIO_ENABLED = True
-except ImportError:
-    AUDIO_ENABLED = False
-    logging.warning("Audio control disabled: install with 'pip install pycaw comtypes'")
+import config
+import threading
+from concurrent import futures
+from action_executor import ActionExecutor, interruptible_sleep
+from audio_capture import AudioCapture, CaptureClosed, MicrophoneSource
+from cdp import CdpBrowser, CdpError
+from command_index import CommandIndex, commands_digest, load_index, save_index
+from command_io import export_commands, import_commands
+from command_store import CommandStore
+from endpointing import Endpointer
+from event_bus import EventBus
+from fuzzy_index import FuzzyIndex
+from intent_dispatcher import Intent, IntentDispatcher
+from recognizers import NUMBER_WORDS, make_recognizer, words_to_digits
+from resolution_cache import Resolution, ResolutionCache, normalize_utterance
+from speculation import Speculator, prefetch_host
+from speech_output import PRIORITY_HIGH, PRIORITY_NORMAL, Pyttsx3Engine, SpeechQueue
+from lazy import LazyModule
+from text_processing import TextPreprocessor
+from tracing import Tracer, traced
+from usage_stats import UsageStats
+from window_probe import ProcessProbe
+
+# Módulos pesados: se importan al primer uso para que el arranque sea rápido
+pyautogui = LazyModule('pyautogui')
+pyperclip = LazyModule('pyperclip')
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Gramáticas de volumen (compiladas una sola vez)
+VOLUME_UP_TO_RE = re.compile(r'(?:sube|aumenta).*volumen a (\d+)')
+VOLUME_DOWN_TO_RE = re.compile(r'(?:baja|disminuye).*volumen a (\d+)')
+
+
+# Destino de cada intención en el ejecutor de acciones: las del mismo destino se ejecutan en
+# orden. Las que no aparecen (salir, cancelar, seleccionar...) se ejecutan en el bucle de escucha
+ACTION_TARGETS = {
+    'website': 'browser', 'search': 'browser', 'custom': 'browser', 'action': 'browser',
+    'video_fullscreen': 'browser', 'exit_video_fullscreen': 'browser',
+    'set_volume': 'audio', 'change_volume': 'audio',
+}
+# Acciones que dialogan con el usuario (escuchan): siempre en el bucle de escucha
+INTERACTIVE_ACTIONS = {'crear comando'}
+
+# Acciones que siempre actúan sobre Chrome: se puede enfocar antes de oír la frase entera
+CHROME_ACTIONS = {'abrir chrome', 'nueva pestaña', 'cerrar pestaña', 'reabrir pestaña', 'volver', 'adelante',
+                  'recargar', 'pantalla completa', 'acercar pantalla', 'alejar pantalla'}
+
+# Sitios integrados: "abrir correo", "abrir youtube"...
+WEBSITES = {
+    'correo': 'https://mail.google.com',
+    'youtube': 'https://www.youtube.com',
+    'facebook': 'https://www.facebook.com',
+    'whatsapp': 'https://web.whatsapp.com',
+    'drive': 'https://drive.google.com',
+    'maps': 'https://maps.google.com',
+    'noticias': 'https://news.google.com',
+    'traductor': 'https://translate.google.com'
+}
+# Acciones integradas (las claves de command_actions, en el mismo orden)
+ACTION_COMMANDS = ('abrir chrome', 'nueva pestaña', 'cerrar pestaña', 'reabrir pestaña', 'volver', 'adelante',
+                   'recargar', 'pantalla completa', 'acercar pantalla', 'alejar pantalla', 'captura de pantalla',
+                   'sube un poco', 'baja un poco', 'crear comando')
+
+# Candidatos del buscador que se ordenan con el uso, y diferencia de similitud con el mejor por
+# debajo de la cual se consideran empatados (el uso sólo decide entre lo que el texto no distingue)
+MATCH_CANDIDATES = 5
+TIE_MARGIN = 0.05
+
+# Intenciones que admiten texto libre detrás: nunca se dan por completas en una hipótesis parcial
+OPEN_ENDED_INTENTS = {'search', 'select'}
+
+# Palabras que el reconocedor debe admitir además de los comandos (vocabulario restringido)
+EXTRA_VOCABULARY = config.WAKE_WORDS + ['sí', 'si', 'no', 'claro', 'vale', 'por supuesto', 'y'] + list(NUMBER_WORDS)
+
+
+def builtin_commands():
+    """Nombres de los comandos integrados (no pueden usarse para comandos personalizados)"""
+    return list(ACTION_COMMANDS) + [f'abrir {s}' for s in WEBSITES] + ['buscar', 'confirmo']
+
+
+def _level_grammar(pattern):
+    """Extrae el nivel de volumen de un comando con la expresión dada (en cifras o en palabras)"""
+    def grammar(text):
+        # Los números se pasan a cifras sólo aquí: el resto de la frase se busca tal cual se dijo
+        m = pattern.search(words_to_digits(text))
+        return {'level': int(m.group(1))} if m else None
+    return grammar
+
+def _nothing():
+    pass
+
+def _match_resolution(best, conf):
+    """Resolución a partir de la mejor coincidencia aproximada"""
+    if best:
+        return Resolution('redirect' if conf > 0.7 else 'suggest', best)
+    return Resolution('unknown', None)
+
 class ChromeVoiceAssistant:
-    def __init__(self):
-        # Voz a texto
-        self.recognizer = sr.Recognizer()
-        self.recognizer.pause_threshold = 1.0
-        self.recognizer.energy_threshold = 300
-        self.recognizer.dynamic_energy_threshold = True
-
-        # Texto a voz
-        self.engine = pyttsx3.init()
-        for voice in self.engine.getProperty('voices'):
-            if 'spanish' in voice.id.lower():
-                self.engine.setProperty('voice', voice.id)
-                break
-        self.engine.setProperty('rate', 150)
-        self.engine.setProperty('volume', 1.0)
+    def __init__(self, audio_source=None, recognizer=None, tts_engine=None, probe_backend=None, event_bus=None):
+        # Trazas de latencia por etapa (desactivadas por defecto)
+        self.tracer = Tracer(enabled=config.TRACE_ENABLED, path=config.TRACE_PATH)
+        if config.TRACE_ENABLED and config.TRACE_STATS_PORT:
+            self.tracer.serve(config.TRACE_STATS_PORT)
+
+        # Eventos de estado para la interfaz; publicar nunca bloquea (ver EventBus)
+        self.events = event_bus or EventBus()
+        self._mode = 'waiting'
+        if event_bus is not None:
+            self.tracer.add_listener(
+                lambda stage, seconds: self.events.publish('timing', key=stage, stage=stage, ms=seconds * 1e3))
+
+        # Voz a texto (reconocedor configurable: nube, sin conexión o de pruebas)
+        self.recognizer = recognizer or make_recognizer(
+            config.RECOGNIZER_BACKEND, language=config.LANGUAGE, vosk_model_path=config.VOSK_MODEL_PATH,
+            constrained=config.RECOGNIZER_CONSTRAINED, fixture=config.RECOGNIZER_FIXTURE)
+
+        # Captura continua del micrófono (o de la fuente indicada: WAV, sintética...)
+        if config.ENDPOINT_ADAPTIVE:
+            endpointer = Endpointer(min_pause=config.ENDPOINT_MIN_PAUSE, max_pause=config.ENDPOINT_MAX_PAUSE,
+                                    max_length=config.MAX_UTTERANCE_SECONDS)
+        else:
+            endpointer = Endpointer.fixed(config.ENDPOINT_MAX_PAUSE, phrase_time_limit=5)
+        self.capture = AudioCapture(audio_source or MicrophoneSource(), energy_threshold=300,
+                                    endpointer=endpointer)
+
+        # Hipótesis parcial en vivo: si ya es un comando completo, la frase se cierra antes
+        self._partial = ''
+        self._streaming = False
+        self.speculation = None
+        if self.recognizer.partials:
+            self.capture.endpoint_listeners.append(self._on_endpoint)
+            self.capture.frame_listeners.append(self._on_capture_frame)
+            endpointer.completion_hint = self._partial_is_complete
+            # La intención de la hipótesis parcial se prepara antes de la transcripción final
+            if config.SPECULATE:
+                self.speculation = Speculator(self._speculative_intent, self._prewarm)
+
+        # Palabra de activación: detector local sobre el flujo de captura si hay plantillas
+        self.wake_words = config.WAKE_WORDS
+        self._wake_muted = False
+        self.wake_spotter = self._load_wake_spotter()
+
+        # Texto a voz en un hilo propio (no bloquea la escucha)
+        self.speech = SpeechQueue(tts_engine or Pyttsx3Engine(rate=150, volume=1.0),
+                                  on_finished=self._on_speech_finished,
+                                  on_started=self._on_speech_started)
+        if config.BARGE_IN:
+            self.capture.on_speech_start = self.speech.interrupt
+
+        # Las acciones se ejecutan en segundo plano para seguir escuchando mientras tanto
+        self.executor = ActionExecutor(timeout=config.ACTION_TIMEOUT) if config.ASYNC_ACTIONS else None
+
+        # Procesos y ventana activa (caché corta en vez de lanzar tasklist/PowerShell cada vez)
+        self.probe = ProcessProbe(probe_backend, ttl=config.PROBE_TTL)
+
+        # Control del navegador por CDP (None = atajos de teclado simulados)
+        self.cdp = CdpBrowser(port=config.CDP_PORT) if config.BROWSER_BACKEND == 'cdp' else None
 
         # Estado
         self.chrome_opened = False
         self.last_suggestion = None
 
-        # Audio endpoint (pycaw)
-        if AUDIO_ENABLED:
-            devices = AudioUtilities.GetSpeakers()
-            interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-            self.volume_ctrl = cast(interface, POINTER(IAudioEndpointVolume))
+        # Audio endpoint (pycaw), se inicializa al primer uso
+        self.volume_ctrl = None
+        self._audio_checked = False
 
         # Procesamiento de lenguaje
-        self.stemmer = SnowballStemmer('spanish')
-        self.vectorizer = TfidfVectorizer(tokenizer=self.preprocess_text, ngram_range=(1,2))
+        self.preprocessor = TextPreprocessor('spanish')
+        # Respaldo aproximado por n-gramas de caracteres cuando TF-IDF no está seguro
+        self.fuzzy = self._new_fuzzy()
+        # Caché de frases ya resueltas (se vacía cuando cambian los comandos)
+        self.resolutions = ResolutionCache(config.RESOLUTION_CACHE_SIZE)
 
         # Mapas de acciones
-        self.websites = {
-            'correo': 'https://mail.google.com',
-            'youtube': 'https://www.youtube.com',
-            'facebook': 'https://www.facebook.com',
-            'whatsapp': 'https://web.whatsapp.com',
-            'drive': 'https://drive.google.com',
-            'maps': 'https://maps.google.com',
-            'noticias': 'https://news.google.com',
-            'traductor': 'https://translate.google.com'
-        }
+        self.websites = dict(WEBSITES)
+        # Las claves deben coincidir con ACTION_COMMANDS (nombres reservados al importar)
         self.command_actions = {
             'abrir chrome': self.open_chrome,
-            'nueva pestaña': lambda: self._shortcut(['ctrl','t'], 'Nueva pestaña'),
-            'cerrar pestaña': lambda: self._shortcut(['ctrl','w'], 'Pestaña cerrada'),
-            'reabrir pestaña': lambda: self._shortcut(['ctrl','shift','t'], 'Pestaña restaurada'),
-            'volver': lambda: self._shortcut(['alt','left'], 'Volviendo atrás'),
-            'adelante': lambda: self._shortcut(['alt','right'], 'Avanzando'),
-            'recargar': lambda: self._shortcut(['f5'], 'Recargando'),
-            'pantalla completa': lambda: self._shortcut(['f11'], 'Alternando pantalla completa'),
+            'nueva pestaña': lambda: self._browser(lambda b: b.new_tab(), ['ctrl','t'], 'Nueva pestaña'),
+            'cerrar pestaña': lambda: self._browser(lambda b: b.close_tab(), ['ctrl','w'], 'Pestaña cerrada'),
+            'reabrir pestaña': lambda: self._browser(lambda b: b.reopen_tab(), ['ctrl','shift','t'], 'Pestaña restaurada'),
+            'volver': lambda: self._browser(lambda b: b.back(), ['alt','left'], 'Volviendo atrás'),
+            'adelante': lambda: self._browser(lambda b: b.forward(), ['alt','right'], 'Avanzando'),
+            'recargar': lambda: self._browser(lambda b: b.reload(), ['f5'], 'Recargando'),
+            'pantalla completa': lambda: self._browser(lambda b: b.toggle_fullscreen(), ['f11'], 'Alternando pantalla completa'),
+            # El zoom siempre con el atajo: es el de Chrome (por sitio, sobrevive a la navegación)
             'acercar pantalla': lambda: self._shortcut(['ctrl','+'], 'Acercando'),
             'alejar pantalla': lambda: self._shortcut(['ctrl','-'], 'Alejando'),
             'captura de pantalla': self.take_screenshot,
@@ -88,88 +199,132 @@ class ChromeVoiceAssistant:
             'baja un poco': lambda: self._scroll(-300, 'Bajando un poco'),
             'crear comando': self.create_custom_command,
         }
-        # Crear base de datos de comandos personalizados
-        self.create_database()
+        # Base de datos de comandos personalizados (conexión persistente + caché)
+        self.store = CommandStore(config.COMMANDS_DB_PATH, compact=config.MATCHER_MODE == 'compact')
+        self._commands_lock = threading.RLock()
+        # Frecuencia de uso y comando anterior para ordenar las coincidencias dudosas
+        self.usage = None
+        if config.USAGE_PRIORS:
+            self.usage = UsageStats(self.store, half_life=config.USAGE_HALF_LIFE_DAYS * 86400,
+                                    max_commands=config.USAGE_MAX_COMMANDS, max_pairs=config.USAGE_MAX_PAIRS,
+                                    flush_interval=config.USAGE_FLUSH_SECONDS)
+        # Buscador TF-IDF (ver config.MATCHER_MODE)
+        self.index = self._new_index()
         
         # Preparar lista de comandos
         self.update_command_list()
         self._train_model()
+        # nltk se carga en segundo plano para no retrasar la primera escucha
+        threading.Thread(target=self.preprocessor.warm_up, daemon=True).start()
+        self._set_status('ready')
+
+    def _set_status(self, state):
+        """Publica el estado general: ready, waiting, listening, recognizing, offline"""
+        self.events.publish('status', state=state)
 
     def update_command_list(self):
         """Actualiza la lista de comandos incluyendo los personalizados"""
         # Comandos básicos
-        self.all_commands = list(self.command_actions.keys()) + [f'abrir {s}' for s in self.websites] + ['buscar', 'confirmo']
+        builtins = builtin_commands()
         
-        # Añadir comandos personalizados de la base de datos
-        try:
-            conn = sqlite3.connect('commands.db')
-            c = conn.cursor()
-            c.execute('SELECT command FROM commands')
-            custom_commands = [row[0] for row in c.fetchall()]
-            conn.close()
-            self.all_commands.extend(custom_commands)
-        except Exception as e:
-            logging.error(f"Error al cargar comandos personalizados: {e}")
+        # Añadir comandos personalizados (desde la caché del almacén)
+        if config.MATCHER_MODE == 'compact':
+            # Se leen del almacén empaquetado en vez de copiarlos a una lista
+            from compact_index import CommandList
+            self.all_commands = CommandList(builtins, self.store)
+        else:
+            self.all_commands = builtins + self.store.commands()
+        self.fuzzy.rebuild(self.all_commands)
+        self._build_dispatcher()
+        self._update_vocabulary()
+        self.resolutions.invalidate()
+
+    def _update_vocabulary(self):
+        """Pasa al reconocedor el vocabulario de comandos conocidos"""
+        self.recognizer.set_vocabulary(self.all_commands + self.dispatcher.phrases() + EXTRA_VOCABULARY)
 
     def preprocess_text(self, text):
         """Preprocesa el texto para análisis lingüístico"""
-        tokens = re.findall(r"\b\w+\b", text.lower())
-        return [self.stemmer.stem(t) for t in tokens]
+        return self.preprocessor(text)
 
-    def create_database(self):
-        """Crea la base de datos y la tabla de comandos personalizados"""
+    def add_custom_command(self, name, url):
         try:
-            conn = sqlite3.connect('commands.db')
-            c = conn.cursor()
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS commands (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    command TEXT NOT NULL,
-                    url TEXT NOT NULL
-                )
-            ''')
-            conn.commit()
-            conn.close()
+            with self._commands_lock:
+                self.store.add(name, url)
+                logging.info('Comando personalizado agregado: %s', name)
+                # Actualización incremental: sin releer la base de datos ni reentrenar
+                if name not in self.index:
+                    self.all_commands.append(name)
+                    self.index.add(name)
+                    self.fuzzy.add(name)
+                    self._update_vocabulary()
+                self.resolutions.invalidate()
+            return True
         except Exception as e:
-            logging.error(f"Error al crear base de datos: {e}")
+            logging.error(f"Error al agregar comando: {e}")
+            return False
 
-    def add_custom_command(self, name, url):
+    def remove_custom_command(self, name):
+        """Elimina un comando personalizado"""
         try:
-            conn = sqlite3.connect('commands.db')
-            c = conn.cursor()
-            c.execute('INSERT INTO commands (command, url) VALUES (?, ?)', (name, url))
-            conn.commit()
-            conn.close()
-            logging.info('Comando personalizado agregado: %s', name)
-            self.update_command_list()
-            self._train_model()
+            with self._commands_lock:
+                if not self.store.remove(name):
+                    return False
+                logging.info('Comando personalizado eliminado: %s', name)
+                if name in self.all_commands:
+                    self.all_commands.remove(name)
+                if name not in self.all_commands:
+                    self.index.remove(name)
+                    self.fuzzy.remove(name)
+                    if self.usage is not None:
+                        self.usage.forget(name)
+                self.resolutions.invalidate()
             return True
         except Exception as e:
-            logging.error(f"Error al agregar comando: {e}")
+            logging.error(f"Error al eliminar comando: {e}")
+            return False
+
+    def rename_custom_command(self, old, new):
+        """Renombra un comando personalizado"""
+        try:
+            with self._commands_lock:
+                if not self.store.rename(old, new):
+                    return False
+                logging.info('Comando personalizado renombrado: %s -> %s', old, new)
+                if isinstance(self.all_commands, list):
+                    self.all_commands = [new if cmd == old else cmd for cmd in self.all_commands]
+                else:
+                    self.all_commands.replace(old, new)
+                if not self.index.rename(old, new):
+                    if old not in self.all_commands:
+                        self.index.remove(old)
+                    self.index.add(new)
+                if not self.fuzzy.rename(old, new):
+                    if old not in self.all_commands:
+                        self.fuzzy.remove(old)
+                    self.fuzzy.add(new)
+                if self.usage is not None and old not in self.all_commands:
+                    self.usage.rename(old, new)
+                self._update_vocabulary()
+                self.resolutions.invalidate()
+            return True
+        except Exception as e:
+            logging.error(f"Error al renombrar comando: {e}")
             return False
 
     def create_custom_command(self):
         """Función para crear un nuevo comando personalizado"""
-        self.speak('¿Quieres crear un comando para la página en la que te encuentras?')
+        self.speak('¿Quieres crear un comando para la página en la que te encuentras?', wait=True)
         resp = self.listen(timeout=10)
 
         if any(token in resp for token in ('sí', 'si', 'claro', 'vale', 'por supuesto')):
             # Pedir nombre
-            self.speak('¿Qué nombre le quieres poner?')
+            self.speak('¿Qué nombre le quieres poner?', wait=True)
             name = self.listen(timeout=10).strip()
 
             # Copiar URL actual de Chrome
             self.speak(f'Has elegido "{name}". Copiando la URL de la pestaña activa…')
-            if not self.chrome_opened:
-                self.open_chrome()
-            else:
-                self._focus_chrome()
-
-            pyautogui.hotkey('ctrl', 'l')
-            time.sleep(0.1)
-            pyautogui.hotkey('ctrl', 'c')
-            time.sleep(0.1)
-            url = pyperclip.paste().strip()
+            url = self._active_url()
 
             if self.add_custom_command(name, url):
                 self.speak(f'Comando {name} agregado correctamente')
@@ -180,56 +335,266 @@ class ChromeVoiceAssistant:
 
         return True
 
+    def import_commands(self, path, fmt=None, on_progress=None):
+        """Importa comandos de un fichero en una transacción y reentrena una sola vez al final"""
+        try:
+            with self._commands_lock:
+                report = import_commands(self.store, path, fmt, set(builtin_commands()), on_progress)
+                if report.added:
+                    self.update_command_list()
+                    self._train_model()
+                elif report.updated:
+                    self.resolutions.invalidate()
+            return report
+        except Exception as e:
+            logging.error(f"Error al importar comandos: {e}")
+            return None
+
+    def export_commands(self, path, fmt=None):
+        """Exporta los comandos personalizados; devuelve cuántos se escribieron"""
+        try:
+            return export_commands(self.store, path, fmt)
+        except Exception as e:
+            logging.error(f"Error al exportar comandos: {e}")
+            return 0
+
 #-----------------------------------------------
+    def _new_index(self):
+        """Índice de comandos del modo configurado: 'tfidf' o 'compact'"""
+        if config.MATCHER_MODE == 'compact':
+            from compact_index import CompactIndex
+            return CompactIndex(tokenizer=self.preprocessor, ngram_range=(1,2),
+                                n_features=config.MATCHER_FEATURES, store=self.store)
+        return CommandIndex(tokenizer=self.preprocessor, ngram_range=(1,2))
+
+    def _new_fuzzy(self):
+        """Búsqueda aproximada del modo configurado (en 'compact', con los nombres empaquetados)"""
+        if config.MATCHER_MODE == 'compact':
+            from compact_index import CompactFuzzyIndex
+            return CompactFuzzyIndex()
+        return FuzzyIndex()
+
     def _train_model(self):
         """Entrena el modelo de vectorización para reconocimiento de comandos"""
         try:
-            self.vectorizer.fit(self.all_commands)
-            self.command_vectors = self.vectorizer.transform(self.all_commands)
+            with self._commands_lock:
+                features = config.MATCHER_FEATURES if config.MATCHER_MODE == 'compact' else None
+                digest = commands_digest(self.all_commands, mode=config.MATCHER_MODE, n_features=features)
+                cached = load_index(config.MATCHER_CACHE_PATH, digest, self.preprocessor)
+                if cached is not None:
+                    if config.MATCHER_MODE == 'compact':
+                        cached.store = self.store
+                    self.index = cached
+                    logging.info('Modelo IA cargado de caché con %d comandos', len(self.index))
+                    return
+                self.index.rebuild(self.all_commands)
+                try:
+                    save_index(self.index, config.MATCHER_CACHE_PATH, digest)
+                except OSError as e:
+                    logging.warning(f"No se pudo guardar la caché del modelo: {e}")
             logging.info('Modelo IA entrenado con %d comandos', len(self.all_commands))
         except Exception as e:
             logging.error(f"Error al entrenar modelo: {e}")
 
-    def _find_best_match(self, cmd):
-        """Encuentra el mejor comando que coincide con el texto proporcionado"""
+    @traced('match')
+    def _candidates(self, cmd):
+        """Coincidencias aproximadas empatadas con la mejor, como lista de (comando, confianza)"""
         try:
-            vec = self.vectorizer.transform([cmd])
-            sims = cosine_similarity(vec, self.command_vectors)[0]
-            idx, conf = int(np.argmax(sims)), float(max(sims))
-            if conf > 0.5:
-                return self.all_commands[idx], conf
-            m = get_close_matches(cmd, self.all_commands, n=1, cutoff=0.6)
-            return (m[0], 0.6) if m else (None, 0)
+            return self._near_ties(cmd, self.index.query(cmd, k=MATCH_CANDIDATES))
         except Exception as e:
             logging.error(f"Error al buscar coincidencia: {e}")
+            return []
+
+    @traced('match')
+    def _candidates_many(self, cmds):
+        """_candidates de varios textos con una sola consulta TF-IDF por lotes"""
+        try:
+            return [self._near_ties(cmd, top) for cmd, top in zip(cmds, self.index.top_matches(cmds, k=MATCH_CANDIDATES))]
+        except Exception as e:
+            logging.error(f"Error al buscar coincidencias: {e}")
+            return [[] for _ in cmds]
+
+    def _near_ties(self, cmd, top):
+        """Candidatos TF-IDF por encima de 0.5 que empatan con el mejor; si no hay, el respaldo aproximado"""
+        if top and top[0][1] > 0.5:
+            return [(best, conf) for best, conf in top if conf > 0.5 and conf >= top[0][1] - TIE_MARGIN]
+        m = self.fuzzy.close_matches(cmd, n=MATCH_CANDIDATES, cutoff=0.6)
+        return [(best, 0.6) for best, ratio in m if ratio >= m[0][1] - TIE_MARGIN]
+
+    def _rank(self, candidates):
+        """Mejor candidato y su confianza: similitud y probabilidad de uso combinadas como un o-ruidoso"""
+        if not candidates:
             return None, 0
+        if self.usage is None:
+            return candidates[0]
+        priors = self.usage.priors([best for best, _ in candidates])
+        # 1 - (1 - similitud) * (1 - peso * probabilidad); en empate gana el orden por similitud
+        scored = [(best, 1 - (1 - conf) * (1 - config.USAGE_WEIGHT * prior))
+                  for (best, conf), prior in zip(candidates, priors)]
+        return max(scored, key=lambda item: item[1])
+
+    def _find_best_match(self, cmd):
+        """Encuentra el mejor comando que coincide con el texto proporcionado"""
+        return self._rank(self._candidates(cmd))
 
-    def speak(self, text):
-        """Convierte texto a voz"""
+    @traced('speak')
+    def speak(self, text, wait=False, priority=PRIORITY_NORMAL, key=None):
+        """Convierte texto a voz; devuelve un Future (wait=True espera a que termine)"""
         try:
             logging.info('Leya dice: %s', text)
-            self.engine.say(text)
-            self.engine.runAndWait()
+            future = self.speech.say(text, priority=priority, key=key)
+            if self.tracer.enabled:
+                queued = time.perf_counter()
+                future.add_done_callback(lambda _: self.tracer.record('tts', queued, time.perf_counter()))
+            if wait:
+                futures.wait([future])
+            return future
         except Exception as e:
             logging.error(f"Error en sintetizador de voz: {e}")
 
+    def _on_speech_started(self, text):
+        self.events.publish('speech', speaking=True, text=text)
+
+    def _on_speech_finished(self, interrupted, ended):
+        """Descarta lo que haya captado el micrófono de la propia voz de Leya (no lo empezado después)"""
+        self.events.publish('speech', speaking=False, text='')
+        if not interrupted:
+            self.capture.flush(before=ended)
+
+    def _load_wake_spotter(self):
+        """Carga el detector local de activación; None si no hay plantillas grabadas"""
+        if not os.path.isdir(config.WAKE_TEMPLATES_DIR):
+            return None
+        try:
+            from wake_word import WakeWordSpotter
+            spotter = WakeWordSpotter.from_directory(config.WAKE_TEMPLATES_DIR, self.wake_words,
+                                                     threshold=config.WAKE_THRESHOLD)
+        except Exception as e:
+            logging.error(f"Error al cargar el detector de activación: {e}")
+            return None
+        if spotter is not None:
+            # Tras la activación sólo llega al reconocedor el audio posterior
+            spotter.on_detect = lambda detection: self.capture.restart_segment()
+            self.capture.frame_listeners.append(self._spot_wake)
+        return spotter
+
+    def _spot_wake(self, frame, voiced, sample_rate):
+        """Pasa el audio al detector de activación salvo mientras habla Leya (su voz no la activa)"""
+        if self.speech.speaking:
+            self._wake_muted = True
+            return
+        if self._wake_muted:
+            # Lo acumulado antes de hablar no se empalma con lo que viene después
+            self._wake_muted = False
+            self.wake_spotter.reset()
+        self.wake_spotter.process(frame, voiced, sample_rate)
+
+    def wait_for_wake(self, timeout=10):
+        """Espera la palabra de activación; el audio en reposo no pasa por el reconocedor si hay detector local"""
+        if self.wake_spotter is None:
+            cmd = self.listen(timeout=timeout)
+            if cmd and any(word in cmd for word in self.wake_words):
+                self.tracer.end_interaction(kind='wake', text=cmd)
+                return True
+            return False
+        detection = self.wake_spotter.wait(timeout)
+        if detection is None:
+            # Lo captado en reposo se descarta sin reconocer
+            self.capture.restart_segment()
+            return False
+        logging.info('Activación local: %s (distancia %.3f)', detection.word, detection.distance)
+        self.tracer.begin_interaction(start=detection.start)
+        self.tracer.end_interaction(kind='wake', text=detection.word)
+        return True
+
+    def _on_endpoint(self, event):
+        """Eventos de inicio/fin de frase de la captura: abre y cierra el reconocimiento en vivo"""
+        if event.kind == 'start' and self._mode == 'listening':
+            self._partial = ''
+            if self.speculation is not None:
+                self.speculation.begin()
+            self.recognizer.begin_utterance(self.capture.source.sample_rate)
+            self._streaming = True
+        elif event.kind == 'end':
+            self._streaming = False
+
+    def _on_capture_frame(self, frame, voiced, sample_rate):
+        # En reposo no se decodifica nada en vivo (la activación va por su propio camino)
+        if self._streaming and self._mode == 'listening':
+            self._partial = self.recognizer.accept_partial(frame)
+            if self.speculation is not None:
+                self.speculation.feed(self._partial)
+
+    def _partial_is_complete(self):
+        """¿La hipótesis parcial ya es un comando completo conocido?"""
+        text = self._partial
+        if not text:
+            return False
+        intent = self.dispatcher.resolve(text)
+        if intent is not None:
+            return intent.name not in OPEN_ENDED_INTENTS
+        return text in self.store
+
+    def _speculative_intent(self, text):
+        """Intención exacta y cerrada de una hipótesis parcial (sin buscador ni trazas), o None"""
+        text = normalize_utterance(text)
+        intent = self.dispatcher.resolve(text)
+        if intent is None:
+            url = self.store.get(text)
+            intent = Intent('custom', {'url': url}, text) if url else None
+        if intent is None or intent.name in OPEN_ENDED_INTENTS:
+            return None
+        return intent
+
+    def _prewarm(self, intent):
+        """Prepara una intención de Chrome (DNS, conexión CDP, foco); devuelve cómo deshacerlo o None"""
+        name, slots = intent.name, intent.slots
+        browser_action = name == 'action' and slots['key'] in CHROME_ACTIONS
+        if name not in ('website', 'custom') and not browser_action:
+            return None
+        if 'url' in slots:
+            prefetch_host(slots['url'])
+        if self.cdp is not None:
+            self.cdp.available()
+        # Sólo se enfoca Chrome si la acción también lo hará: open_chrome o un atajo de teclado
+        focus = (slots.get('key') == 'abrir chrome' or (browser_action and self.cdp is None)
+                 or ((name == 'website' or browser_action) and not self.chrome_opened))
+        # Deja además la lista de procesos en la caché del sondeo
+        if not focus or not self._is_running('chrome.exe') or self.probe.is_foreground('chrome'):
+            return _nothing
+        previous = self.probe.foreground()
+        self._focus_chrome()
+        if previous:
+            return lambda: self.probe.focus(previous)
+        return _nothing
+
     def listen(self, timeout=5):
         """Escucha y reconoce voz del usuario"""
         try:
-            with sr.Microphone() as src:
-                self.recognizer.adjust_for_ambient_noise(src, duration=0.5)
-                try:
-                    audio = self.recognizer.listen(src, timeout=timeout, phrase_time_limit=5)
-                except sr.WaitTimeoutError:
-                    return ''
+            segment = self.capture.next_segment(timeout=timeout)
+            if segment is None:
+                return ''
+            self.tracer.begin_interaction(start=segment.start)
+            self.tracer.record('capture', segment.start, segment.end)
+            self._set_status('recognizing')
             try:
-                return self.recognizer.recognize_google(audio, language='es-ES').lower()            
+                with self.tracer.span('recognition'):
+                    text = self.recognizer.recognize(segment)
             except:
-                return ''
+                text = ''
+            if text:
+                self.events.publish('transcript', text=text)
+            elif self.speculation is not None:
+                self.speculation.settle(None)
+            self._set_status(self._mode)
+            return text
+        except CaptureClosed:
+            raise
         except Exception as e:
             logging.error(f"Error en reconocimiento de voz: {e}")
             return ''
 
+    @traced('open_chrome')
     def open_chrome(self):
         """Abre Google Chrome o lo enfoca si ya está ejecutándose"""
         try:
@@ -244,8 +609,10 @@ class ChromeVoiceAssistant:
             ]
             for p in paths:
                 if os.path.exists(p):
-                    subprocess.Popen([p, '--start-maximized'])
-                    time.sleep(1)
+                    subprocess.Popen([p, '--start-maximized'] + self._chrome_debug_args())
+                    self.probe.note_started('chrome')
+                    if self.cdp is None or not self.cdp.wait_ready():
+                        interruptible_sleep(1)
                     self.chrome_opened = True
                     self.speak('Abriendo Chrome')
                     return
@@ -257,27 +624,25 @@ class ChromeVoiceAssistant:
             logging.error(f"Error al abrir Chrome: {e}")
             self.speak('No pude abrir Chrome')
 
+    def _chrome_debug_args(self):
+        """Argumentos de Chrome para el control por CDP"""
+        if self.cdp is None:
+            return []
+        args = [f'--remote-debugging-port={config.CDP_PORT}']
+        if config.CDP_PROFILE_DIR:
+            args.append(f'--user-data-dir={os.path.abspath(config.CDP_PROFILE_DIR)}')
+        return args
+
     def _is_running(self, proc):
         """Verifica si un proceso está ejecutándose"""
-        try:
-            out = subprocess.check_output('tasklist', shell=True).decode('cp1252')
-            return proc in out
-        except Exception as e:
-            logging.error(f"Error al verificar proceso: {e}")
-            return False
+        return self.probe.is_running(proc)
 
     def _focus_chrome(self):
-        """Enfoca la ventana de Chrome"""
-        try:
-            subprocess.Popen([
-                'powershell','-Command',
-                "(New-Object -ComObject Shell.Application).Windows()"
-                "|Where-Object {$_.Name -like '*Chrome*'}"
-                "|ForEach-Object {$_.Visible = $True}"
-            ])
-        except Exception as e:
-            logging.error(f"Error al enfocar Chrome: {e}")
+        """Enfoca la ventana de Chrome (nada si ya está al frente)"""
+        if not self.probe.focus('chrome'):
+            logging.debug('No se pudo enfocar Chrome')
 
+    @traced('shortcut')
     def _shortcut(self, keys, msg=None):
         """Ejecuta un atajo de teclado"""
         try:
@@ -288,17 +653,69 @@ class ChromeVoiceAssistant:
             pyautogui.hotkey(*keys)
             if msg:
                 self.speak(msg)
-            time.sleep(0.2)
+            interruptible_sleep(0.2)
         except Exception as e:
             logging.error(f"Error al ejecutar atajo: {e}")
 
+    def _via_cdp(self, action):
+        """Ejecuta action(cdp) si el control por CDP está activo; False si no hay o falló"""
+        if self.cdp is None:
+            return False
+        try:
+            if not self.chrome_opened:
+                self.open_chrome()
+            action(self.cdp)
+            return True
+        except CdpError as e:
+            logging.warning(f"CDP no disponible, se usa el teclado: {e}")
+            return False
+
+    @traced('browser')
+    def _browser(self, action, keys, msg=None):
+        """Acción del navegador por CDP (confirmada, sin pausas) o con su atajo de teclado"""
+        if self._via_cdp(action):
+            if msg:
+                self.speak(msg)
+            return
+        self._shortcut(keys, msg)
+
+    def _open_url(self, url):
+        """Abre la URL en una pestaña nueva"""
+        if not self._via_cdp(lambda b: b.new_tab(url)):
+            webbrowser.open(url)
+
+    def _active_url(self):
+        """URL de la pestaña activa (por CDP o copiándola de la barra de direcciones)"""
+        if self.cdp is not None:
+            try:
+                if not self.chrome_opened:
+                    self.open_chrome()
+                return self.cdp.active_url()
+            except CdpError as e:
+                logging.warning(f"CDP no disponible, se usa el teclado: {e}")
+        if not self.chrome_opened:
+            self.open_chrome()
+        else:
+            self._focus_chrome()
+        pyautogui.hotkey('ctrl', 'l')
+        time.sleep(0.1)
+        pyautogui.hotkey('ctrl', 'c')
+        time.sleep(0.1)
+        return pyperclip.paste().strip()
+
+    @traced('scroll')
     def _scroll(self, amount, msg=None):
         """Realiza desplazamiento vertical"""
         try:
+            # La rueda va a la ventana activa: por CDP sólo si esa ventana es Chrome
+            if self.chrome_opened and self.probe.is_foreground('chrome') and self._via_cdp(lambda b: b.scroll(amount)):
+                if msg:
+                    self.speak(msg)
+                return
             pyautogui.scroll(amount)
             if msg:
                 self.speak(msg)
-            time.sleep(0.2)
+            interruptible_sleep(0.2)
         except Exception as e:
             logging.error(f"Error al desplazar: {e}")
 
@@ -312,33 +729,200 @@ class ChromeVoiceAssistant:
             logging.error(f"Error al tomar captura: {e}")
             self.speak('No pude tomar la captura')
 
+    def _volume_control(self):
+        """Devuelve el control de volumen del sistema (requires 'pycaw' and 'comtypes')"""
+        if not self._audio_checked:
+            self._audio_checked = True
+            try:
+                from ctypes import cast, POINTER
+                from comtypes import CLSCTX_ALL
+                from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+            except ImportError:
+                logging.warning("Audio control disabled: install with 'pip install pycaw comtypes'")
+                return None
+            devices = AudioUtilities.GetSpeakers()
+            interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+            self.volume_ctrl = cast(interface, POINTER(IAudioEndpointVolume))
+        return self.volume_ctrl
+
     def set_volume(self, level):
         """Establece el volumen del sistema"""
-        if not AUDIO_ENABLED:
+        if self._volume_control() is None:
             self.speak('Funcionalidad de volumen no disponible')
             return
         try:
             lvl = max(0, min(level, 100)) / 100.0
             self.volume_ctrl.SetMasterVolumeLevelScalar(lvl, None)
-            self.speak(f'Volumen ajustado a {int(lvl*100)}')
+            self.speak(f'Volumen ajustado a {int(lvl*100)}', key='volume')
         except Exception as e:
             logging.error(f"Error al ajustar volumen: {e}")
             self.speak('No pude ajustar el volumen')
 
     def change_volume(self, delta):
         """Cambia el volumen en un incremento/decremento"""
-        if not AUDIO_ENABLED:
+        if self._volume_control() is None:
             self.speak('Funcionalidad de volumen no disponible')
             return
         try:
             curr = self.volume_ctrl.GetMasterVolumeLevelScalar()
             new = max(0, min(curr + delta, 1))
             self.volume_ctrl.SetMasterVolumeLevelScalar(new, None)
-            self.speak(f'Volumen ahora {int(new*100)}')
+            self.speak(f'Volumen ahora {int(new*100)}', key='volume')
         except Exception as e:
             logging.error(f"Error al cambiar volumen: {e}")
             self.speak('No pude cambiar el volumen')
 
+    def _build_dispatcher(self):
+        """Compila el despachador de intenciones respetando el orden de prioridad de siempre"""
+        d = IntentDispatcher()
+        d.add('exit', ['adiós', 'apagar sistema', 'cerrar sistema'])
+        d.add('cancel', ['cancelar', 'detener acciones'])
+        for site, url in self.websites.items():
+            d.add('website', [f'abrir {site}'], {'site': site, 'url': url})
+        for key in self.command_actions:
+            d.add('action', [key], {'key': key})
+        d.add('select', ['selecciona '], anchored=True,
+              grammar=lambda t: {'text': t[len('selecciona '):].strip()})
+        d.add('search', ['buscar'], grammar=lambda t: {'query': t.split('buscar')[-1].strip()})
+        d.add('set_volume', ['volumen a'], grammar=_level_grammar(VOLUME_UP_TO_RE))
+        d.add('set_volume', ['volumen a'], grammar=_level_grammar(VOLUME_DOWN_TO_RE))
+        d.add('change_volume', ['sube volumen', 'más volumen', 'aumentar volumen'], {'delta': 0.05})
+        d.add('change_volume', ['baja volumen', 'menos volumen', 'disminuir volumen'], {'delta': -0.05})
+        d.add('video_fullscreen', ['video pantalla completa', 'pantalla completa video', 'expandir video'])
+        d.add('exit_video_fullscreen', ['cerrar pantalla completa', 'salir video pantalla completa', 'escapar video'])
+        d.build()
+        for hi, lo in d.conflicts():
+            logging.debug('La frase "%s" oculta siempre a "%s"', hi, lo)
+        self.dispatcher = d
+
+    def _execute_intent(self, intent, command):
+        """Ejecuta la acción de una intención ya resuelta (en segundo plano si tiene destino)"""
+        target = ACTION_TARGETS.get(intent.name)
+        if intent.name == 'action' and intent.slots['key'] in INTERACTIVE_ACTIONS:
+            target = None
+        if target is None or self.executor is None:
+            self.events.publish('action', name=intent.phrase, state='running')
+            try:
+                return self._run_intent(intent, command)
+            finally:
+                self.events.publish('action', name=intent.phrase, state='done')
+        queued = time.perf_counter()
+        future = self.executor.submit(target, self._run_intent, intent, command, name=intent.phrase)
+        self.events.publish('action', name=intent.phrase, state='queued')
+        future.add_done_callback(lambda f: self._on_action_done(intent.phrase, f))
+        if self.tracer.enabled:
+            future.add_done_callback(lambda _: self.tracer.record('action', queued, time.perf_counter()))
+        return True
+
+    def _on_action_done(self, name, future):
+        if future.cancelled():
+            state = 'cancelled'
+        else:
+            state = 'done' if future.exception() is None else 'failed'
+        self.events.publish('action', name=name, state=state)
+
+    def _run_intent(self, intent, command):
+        name, slots = intent.name, intent.slots
+        if name == 'exit':
+            self.speak('Hasta luego')
+            return False
+        if name == 'cancel':
+            cancelled = self.executor.cancel() if self.executor is not None else 0
+            self.speak('Acciones canceladas' if cancelled else 'No hay acciones en curso')
+            return True
+        if name == 'select':
+            return self.select_by_title(command)
+        if name == 'action':
+            self.command_actions[slots['key']]()
+        elif name == 'website':
+            if not self.chrome_opened:
+                self.open_chrome()
+            self._open_url(slots['url'])
+            self.speak(f"Abriendo {slots['site']}")
+        elif name == 'search':
+            q = slots['query']
+            if not self.chrome_opened:
+                self.open_chrome()
+            self._open_url(f'https://www.google.com/search?q={q}')
+            self.speak(f'Buscando {q}')
+        elif name == 'set_volume':
+            self.set_volume(slots['level'])
+        elif name == 'change_volume':
+            self.change_volume(slots['delta'])
+        elif name == 'video_fullscreen':
+            w, h = pyautogui.size()
+            pyautogui.click(w/2, h/2)
+            time.sleep(0.1)
+            pyautogui.press('f')
+            self.speak('Video pantalla completa')
+        elif name == 'exit_video_fullscreen':
+            pyautogui.press('esc')
+            self.speak('Saliendo de pantalla completa')
+        elif name == 'custom':
+            self._open_url(slots['url'])
+            self.speak(f'Abriendo {command}')
+        return True
+
+    def resolve_command(self, command):
+        """Resuelve el texto sin ejecutar nada; las frases repetidas salen de la caché"""
+        resolution = self.resolutions.get(command)
+        if resolution is None:
+            generation = self.resolutions.generation
+            resolution = self._resolve(command)
+            self.resolutions.put(command, resolution, generation)
+        return self._ranked(resolution)
+
+    def _ranked(self, resolution):
+        """Elige entre los candidatos guardados (el uso cambia con cada comando, la caché no)"""
+        if resolution.kind != 'match':
+            return resolution
+        return _match_resolution(*self._rank(resolution.value))
+
+    def resolve_many(self, commands):
+        """resolve_command de varios textos; los que necesitan el buscador van en una sola consulta"""
+        results = [None] * len(commands)
+        pending = []
+        generation = self.resolutions.generation
+        for i, command in enumerate(commands):
+            resolution = self.resolutions.get(command)
+            if resolution is None:
+                intent = self._direct_intent(command)
+                if intent is None:
+                    pending.append(i)
+                    continue
+                resolution = Resolution('intent', intent)
+                self.resolutions.put(command, resolution, generation)
+            results[i] = resolution
+        if pending:
+            for i, candidates in zip(pending, self._candidates_many([commands[i] for i in pending])):
+                results[i] = Resolution('match', tuple(candidates)) if candidates else Resolution('unknown', None)
+                self.resolutions.put(commands[i], results[i], generation)
+        return [self._ranked(resolution) for resolution in results]
+
+    def _direct_intent(self, command):
+        """Intención exacta, sin buscar coincidencias aproximadas (None si no la hay)"""
+        # Salida, sitios web, comandos directos, búsqueda, volumen y video en una sola pasada
+        with self.tracer.span('resolve'):
+            intent = self.dispatcher.resolve(command)
+
+        # Comandos personalizados desde base de datos
+        if intent is None:
+            with self.tracer.span('custom_lookup'):
+                url = self.store.get(command)
+            if url:
+                intent = Intent('custom', {'url': url}, command)
+        return intent
+
+    def _resolve(self, command):
+        intent = self._direct_intent(command)
+        if intent is not None:
+            return Resolution('intent', intent)
+
+        # Buscar coincidencias si no se encontró comando directo (se ordenan al usarlas, ver _ranked)
+        candidates = self._candidates(command)
+        return Resolution('match', tuple(candidates)) if candidates else Resolution('unknown', None)
+
+    @traced('process_command')
     def process_command(self, command):
         """Procesa un comando de voz y ejecuta la acción correspondiente"""
         try:
@@ -347,128 +931,48 @@ class ChromeVoiceAssistant:
                 command = self.last_suggestion
                 self.last_suggestion = None
                 self.speak(f'Ejecutando {command}')
-            
-            # Verificar comandos de salida
-            if any(k in command for k in ['adiós', 'apagar sistema', 'cerrar sistema']):
-                self.speak('Hasta luego')
-                return False
-            
-            # Verificar comandos para abrir sitios web
-            for site, url in self.websites.items():
-                if f'abrir {site}' in command:
-                    if not self.chrome_opened:
-                        self.open_chrome()
-                    webbrowser.open(url)
-                    self.speak(f'Abriendo {site}')
-                    return True
-            
-            # Verificar comandos directos
-            for key, act in self.command_actions.items():
-                if key in command:
-                    act()
-                    return True
-            
-               # Caso especial: selecciona <texto>
-            if command.startswith('selecciona '):
-                return self.select_by_title(command)
-
-        # Comandos directos
-            for key, action in self.command_actions.items():
-                if key == 'selecciona':
-                 continue
-            if key in command:
-                action()
-                return True
-
-
 
-            
-            # Comandos de búsqueda
-            if 'buscar' in command:
-                q = command.split('buscar')[-1].strip()
-                if not self.chrome_opened:
-                    self.open_chrome()
-                webbrowser.open(f'https://www.google.com/search?q={q}')
-                self.speak(f'Buscando {q}')
-                return True
-            
-            # Comandos de volumen específico
-            m = re.search(r'(?:sube|aumenta).*volumen a (\d+)', command)
-            if m:
-                self.set_volume(int(m.group(1)))
-                return True
-            m = re.search(r'(?:baja|disminuye).*volumen a (\d+)', command)
-            if m:
-                self.set_volume(int(m.group(1)))
-                return True
-            
-            # Comandos de ajuste de volumen
-            if any(k in command for k in ['sube volumen', 'más volumen', 'aumentar volumen']):
-                self.change_volume(0.05)
+            command = normalize_utterance(command)
+            kind, value = self.resolve_command(command)
+            if self.speculation is not None and kind != 'redirect':
+                self.speculation.settle(value if kind == 'intent' else None)
+            self.events.publish('intent', resolution=kind, command=command,
+                                name=value.name if kind == 'intent' else value,
+                                phrase=value.phrase if kind == 'intent' else value)
+            if kind == 'intent':
+                if self.usage is not None:
+                    self.usage.record(value.phrase)
+                return self._execute_intent(value, command)
+            if kind == 'redirect':
+                return self.process_command(value)
+            if kind == 'suggest':
+                self.speak(f'Quisiste decir {value}? Di confirmo')
+                self.last_suggestion = value
                 return True
-            if any(k in command for k in ['baja volumen', 'menos volumen', 'disminuir volumen']):
-                self.change_volume(-0.05)
-                return True
-            
-            # Comandos para videos en pantalla completa
-            if any(k in command for k in ['video pantalla completa', 'pantalla completa video', 'expandir video']):
-                w, h = pyautogui.size()
-                pyautogui.click(w/2, h/2)
-                time.sleep(0.1)
-                pyautogui.press('f')
-                self.speak('Video pantalla completa')
-                return True
-            
-            if any(k in command for k in ['cerrar pantalla completa', 'salir video pantalla completa', 'escapar video']):
-                pyautogui.press('esc')
-                self.speak('Saliendo de pantalla completa')
-                return True
-            
-            # Comandos personalizados desde base de datos
-            try:
-                conn = sqlite3.connect('commands.db')
-                c = conn.cursor()
-                c.execute('SELECT url FROM commands WHERE command = ?', (command,))
-                result = c.fetchone()
-                conn.close()
-                
-                if result:
-                    webbrowser.open(result[0])
-                    self.speak(f'Abriendo {command}')
-                    return True
-            except Exception as e:
-                logging.error(f"Error al buscar comando personalizado: {e}")
-            
-            # Buscar mejor coincidencia si no se encontró comando directo
-            best, conf = self._find_best_match(command)
-            if best:
-                if conf > 0.7:
-                    return self.process_command(best)
-                else:
-                    self.speak(f'Quisiste decir {best}? Di confirmo')
-                    self.last_suggestion = best
-                    return True
-            
+
             self.speak('No entendí, repite por favor')
             return True
         except Exception as e:
             logging.error(f"Error al procesar comando: {e}")
-            self.speak('Hubo un error al procesar tu comando')
+            self.speak('Hubo un error al procesar tu comando', priority=PRIORITY_HIGH)
             return True
-        
 
     def run(self):
         """Inicia el asistente de voz"""
         try:
-            self.speak('Hola soy Leya, di surge para comenzar')
+            self.capture.start()
+            self.speak(f'Hola soy Leya, di {self.wake_words[0]} para comenzar')
             while True:
-                cmd = self.listen(timeout=10)
-                if not cmd:
-                    continue
-                    
-                # Modo básico: comandos con 'surge'
-                if 'surge' in cmd:
-                    self.speak('¿En qué puedo ayudarte?')
+                # Modo básico: comandos tras la palabra de activación
+                self._mode = 'waiting'
+                self._set_status('waiting')
+                if not self.capture.running:
+                    # El detector local no lee segmentos: sin esto esperaría para siempre
+                    raise CaptureClosed('la captura de audio está detenida')
+                if self.wait_for_wake(timeout=10):
+                    self._mode = 'listening'
+                    self._set_status('listening')
+                    self.speak('¿En qué puedo ayudarte?', wait=True)
                     command_timeout = time.time() + 60  # 1 minuto de tiempo límite
                     
                     while time.time() < command_timeout:
@@ -479,17 +983,45 @@ class ChromeVoiceAssistant:
                         # Renovar tiempo si hay actividad
                         command_timeout = time.time() + 60
                         
-                        if not self.process_command(cmd2):
+                        keep_going = self.process_command(cmd2)
+                        self.tracer.end_interaction(kind='command', text=cmd2)
+                        if not keep_going:
                             break
         except KeyboardInterrupt:
-            self.speak('Adiós')
+            self.speak('Adiós', wait=True)
+        except CaptureClosed as e:
+            logging.error(f"Error en la captura de audio: {e}")
+            self.events.publish('error', message=str(e))
         except Exception as e:
             logging.error(f"Error crítico: {e}")
-            self.speak('Ocurrió un error en el sistema')
+            self.events.publish('error', message=str(e))
+            self.speak('Ocurrió un error en el sistema', priority=PRIORITY_HIGH, wait=True)
+        finally:
+            # Sólo se para la escucha: run() puede volver a llamarse; close() libera el resto
+            self.capture.stop()
+            self._set_status('offline')
+
+    def close(self):
+        """Libera ejecutor, CDP, estadísticas, trazas y base de comandos; el asistente ya no puede usarse"""
+        self.capture.stop()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_pending=True)
+        if self.cdp is not None:
+            self.cdp.close()
+        if self.speculation is not None:
+            self.speculation.close()
+        # Antes que la base de comandos: el hilo de escritura guarda ahí lo pendiente
+        if self.usage is not None:
+            self.usage.close()
+        self.store.close()
+        self.speech.close()
+        self.tracer.close()
 
 if __name__ == '__main__':
     assistant = ChromeVoiceAssistant()
     try:
         assistant.run()
     except KeyboardInterrupt:
-        assistant.speak('Adiós') 
\ No newline at end of file
+        assistant.speak('Adiós', wait=True)
+    finally:
+        assistant.close() 
\ No newline at end of file
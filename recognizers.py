@@ -0,0 +1,221 @@
+import hashlib
+import json
+import logging
+import os
+import re
+
+UNITS = ['cero', 'uno', 'dos', 'tres', 'cuatro', 'cinco', 'seis', 'siete', 'ocho', 'nueve']
+TEENS = ['diez', 'once', 'doce', 'trece', 'catorce', 'quince', 'dieciséis', 'diecisiete',
+         'dieciocho', 'diecinueve', 'veinte', 'veintiuno', 'veintidós', 'veintitrés', 'veinticuatro',
+         'veinticinco', 'veintiséis', 'veintisiete', 'veintiocho', 'veintinueve']
+TENS = {'treinta': 30, 'cuarenta': 40, 'cincuenta': 50, 'sesenta': 60, 'setenta': 70,
+        'ochenta': 80, 'noventa': 90}
+
+NUMBER_WORDS = {w: i for i, w in enumerate(UNITS)}
+NUMBER_WORDS.update({w: i + 10 for i, w in enumerate(TEENS)})
+NUMBER_WORDS.update(TENS)
+NUMBER_WORDS['cien'] = 100
+NUMBER_WORDS.update({'un': 1, 'una': 1})
+
+# "cuarenta y cinco", "veinte", "cien"... ("un"/"uno"/"una" sueltos no: "baja un poco")
+_tens = '|'.join(TENS)
+_simple = '|'.join(w for w in NUMBER_WORDS if w not in ('un', 'uno', 'una'))
+NUMBER_RE = re.compile(rf'\b(?:(?P<tens>{_tens}) y (?P<unit>uno?|una|{"|".join(UNITS[2:])})|(?P<simple>{_simple}))\b')
+
+
+def words_to_digits(text):
+    """Convierte números escritos en palabras a cifras ("volumen a cuarenta" -> "volumen a 40").
+
+    Sólo para extraer parámetros numéricos: aplicado a toda la frase cambiaría
+    también nombres de comandos ("radio tres").
+    """
+    def repl(m):
+        if m.group('tens'):
+            return str(NUMBER_WORDS[m.group('tens')] + NUMBER_WORDS[m.group('unit')])
+        return str(NUMBER_WORDS[m.group('simple')])
+    return NUMBER_RE.sub(repl, text)
+
+
+class RecognizerBackend:
+    """Interfaz de los reconocedores de voz.
+
+    recognize() recibe un Segment de audio_capture y devuelve el texto en
+    minúsculas, o '' si no se entendió nada.
+    """
+
+    name = None
+    partials = False              # True si da hipótesis parciales mientras se habla
+
+    def recognize(self, segment):
+        raise NotImplementedError
+
+    def set_vocabulary(self, phrases):
+        """Restringe el vocabulario a las frases dadas (si el motor lo admite)"""
+
+    def begin_utterance(self, sample_rate):
+        """Empieza una frase en vivo (evento de inicio del endpointer)"""
+
+    def accept_partial(self, frame):
+        """Añade audio de la frase en vivo y devuelve la hipótesis parcial ('' si no hay)"""
+        return ''
+
+
+class GoogleRecognizer(RecognizerBackend):
+    """Reconocimiento en la nube con la API de Google (speech_recognition)"""
+
+    name = 'google'
+
+    def __init__(self, language='es-ES'):
+        self.language = language
+        self._sr = None
+        self.recognizer = None
+
+    def recognize(self, segment):
+        if self._sr is None:
+            import speech_recognition as sr
+            self._sr = sr
+            self.recognizer = sr.Recognizer()
+        audio = self._sr.AudioData(segment.data, segment.sample_rate, segment.sample_width)
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language).lower()
+        except self._sr.UnknownValueError:
+            return ''
+
+
+class VoskRecognizer(RecognizerBackend):
+    """Reconocimiento sin conexión con Vosk (modelo en español).
+
+    Con vocabulario restringido se decodifica primero contra los comandos
+    conocidos; si el resultado contiene palabras desconocidas (p. ej. tras
+    "buscar") se repite con el vocabulario completo del modelo. Si la frase
+    ya se decodificó en vivo, recognize() reutiliza ese resultado en vez de
+    volver a pasar el audio. Compilar la gramática cuesta con muchos comandos:
+    los KaldiRecognizer se guardan por frecuencia y gramática y se reutilizan
+    con Reset() hasta que cambia el vocabulario.
+    """
+
+    name = 'vosk'
+    partials = True
+
+    def __init__(self, model_path, constrained=True):
+        from vosk import KaldiRecognizer, Model, SetLogLevel
+        SetLogLevel(-1)
+        if not os.path.isdir(model_path):
+            raise FileNotFoundError(f'Modelo de Vosk no encontrado en {model_path}')
+        self._kaldi = KaldiRecognizer
+        self.model = Model(model_path)
+        self.constrained = constrained
+        self.grammar = None
+        self._stream = None
+        self._stream_text = ''
+        self._stream_audio = bytearray()
+        self._recognizers = {}
+        logging.info('Modelo de Vosk cargado desde %s', model_path)
+
+    def set_vocabulary(self, phrases):
+        if not self.constrained:
+            return
+        words = {w for p in phrases for w in re.findall(r'\w+', p.lower())}
+        # Frases completas + palabras sueltas + comodín para lo desconocido
+        grammar = json.dumps(sorted(set(p.lower() for p in phrases) | words) + ['[unk]'])
+        if grammar != self.grammar:
+            self.grammar = grammar
+            self._recognizers = {}
+
+    def _new(self, sample_rate, grammar=None, stream=False):
+        """Reconocedor vacío para una frase (el de la frase en vivo va aparte del de recognize)"""
+        key = (stream, sample_rate, grammar)
+        rec = self._recognizers.get(key)
+        if rec is not None:
+            rec.Reset()
+            return rec
+        if grammar:
+            rec = self._kaldi(self.model, sample_rate, grammar)
+        else:
+            rec = self._kaldi(self.model, sample_rate)
+        self._recognizers[key] = rec
+        return rec
+
+    def _decode(self, segment, grammar=None):
+        rec = self._new(segment.sample_rate, grammar)
+        rec.AcceptWaveform(segment.data)
+        return json.loads(rec.FinalResult()).get('text', '')
+
+    def begin_utterance(self, sample_rate):
+        self._stream = self._new(sample_rate, self.grammar, stream=True)
+        self._stream_text = ''
+        self._stream_audio = bytearray()
+
+    def accept_partial(self, frame):
+        if self._stream is None:
+            return ''
+        self._stream_audio += frame
+        if self._stream.AcceptWaveform(frame):
+            # Vosk cerró un tramo por su cuenta: se acumula y sigue la frase
+            piece = json.loads(self._stream.Result()).get('text', '')
+            self._stream_text = f'{self._stream_text} {piece}'.strip()
+            text = self._stream_text
+        else:
+            piece = json.loads(self._stream.PartialResult()).get('partial', '')
+            text = f'{self._stream_text} {piece}'.strip()
+        return text.replace('[unk]', '').strip().lower()
+
+    def _stream_result(self, segment):
+        """Resultado final de la frase en vivo si es la de este segmento; None si no la hay"""
+        stream, audio = self._stream, bytes(self._stream_audio)
+        # El segmento incluye además el audio previo al inicio y el bloque de final
+        if stream is None or not audio or audio not in segment.data:
+            return None
+        self._stream = None
+        self._stream_audio = bytearray()
+        piece = json.loads(stream.FinalResult()).get('text', '')
+        return f'{self._stream_text} {piece}'.strip()
+
+    def recognize(self, segment):
+        text = self._stream_result(segment)
+        if text is None and self.grammar:
+            text = self._decode(segment, self.grammar)
+        if text is None or '[unk]' in text:
+            text = self._decode(segment)
+        return text.replace('[unk]', '').strip().lower()
+
+
+class FixtureRecognizer(RecognizerBackend):
+    """Reconocedor determinista para pruebas.
+
+    transcripts puede ser un dict {huella sha1 del audio: texto} o una lista
+    de textos que se devuelven en orden, uno por segmento.
+    """
+
+    name = 'fixture'
+
+    def __init__(self, transcripts):
+        self.by_digest = transcripts if isinstance(transcripts, dict) else {}
+        self.sequence = list(transcripts) if isinstance(transcripts, (list, tuple)) else []
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def digest(segment):
+        return hashlib.sha1(segment.data).hexdigest()
+
+    def recognize(self, segment):
+        if self.sequence:
+            return self.sequence.pop(0).lower()
+        return self.by_digest.get(self.digest(segment), '').lower()
+
+
+def make_recognizer(backend, language='es-ES', vosk_model_path=None, constrained=True, fixture=None):
+    """Crea el reconocedor configurado ('google', 'vosk' o 'fixture')"""
+    if backend == 'google':
+        return GoogleRecognizer(language)
+    if backend == 'vosk':
+        return VoskRecognizer(vosk_model_path, constrained=constrained)
+    if backend == 'fixture':
+        if fixture is None:
+            raise ValueError('El reconocedor de pruebas necesita un archivo de transcripciones (LEYA_RECOGNIZER_FIXTURE)')
+        return FixtureRecognizer.from_file(fixture) if isinstance(fixture, str) else FixtureRecognizer(fixture)
+    raise ValueError(f'Reconocedor desconocido: {backend}')
@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+# kind: 'intent' (value: Intent), 'redirect' (value: comando al que se corrige),
+# 'suggest' (value: comando a sugerir) o 'unknown' (value: None). En la caché también
+# 'match' (value: candidatos (comando, confianza) aún sin ordenar por el uso)
+Resolution = namedtuple('Resolution', ['kind', 'value'])
+
+
+def normalize_utterance(text):
+    """Clave de la caché: el texto sin espacios sobrantes"""
+    return ' '.join(text.split())
+
+
+class ResolutionCache:
+    """Caché LRU acotada de texto reconocido -> Resolution.
+
+    Cada cambio del conjunto de comandos llama a invalidate(), que vacía la
+    caché y sube la generación; put() descarta los resultados calculados con
+    una generación anterior (resoluciones en curso durante el cambio).
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, generation):
+        """Guarda la resolución si se calculó con la generación actual"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Aciertos, fallos, tasa de acierto, tamaño y generación"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'size': len(self._entries),
+                'generation': self.generation,
+            }
@@ -0,0 +1,327 @@
+"""Servidor de resolución sin interfaz: texto (o audio) -> intención, sin ejecutar nada.
+
+Un único asistente (buscador TF-IDF, índice aproximado y almacén de comandos
+cargados una vez) atiende todas las conexiones. Las peticiones que llegan a
+la vez se juntan y las que necesitan el buscador se resuelven con una sola
+consulta dispersa (ChromeVoiceAssistant.resolve_many). Nunca se abre el
+navegador, se pulsa una tecla ni se habla: el asistente no llega a arrancar.
+
+HTTP/1.1 local con conexiones persistentes (o un socket Unix con --unix):
+
+    POST /resolve    {"text": "abrir correo"} o {"texts": ["...", ...]}
+    POST /recognize  audio WAV PCM mono (sólo con --audio)
+    GET  /stats      peticiones, lotes y caché de resoluciones
+    GET  /health
+
+    python resolution_server.py --port 8765
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from audio_capture import Segment, SyntheticSource
+from resolution_cache import normalize_utterance
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error'}
+MAX_BODY = 16 << 20
+
+
+def make_headless_assistant(audio=False):
+    """Asistente sin micrófono, voz ni captura en marcha; con audio usa el reconocedor configurado"""
+    from leya import ChromeVoiceAssistant
+    from recognizers import FixtureRecognizer
+    from speech_output import SilentEngine
+    recognizer = None if audio else FixtureRecognizer([])
+    return ChromeVoiceAssistant(audio_source=SyntheticSource([]), recognizer=recognizer,
+                                tts_engine=SilentEngine())
+
+
+def describe(text, resolution):
+    """Resolución como diccionario JSON"""
+    kind, value = resolution
+    out = {'text': text, 'resolution': kind, 'intent': None, 'slots': {}, 'phrase': None, 'match': None}
+    if kind == 'intent':
+        out.update(intent=value.name, slots=value.slots, phrase=value.phrase)
+    elif kind in ('redirect', 'suggest'):
+        out['match'] = value
+    return out
+
+
+class BatchResolver:
+    """Junta las frases pendientes y las resuelve por lotes en un único hilo.
+
+    Mientras un lote está en marcha, las peticiones nuevas se acumulan y
+    forman el siguiente (hasta max_batch); con poca carga cada petición sale
+    sola tras esperar como mucho max_delay segundos a otras.
+    """
+
+    def __init__(self, assistant, max_batch=64, max_delay=0.001):
+        self.assistant = assistant
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self._queue = asyncio.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='resolver')
+        self._task = None
+        self.requests = 0
+        self.batches = 0
+        self.largest = 0
+        self.busy = 0.0
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._pool.shutdown(wait=True)
+
+    async def resolve(self, text):
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((normalize_utterance(text.lower()), future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            if self.max_delay > 0 and self._queue.empty() and self.max_batch > 1:
+                await asyncio.sleep(self.max_delay)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            texts = [text for text, _ in batch]
+            t = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._pool, self._resolve_batch, texts)
+            except Exception as e:
+                logging.error(f"Error al resolver lote: {e}")
+                results = [e] * len(batch)
+            self.busy += time.perf_counter() - t
+            self.requests += len(batch)
+            self.batches += 1
+            self.largest = max(self.largest, len(batch))
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _resolve_batch(self, texts):
+        """Resuelve el lote; las correcciones seguras (redirect) se siguen como en process_command"""
+        resolutions = self.assistant.resolve_many(texts)
+        out = [describe(text, resolution) for text, resolution in zip(texts, resolutions)]
+        redirects = [i for i, r in enumerate(resolutions) if r.kind == 'redirect']
+        if redirects:
+            targets = self.assistant.resolve_many([resolutions[i].value for i in redirects])
+            for i, target in zip(redirects, targets):
+                if target.kind == 'intent':
+                    out[i] = describe(texts[i], target)
+                    out[i].update(resolution='redirect', match=resolutions[i].value)
+        return out
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch': round(self.requests / self.batches, 2) if self.batches else 0.0,
+            'largest_batch': self.largest,
+            'busy_seconds': round(self.busy, 3),
+            'queued': self._queue.qsize(),
+        }
+
+
+class ResolutionServer:
+    """Servidor HTTP/1.1 mínimo sobre asyncio con un BatchResolver compartido"""
+
+    def __init__(self, assistant, max_batch=64, max_delay=0.001, audio=False):
+        self.assistant = assistant
+        self.resolver = BatchResolver(assistant, max_batch, max_delay)
+        self.audio = audio
+        # El reconocimiento va en su propio hilo para no frenar los lotes de texto
+        self._audio_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recognizer') if audio else None
+        self._server = None
+        self.started = time.monotonic()
+        self.connections = 0
+
+    async def start(self, host='127.0.0.1', port=0, unix_path=None):
+        self.resolver.start()
+        if unix_path:
+            self._server = await asyncio.start_unix_server(self._client, path=unix_path)
+        else:
+            self._server = await asyncio.start_server(self._client, host, port)
+        return self._server
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.resolver.stop()
+        if self._audio_pool is not None:
+            self._audio_pool.shutdown(wait=True)
+
+    async def _client(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except ValueError as e:
+                    # Sin un Content-Length válido no se sabe dónde acaba el cuerpo: se responde y se cierra
+                    self._write(writer, 400, {'error': str(e)}, False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body, keep_alive = request
+                try:
+                    status, payload = await self._handle(method, path, body)
+                except ValueError as e:
+                    status, payload = 400, {'error': str(e)}
+                except Exception as e:
+                    logging.error(f"Error al atender petición: {e}")
+                    status, payload = 500, {'error': str(e)}
+                self._write(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """(método, ruta, cabeceras, cuerpo, mantener conexión) o None si el cliente cerró"""
+        line = await reader.readline()
+        if not line:
+            return None
+        parts = line.decode('latin-1').split()
+        if len(parts) != 3:
+            raise ConnectionError('petición mal formada')
+        method, path, version = parts
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = headers.get('content-length', '0')
+        if not (length.isascii() and length.isdigit()):
+            raise ValueError(f'Content-Length no válido: {length}')
+        length = int(length)
+        if length > MAX_BODY:
+            raise ConnectionError('cuerpo demasiado grande')
+        body = await reader.readexactly(length) if length else b''
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        return method, path.split('?', 1)[0], headers, body, keep_alive
+
+    @staticmethod
+    def _write(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        writer.write(f'HTTP/1.1 {status} {REASONS.get(status, "")}\r\n'
+                     f'Content-Type: application/json; charset=utf-8\r\n'
+                     f'Content-Length: {len(body)}\r\n'
+                     f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + body)
+
+    async def _handle(self, method, path, body):
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/stats':
+            return 200, self.stats()
+        if path not in ('/resolve', '/recognize') or (path == '/recognize' and not self.audio):
+            return 404, {'error': f'ruta desconocida: {path}'}
+        if method != 'POST':
+            return 405, {'error': 'usa POST'}
+        if path == '/recognize':
+            return 200, await self._recognize(body)
+        try:
+            request = json.loads(body or b'{}')
+        except ValueError:
+            raise ValueError('el cuerpo debe ser JSON')
+        if isinstance(request.get('text'), str):
+            return 200, await self.resolver.resolve(request['text'])
+        texts = request.get('texts')
+        if isinstance(texts, list) and all(isinstance(t, str) for t in texts):
+            results = await asyncio.gather(*(self.resolver.resolve(t) for t in texts))
+            return 200, {'results': results}
+        raise ValueError('se esperaba {"text": "..."} o {"texts": [...]}')
+
+    async def _recognize(self, body):
+        """WAV -> texto con el reconocedor del asistente -> resolución"""
+        try:
+            with wave.open(io.BytesIO(body), 'rb') as wav:
+                if wav.getnchannels() != 1:
+                    raise ValueError('el audio debe ser mono')
+                now = time.perf_counter()
+                segment = Segment(wav.readframes(wav.getnframes()), wav.getframerate(), wav.getsampwidth(),
+                                  now, now)
+        except (wave.Error, EOFError) as e:
+            raise ValueError(f'WAV no válido: {e}')
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(self._audio_pool, self.assistant.recognizer.recognize, segment)
+        if not text:
+            return describe('', ('unknown', None))
+        return await self.resolver.resolve(text)
+
+    def stats(self):
+        return {
+            'uptime_seconds': round(time.monotonic() - self.started, 1),
+            'connections': self.connections,
+            'commands': len(self.assistant.all_commands),
+            'resolver': self.resolver.stats(),
+            'cache': self.assistant.resolutions.stats(),
+        }
+
+
+async def serve(args):
+    assistant = make_headless_assistant(audio=args.audio)
+    server = ResolutionServer(assistant, args.max_batch, args.max_delay_ms / 1000, audio=args.audio)
+    await server.start(args.host, args.port, args.unix)
+    where = args.unix or f'http://{args.host}:{server.port}/'
+    logging.info('Servidor de resolución en %s (%d comandos)', where, len(assistant.all_commands))
+    print(f'Escuchando en {where}', flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        assistant.close()
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resuelve texto o audio a intenciones sin ejecutar nada')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=config.SERVER_PORT)
+    parser.add_argument('--unix', help='escucha en este socket Unix en vez de TCP')
+    parser.add_argument('--max-batch', type=int, default=config.SERVER_MAX_BATCH)
+    parser.add_argument('--max-delay-ms', type=float, default=config.SERVER_MAX_DELAY_MS)
+    parser.add_argument('--audio', action='store_true', help='activa POST /recognize con el reconocedor configurado')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import logging
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def intent_key(intent):
+    """Clave comparable de una intención (nombre y parámetros)"""
+    return intent.name, tuple(sorted(intent.slots.items()))
+
+
+def prefetch_host(url):
+    """Resuelve el DNS del host de la URL para que el navegador lo encuentre en la caché del sistema"""
+    parsed = urlparse(url)
+    if parsed.hostname:
+        try:
+            socket.getaddrinfo(parsed.hostname, parsed.port or (443 if parsed.scheme == 'https' else 80),
+                               type=socket.SOCK_STREAM)
+        except OSError as e:
+            logging.debug(f"Sin DNS para {parsed.hostname}: {e}")
+
+
+class Speculator:
+    """Prepara la intención de una hipótesis parcial antes de que llegue la transcripción final.
+
+    feed() recibe las hipótesis parciales (desde el hilo de captura, sin
+    bloquearlo); un hilo propio resuelve sólo la más reciente con resolve
+    (texto -> Intent exacta o None) y, si la intención cambia, deshace la
+    preparación anterior y llama a prewarm(intent), que hace trabajo barato e
+    idempotente (enfocar el navegador, resolver el DNS...) y devuelve cómo
+    deshacerlo (una función) o None si no hay nada que preparar. settle()
+    con la intención de la transcripción final confirma lo preparado si
+    coincide y si no lo deshace; begin() deshace lo que quedase.
+    """
+
+    def __init__(self, resolve, prewarm):
+        self.resolve = resolve
+        self.prewarm = prewarm
+        self._cond = threading.Condition()
+        self._run_lock = threading.Lock()   # una preparación en curso termina antes de confirmar
+        self._pending = None                # (generación, texto) más reciente sin resolver
+        self._last = None
+        self._generation = 0
+        self._current = None                # (clave, deshacer)
+        self._closed = False
+        self._stats = {'partials': 0, 'resolved': 0, 'prewarmed': 0, 'committed': 0, 'rolled_back': 0,
+                       'prewarm_seconds': 0.0}
+        self._thread = threading.Thread(target=self._run, name='speculation', daemon=True)
+        self._thread.start()
+
+    def begin(self):
+        """Empieza una frase nueva"""
+        self.settle(None)
+
+    def feed(self, text):
+        """Hipótesis parcial; sustituye a la anterior si aún no se había resuelto"""
+        if not text or text == self._last:
+            return
+        with self._cond:
+            self._last = text
+            self._pending = (self._generation, text)
+            self._stats['partials'] += 1
+            self._cond.notify()
+
+    def settle(self, intent):
+        """Transcripción final: True si confirma lo preparado, False si lo deshizo, None si no había nada"""
+        with self._run_lock:
+            with self._cond:
+                self._generation += 1
+                self._pending = None
+                self._last = None
+            current, self._current = self._current, None
+        if current is None:
+            return None
+        if intent is not None and intent_key(intent) == current[0]:
+            self._stats['committed'] += 1
+            return True
+        self._undo(current)
+        return False
+
+    def _undo(self, current):
+        self._stats['rolled_back'] += 1
+        if current[1] is not None:
+            try:
+                current[1]()
+            except Exception as e:
+                logging.error(f"Error al deshacer preparación: {e}")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                generation, text = self._pending
+                self._pending = None
+            with self._run_lock:
+                if generation != self._generation:
+                    continue
+                try:
+                    self._speculate(text)
+                except Exception as e:
+                    logging.error(f"Error al preparar intención: {e}")
+
+    def _speculate(self, text):
+        intent = self.resolve(text)
+        if intent is None:
+            return
+        self._stats['resolved'] += 1
+        key = intent_key(intent)
+        if self._current is not None:
+            if self._current[0] == key:
+                return
+            previous, self._current = self._current, None
+            self._undo(previous)
+        t = time.perf_counter()
+        undo = self.prewarm(intent)
+        if undo is None:
+            return
+        self._stats['prewarm_seconds'] += time.perf_counter() - t
+        self._stats['prewarmed'] += 1
+        self._current = (key, undo)
+
+    def stats(self):
+        return dict(self._stats)
+
+    def close(self):
+        self.settle(None)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
@@ -0,0 +1,193 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+class Pyttsx3Engine:
+    """Motor de voz pyttsx3; se inicializa en el hilo del que habla (SAPI exige el mismo hilo)"""
+
+    def __init__(self, rate=150, volume=1.0, voice_hint='spanish'):
+        self.rate = rate
+        self.volume = volume
+        self.voice_hint = voice_hint
+        self._engine = None
+        self._interrupt = False
+
+    def _init(self):
+        import pyttsx3
+        engine = pyttsx3.init()
+        for voice in engine.getProperty('voices'):
+            if self.voice_hint in voice.id.lower():
+                engine.setProperty('voice', voice.id)
+                break
+        engine.setProperty('rate', self.rate)
+        engine.setProperty('volume', self.volume)
+        # pyttsx3 sólo se puede detener con seguridad desde sus propios callbacks
+        engine.connect('started-word', self._on_word)
+        self._engine = engine
+
+    def _on_word(self, name, location, length):
+        if self._interrupt:
+            self._engine.stop()
+
+    def say(self, text):
+        """Dice el texto y bloquea hasta terminar o ser interrumpido"""
+        if self._engine is None:
+            self._init()
+        self._interrupt = False
+        self._engine.say(text)
+        self._engine.runAndWait()
+
+    def stop(self):
+        self._interrupt = True
+
+
+class SilentEngine:
+    """Motor sin sonido para pruebas: simula la duración y guarda lo dicho"""
+
+    def __init__(self, seconds_per_char=0.0):
+        self.seconds_per_char = seconds_per_char
+        self.spoken = []
+        self._stop = threading.Event()
+
+    def say(self, text):
+        self._stop.clear()
+        self._stop.wait(len(text) * self.seconds_per_char)
+        if not self._stop.is_set():
+            self.spoken.append(text)
+
+    def stop(self):
+        self._stop.set()
+
+
+class SpeechQueue:
+    """Cola de voz con prioridad en un hilo propio.
+
+    say() no bloquea: devuelve un Future que se completa con True al terminar
+    de hablar, False si se interrumpió, o queda cancelado si se descartó
+    antes de empezar. Los mensajes con la misma clave se fusionan: sólo se
+    dice el último pendiente (p. ej. cambios de volumen seguidos).
+    """
+
+    def __init__(self, engine, on_finished=None, on_started=None):
+        self.engine = engine
+        # Se llama con interrupted=True/False y el instante (perf_counter) en que acabó cada mensaje,
+        # antes de completar su Future: quien espera a say() ya encuentra hecho lo de on_finished
+        self.on_finished = on_finished
+        # Se llama con el texto justo antes de empezar a decirlo
+        self.on_started = on_started
+        self._heap = []
+        self._pending = {}            # clave -> entrada pendiente
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._current = None
+        self._interrupted = False
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='speech-output', daemon=True)
+        self._thread.start()
+
+    @property
+    def speaking(self):
+        return self._current is not None
+
+    def say(self, text, priority=PRIORITY_NORMAL, key=None):
+        """Encola un mensaje y devuelve su Future (ya cancelado si la cola está cerrada)"""
+        future = Future()
+        entry = [priority, next(self._seq), text, key, future, time.perf_counter()]
+        with self._cond:
+            if not self._running:
+                future.cancel()
+                return future
+            if key is not None:
+                old = self._pending.pop(key, None)
+                if old is not None:
+                    old[4].cancel()
+                self._pending[key] = entry
+            heapq.heappush(self._heap, entry)
+            self._cond.notify()
+        return future
+
+    def _discard_pending(self):
+        """Cancela los mensajes sin empezar (llamar con el lock tomado)"""
+        for entry in self._heap:
+            entry[4].cancel()
+        self._heap.clear()
+        self._pending.clear()
+
+    def interrupt(self):
+        """Barge-in: corta el mensaje en curso y descarta los pendientes"""
+        with self._cond:
+            self._discard_pending()
+            if self._current is not None:
+                self._interrupted = True
+                self.engine.stop()
+
+    def wait_idle(self, timeout=None):
+        """Espera a que no quede nada por decir"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._heap or self._current is not None:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self):
+        """Deja de aceptar mensajes y cancela los pendientes; el que está sonando termina"""
+        with self._cond:
+            self._running = False
+            self._discard_pending()
+            self._cond.notify_all()
+
+    def _next(self):
+        with self._cond:
+            while self._running:
+                while self._heap:
+                    entry = heapq.heappop(self._heap)
+                    if entry[3] is not None and self._pending.get(entry[3]) is entry:
+                        del self._pending[entry[3]]
+                    if entry[4].set_running_or_notify_cancel():
+                        self._current = entry
+                        self._interrupted = False
+                        return entry
+                self._cond.wait()
+            return None
+
+    def _run(self):
+        while True:
+            entry = self._next()
+            if entry is None:
+                return
+            _, _, text, _, future, queued = entry
+            logging.debug('Voz en cola %.0f ms: %s', (time.perf_counter() - queued) * 1e3, text)
+            if self.on_started:
+                self.on_started(text)
+            error = None
+            try:
+                self.engine.say(text)
+            except Exception as e:
+                logging.error(f"Error en sintetizador de voz: {e}")
+                error = e
+            ended = time.perf_counter()
+            with self._cond:
+                interrupted = self._interrupted
+            if self.on_finished:
+                try:
+                    self.on_finished(interrupted, ended)
+                except Exception as e:
+                    logging.error(f"Error al terminar de hablar: {e}")
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(not interrupted)
+            with self._cond:
+                self._current = None
+                self._cond.notify_all()
@@ -0,0 +1,73 @@
+"""Acuerdo de FuzzyIndex con difflib.get_close_matches sobre un corpus sintético con semilla fija.
+
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+from difflib import SequenceMatcher, get_close_matches
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from fuzzy_index import FuzzyIndex  # noqa: E402
+
+WORDS = [
+    'abrir', 'banco', 'correo', 'trabajo', 'noticias', 'deportes', 'música', 'radio', 'calendario',
+    'tareas', 'facturas', 'nómina', 'clientes', 'informe', 'ventas', 'tienda', 'pedidos', 'mapa',
+    'oficina', 'escuela', 'recetas', 'cocina', 'viajes', 'vuelos', 'hotel', 'películas', 'series',
+    'fotos', 'documentos', 'proyecto', 'soporte', 'ayuda', 'foro', 'revista', 'tiempo', 'bolsa',
+]
+LETTERS = 'abcdefghijklmnopqrstuvwxyzáéíóúñ '
+
+
+def corpus(size, seed):
+    rng = random.Random(seed)
+    commands = set()
+    while len(commands) < size:
+        commands.add(' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 3))) + f' {rng.randrange(size)}')
+    return sorted(commands)
+
+
+def corrupt(text, rng):
+    chars = list(text)
+    for _ in range(rng.randint(1, 3)):
+        i = rng.randrange(len(chars))
+        op = rng.random()
+        if op < 0.4:
+            chars[i] = rng.choice(LETTERS)
+        elif op < 0.7 and len(chars) > 3:
+            del chars[i]
+        else:
+            chars.insert(i, rng.choice(LETTERS))
+    return ''.join(chars)
+
+
+def agreement(index, commands, queries):
+    """Fracción de consultas cuyo mejor resultado es el de difflib o empata con él en similitud"""
+    agree = 0
+    for q in queries:
+        expected = get_close_matches(q, commands, n=1, cutoff=0.6)
+        got = index.get_close_matches(q, n=1, cutoff=0.6)
+        if expected == got:
+            agree += 1
+        elif expected and got:
+            ratio = lambda c: SequenceMatcher(None, q, c).ratio()
+            agree += abs(ratio(expected[0]) - ratio(got[0])) < 1e-9
+    return agree / len(queries)
+
+
+def test_agrees_with_difflib():
+    commands = corpus(5000, seed=7)
+    rng = random.Random(7)
+    queries = [corrupt(rng.choice(commands), rng) for _ in range(150)]
+    index = FuzzyIndex()
+    index.rebuild(commands)
+    # Con 32 candidatos fijos este corpus daba un 97,3 %
+    assert agreement(index, commands, queries) >= 0.98
+
+
+def test_candidates_grow_with_index():
+    index = FuzzyIndex(candidates=32, candidates_scale=1.5)
+    index.rebuild(corpus(10000, seed=1))
+    # Con 10.000 comandos se puntúan 150 candidatos, no 32
+    assert len(index._candidates('banco radio 1')) > 32
@@ -0,0 +1,57 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+TOKEN_RE = re.compile(r"\b\w+\b")
+
+
+def fold_accents(text):
+    """Quita tildes y diacríticos ("pestaña" -> "pestana")"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+class TextPreprocessor:
+    """Normaliza texto para el buscador: minúsculas, sin tildes, tokens con raíz (stem) cacheada"""
+
+    def __init__(self, language='spanish', cache_size=100000):
+        self.language = language
+        self._stemmer = None
+        # Caché LRU acotada de raíces: el vocabulario de comandos se repite mucho
+        self.stem = lru_cache(maxsize=cache_size)(self._stem)
+
+    def _stem(self, token):
+        # Los números no tienen raíz (Snowball los devuelve igual): importaciones con miles de ellos
+        if token.isdigit():
+            return token
+        if self._stemmer is None:
+            self.warm_up()
+        return self._stemmer.stem(token)
+
+    def warm_up(self):
+        """Carga nltk y el stemmer (se hace al primer uso o en segundo plano al arrancar)"""
+        if self._stemmer is None:
+            from nltk.stem import SnowballStemmer
+            self._stemmer = SnowballStemmer(self.language)
+
+    def tokens(self, text):
+        """Tokens normalizados (sin raíz) del texto"""
+        return TOKEN_RE.findall(fold_accents(text.lower()))
+
+    def __call__(self, text):
+        stem = self.stem
+        return [stem(t) for t in self.tokens(text)]
+
+    def normalize_many(self, texts):
+        """Normaliza muchos textos a la vez; cada token distinto se procesa una sola vez"""
+        token_lists = [self.tokens(text) for text in texts]
+        stems = {}
+        for tokens in token_lists:
+            for t in tokens:
+                if t not in stems:
+                    stems[t] = self.stem(t)
+        return [[stems[t] for t in tokens] for tokens in token_lists]
+
+    def cache_info(self):
+        """Estadísticas de la caché de raíces"""
+        return self.stem.cache_info()
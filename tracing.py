@@ -0,0 +1,212 @@
+import functools
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'start')
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class Tracer:
+    """Trazas por etapas de cada interacción (de la voz a la acción) e histogramas móviles.
+
+    Desactivado, span() devuelve un contexto vacío compartido y el coste es
+    una comprobación de atributo. Los tiempos usan time.perf_counter().
+    Las interacciones sólo se exportan a path si el trazador se creó
+    activado: los oyentes activan las medidas, no el archivo.
+    """
+
+    def __init__(self, enabled=False, path=None, window=1000):
+        self.enabled = enabled
+        # Exportar a JSONL depende sólo de enabled al crearlo (LEYA_TRACE), no de los oyentes
+        self.export = enabled
+        self.path = path
+        self.window = window
+        self._lock = threading.Lock()
+        self._hist = {}
+        self._ids = itertools.count(1)
+        self._current = None
+        self._wake = None
+        self._file = None
+        self._server = None
+        # fn(etapa, segundos) tras cada medida (p. ej. el bus de eventos de la interfaz)
+        self.listeners = []
+
+    def add_listener(self, fn):
+        """Avisa de cada etapa medida; activa las medidas aunque no se exporten trazas"""
+        self.listeners.append(fn)
+        self.enabled = True
+
+    def _notify(self, name, seconds):
+        for fn in self.listeners:
+            try:
+                fn(name, seconds)
+            except Exception as e:
+                logging.error(f"Error al avisar de una traza: {e}")
+
+    def span(self, name):
+        """Contexto que mide una etapa"""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def record(self, name, start, end):
+        """Registra una etapa ya medida (inicio y fin en perf_counter)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._observe(name, end - start)
+            if self._current is not None:
+                self._current['spans'].append({
+                    'name': name,
+                    'start_ms': round((start - self._current['t0']) * 1e3, 3),
+                    'dur_ms': round((end - start) * 1e3, 3),
+                    'thread': threading.current_thread().name,
+                })
+        if self.listeners:
+            self._notify(name, end - start)
+
+    def _observe(self, name, seconds):
+        hist = self._hist.get(name)
+        if hist is None:
+            hist = self._hist[name] = deque(maxlen=self.window)
+        hist.append(seconds)
+
+    def begin_interaction(self, start=None, **info):
+        """Abre la traza de una interacción; start es cuando empezó a hablar el usuario"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._current = {'id': next(self._ids), 't0': start or time.perf_counter(), 'spans': [], **info}
+
+    def end_interaction(self, **info):
+        """Cierra la interacción en curso, actualiza las métricas de extremo a extremo y la exporta.
+
+        kind='wake' marca la palabra de activación: la siguiente interacción
+        registra además wake_to_action desde que se empezó a decir.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            trace, self._current = self._current, None
+            if trace is None:
+                return
+            trace.update(info)
+            t0 = trace.pop('t0')
+            trace['speech_to_action_ms'] = round((now - t0) * 1e3, 3)
+            self._observe('speech_to_action', now - t0)
+            if info.get('kind') == 'wake':
+                self._wake = t0
+            elif self._wake is not None:
+                trace['wake_to_action_ms'] = round((now - self._wake) * 1e3, 3)
+                self._observe('wake_to_action', now - self._wake)
+                self._wake = None
+            self._export(trace)
+        if self.listeners:
+            self._notify('speech_to_action', now - t0)
+
+    def discard_interaction(self):
+        with self._lock:
+            self._current = None
+
+    def _export(self, trace):
+        if not self.export or not self.path:
+            return
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(trace, ensure_ascii=False) + '\n')
+            self._file.flush()
+        except OSError as e:
+            logging.error(f"Error al exportar trazas: {e}")
+
+    def stats(self):
+        """Resumen por etapa: nº de muestras, media y percentiles en ms"""
+        with self._lock:
+            hists = {name: sorted(values) for name, values in self._hist.items()}
+        out = {}
+        for name, values in hists.items():
+            if not values:
+                continue
+            pick = lambda p: values[min(len(values) - 1, int(p / 100 * len(values)))] * 1e3
+            out[name] = {
+                'count': len(values),
+                'mean_ms': round(sum(values) / len(values) * 1e3, 3),
+                'p50_ms': round(pick(50), 3),
+                'p95_ms': round(pick(95), 3),
+                'p99_ms': round(pick(99), 3),
+                'max_ms': round(values[-1] * 1e3, 3),
+            }
+        return out
+
+    def serve(self, port, host='127.0.0.1'):
+        """Publica stats() como JSON en http://host:port/ (sólo local)"""
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(tracer.stats(), ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='trace-stats', daemon=True).start()
+        logging.info('Estadísticas de latencia en http://%s:%d/', host, self._server.server_address[1])
+        return self._server.server_address[1]
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def traced(name):
+    """Decorador de métodos: mide la llamada con self.tracer si está activo"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            tracer = self.tracer
+            if not tracer.enabled:
+                return fn(self, *args, **kwargs)
+            with _Span(tracer, name):
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,227 @@
+import logging
+import threading
+import time
+
+
+class UsageStats:
+    """Frecuencia de uso de cada comando y de lo que suele decirse después de cada uno.
+
+    Los pesos se reducen a la mitad cada half_life segundos, así que un
+    solo número recoge frecuencia y recencia. Se guardan con decaimiento
+    hacia delante: cada uso suma 2^((t - época) / half_life), de modo que
+    un uso nuevo no toca el resto de pesos; el peso actual es ese valor
+    por 2^(-(ahora - época) / half_life). record() sólo apunta el uso; los
+    contadores en memoria y las tablas de commands.db se actualizan por
+    lotes en un hilo propio cada flush_interval segundos (o al juntarse
+    batch_size usos). Como mucho se guardan max_commands comandos y
+    max_pairs pares (anterior, comando): se descartan los de menos peso.
+    """
+
+    def __init__(self, store, half_life=14 * 86400, context_window=120, smoothing=5.0,
+                 max_commands=2000, max_pairs=10000, flush_interval=2.0, batch_size=256, clock=time.time):
+        self.store = store
+        self.half_life = half_life
+        # Segundos tras los que el comando anterior ya no se toma como contexto
+        self.context_window = context_window
+        # Usos ficticios repartidos según la frecuencia global: sin historial la probabilidad es 0
+        self.smoothing = smoothing
+        self.max_commands = max_commands
+        self.max_pairs = max_pairs
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self._previous = None    # (comando, instante) del último uso
+        self._closed = False
+        self._flushes = 0
+        self._flush_seconds = 0.0
+        self._epoch, self._commands, self._pairs = store.load_usage()
+        self._total = sum(self._commands.values())
+        self._context_totals = {}
+        for (previous, _), weight in self._pairs.items():
+            self._context_totals[previous] = self._context_totals.get(previous, 0.0) + weight
+        self._thread = threading.Thread(target=self._run, name='usage-stats', daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return len(self._commands)
+
+    def record(self, command):
+        """Apunta un uso; los contadores se actualizan en el hilo de escritura"""
+        now = self.clock()
+        with self._cond:
+            previous = self._previous
+            self._previous = (command, now)
+            context = previous[0] if previous and now - previous[1] <= self.context_window else None
+            self._pending.append(('use', command, context, now))
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def forget(self, command):
+        """Olvida un comando eliminado (en la siguiente escritura)"""
+        with self._cond:
+            self._pending.append(('forget', command))
+
+    def rename(self, old, new):
+        """Pasa las estadísticas de un comando renombrado al nombre nuevo (en la siguiente escritura)"""
+        with self._cond:
+            self._pending.append(('rename', old, new))
+
+    def priors(self, commands):
+        """Probabilidad estimada de que ahora se quiera decir cada comando (0 sin historial).
+
+        La frecuencia de cada comando tras el anterior, suavizada hacia su
+        frecuencia global; sin comando anterior reciente, sólo la global.
+        """
+        if self._epoch is None:
+            return [0.0] * len(commands)
+        now = self.clock()
+        scale = 2.0 ** (-(now - self._epoch) / self.half_life)
+        a = self.smoothing
+        total = self._total * scale + a
+        previous = self._previous
+        context = previous[0] if previous and now - previous[1] <= self.context_window else None
+        context_total = self._context_totals.get(context, 0.0) * scale if context is not None else 0.0
+        out = []
+        for command in commands:
+            p = self._commands.get(command, 0.0) * scale / total
+            if context_total:
+                p = (self._pairs.get((context, command), 0.0) * scale + a * p) / (context_total + a)
+            out.append(p)
+        return out
+
+    def flush(self):
+        """Aplica los usos pendientes y los escribe en commands.db; devuelve cuántos había"""
+        with self._cond:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        t = time.perf_counter()
+        with self._flush_lock:
+            # Claves tocadas: se escriben las que siguen y se borran las que ya no están
+            commands, pairs = set(), set()
+            for op in pending:
+                if op[0] == 'use':
+                    self._use(*op[1:])
+                    commands.add(op[1])
+                    if op[2] is not None:
+                        pairs.add((op[2], op[1]))
+                else:
+                    commands.update(op[1:])
+                    pairs.update(self._move(*op[1:]))
+            rebase = self._rebase(self.clock())
+            commands |= self._prune_commands()
+            pairs |= self._prune_pairs()
+            try:
+                if rebase:
+                    self.store.save_usage(self._epoch, self._commands, self._pairs, rebase=True)
+                else:
+                    self.store.save_usage(self._epoch,
+                                          {c: self._commands[c] for c in commands if c in self._commands},
+                                          {p: self._pairs[p] for p in pairs if p in self._pairs},
+                                          [c for c in commands if c not in self._commands],
+                                          [p for p in pairs if p not in self._pairs])
+            except Exception as e:
+                logging.error(f"Error al guardar estadísticas de uso: {e}")
+            self._flushes += 1
+            self._flush_seconds += time.perf_counter() - t
+        return len(pending)
+
+    def _use(self, command, previous, t):
+        if self._epoch is None:
+            self._epoch = t
+        weight = 2.0 ** ((t - self._epoch) / self.half_life)
+        self._commands[command] = self._commands.get(command, 0.0) + weight
+        self._total += weight
+        if previous is not None:
+            pair = (previous, command)
+            self._pairs[pair] = self._pairs.get(pair, 0.0) + weight
+            self._context_totals[previous] = self._context_totals.get(previous, 0.0) + weight
+
+    def _move(self, old, new=None):
+        """Pasa los pesos de old a new (o los borra si new es None); devuelve los pares tocados"""
+        weight = self._commands.pop(old, None)
+        if weight is not None:
+            if new is None:
+                self._total -= weight
+            else:
+                self._commands[new] = self._commands.get(new, 0.0) + weight
+        touched = set()
+        for pair in [p for p in self._pairs if old in p]:
+            weight = self._pairs.pop(pair)
+            self._context_totals[pair[0]] -= weight
+            touched.add(pair)
+            if new is not None:
+                pair = tuple(new if x == old else x for x in pair)
+                self._pairs[pair] = self._pairs.get(pair, 0.0) + weight
+                self._context_totals[pair[0]] = self._context_totals.get(pair[0], 0.0) + weight
+                touched.add(pair)
+        self._context_totals.pop(old, None)
+        return touched
+
+    def _rebase(self, now):
+        """Cambia la época cuando los pesos crecen demasiado (tras 64 semividas)"""
+        if self._epoch is None or now - self._epoch < 64 * self.half_life:
+            return False
+        scale = 2.0 ** (-(now - self._epoch) / self.half_life)
+        self._commands = {c: w * scale for c, w in self._commands.items()}
+        self._pairs = {p: w * scale for p, w in self._pairs.items()}
+        self._context_totals = {c: w * scale for c, w in self._context_totals.items()}
+        self._total *= scale
+        self._epoch = now
+        return True
+
+    def _prune_commands(self):
+        """Deja los comandos de más peso si se pasa del máximo (con margen para no podar en cada escritura)"""
+        if len(self._commands) <= self.max_commands:
+            return set()
+        keep = sorted(self._commands, key=self._commands.get, reverse=True)[:int(self.max_commands * 0.9)]
+        removed = set(self._commands).difference(keep)
+        self._commands = {c: self._commands[c] for c in keep}
+        self._total = sum(self._commands.values())
+        return removed
+
+    def _prune_pairs(self):
+        if len(self._pairs) <= self.max_pairs:
+            return set()
+        keep = sorted(self._pairs, key=self._pairs.get, reverse=True)[:int(self.max_pairs * 0.9)]
+        removed = set(self._pairs).difference(keep)
+        self._pairs = {p: self._pairs[p] for p in keep}
+        self._context_totals = {}
+        for (previous, _), weight in self._pairs.items():
+            self._context_totals[previous] = self._context_totals.get(previous, 0.0) + weight
+        return removed
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Error al actualizar estadísticas de uso: {e}")
+
+    def stats(self):
+        """Comandos y pares guardados, usos pendientes y escrituras hechas"""
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            'commands': len(self._commands),
+            'pairs': len(self._pairs),
+            'pending': pending,
+            'flushes': self._flushes,
+            'flush_seconds': round(self._flush_seconds, 4),
+        }
+
+    def close(self):
+        """Detiene el hilo de escritura y guarda lo pendiente"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
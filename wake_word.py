@@ -0,0 +1,236 @@
+"""Detector local de palabra de activación ("surge") por plantillas MFCC + DTW.
+
+Las plantillas son grabaciones WAV cortas de cada palabra en
+wake_words/<palabra>/*.wav; se pueden grabar con:
+
+    python wake_word.py record surge --count 5
+"""
+import argparse
+import glob
+import logging
+import os
+import threading
+import time
+import wave
+from collections import deque, namedtuple
+
+import numpy as np
+
+Detection = namedtuple('Detection', ['word', 'distance', 'start', 'end'])
+
+
+def _mel(hz):
+    return 2595 * np.log10(1 + hz / 700)
+
+
+def _hz(mel):
+    return 700 * (10 ** (mel / 2595) - 1)
+
+
+class MfccExtractor:
+    """MFCC en streaming (ventanas de 25 ms cada 10 ms, hasta 4 kHz)"""
+
+    def __init__(self, sample_rate, n_mels=26, n_mfcc=13, fmax=4000):
+        self.sample_rate = sample_rate
+        self.win = int(0.025 * sample_rate)
+        self.hop = int(0.010 * sample_rate)
+        self.n_fft = 1 << (self.win - 1).bit_length()
+        self.window = np.hamming(self.win)
+        fmax = min(fmax, sample_rate / 2)
+        points = _hz(np.linspace(_mel(60), _mel(fmax), n_mels + 2))
+        bins = np.floor((self.n_fft + 1) * points / sample_rate).astype(int)
+        self.mel = np.zeros((n_mels, self.n_fft // 2 + 1))
+        for m in range(1, n_mels + 1):
+            lo, mid, hi = bins[m - 1], bins[m], bins[m + 1]
+            self.mel[m - 1, lo:mid] = (np.arange(lo, mid) - lo) / max(mid - lo, 1)
+            self.mel[m - 1, mid:hi] = (hi - np.arange(mid, hi)) / max(hi - mid, 1)
+        k = np.arange(n_mels)
+        self.dct = np.cos(np.pi / n_mels * (k + 0.5)[None, :] * np.arange(n_mfcc)[:, None])
+        self._rest = np.zeros(0)
+
+    def push(self, samples):
+        """Añade muestras y devuelve los vectores MFCC completos (sin c0), uno por fila"""
+        buf = np.concatenate([self._rest, samples])
+        if len(buf) < self.win:
+            self._rest = buf
+            return np.zeros((0, self.dct.shape[0] - 1))
+        count = 1 + (len(buf) - self.win) // self.hop
+        idx = np.arange(self.win)[None, :] + self.hop * np.arange(count)[:, None]
+        frames = buf[idx] * self.window
+        self._rest = buf[count * self.hop:]
+        power = np.abs(np.fft.rfft(frames, self.n_fft)) ** 2
+        logmel = np.log(power @ self.mel.T + 1e-10)
+        return (logmel @ self.dct.T)[:, 1:]
+
+    def reset(self):
+        self._rest = np.zeros(0)
+
+
+def pcm_to_float(frame):
+    return np.frombuffer(frame, dtype='<i2').astype(np.float64) / 32768.0
+
+
+def read_wav(path):
+    """Lee un WAV mono de 16 bits: (muestras float, frecuencia)"""
+    with wave.open(path, 'rb') as w:
+        if w.getnchannels() != 1 or w.getsampwidth() != 2:
+            raise ValueError(f'{path}: se necesita WAV mono de 16 bits')
+        return pcm_to_float(w.readframes(w.getnframes())), w.getframerate()
+
+
+def _normalize(feats):
+    norms = np.linalg.norm(feats, axis=1, keepdims=True)
+    return feats / np.maximum(norms, 1e-9)
+
+
+def dtw_distance(template, window):
+    """DTW de subsecuencia con pendiente limitada: la plantilla completa contra cualquier tramo final de la ventana.
+
+    Pasos (1,1), (1,2) y (2,1); devuelve el coste medio por fila de la
+    plantilla para cada posible final en la ventana.
+    """
+    cost = 1.0 - template @ window.T          # distancia coseno (vectores normalizados)
+    n, m = cost.shape
+    inf = np.inf
+    prev2 = np.full(m, inf)
+    prev = cost[0].copy()                     # inicio libre en cualquier punto de la ventana
+    for i in range(1, n):
+        best = np.full(m, inf)
+        best[1:] = prev[:-1]                                  # (i-1, j-1)
+        best[2:] = np.minimum(best[2:], prev[:-2])            # (i-1, j-2)
+        best[1:] = np.minimum(best[1:], prev2[:-1])           # (i-2, j-1)
+        prev2, prev = prev, cost[i] + best
+    return prev / n
+
+
+class WakeWordSpotter:
+    """Detecta palabras de activación bloque a bloque sobre el flujo de captura.
+
+    threshold es la distancia DTW máxima para aceptar: más bajo reduce las
+    falsas activaciones y aumenta los rechazos (ver benchmarks/eval_wake_word.py).
+    """
+
+    def __init__(self, templates, threshold=0.15, cooldown=1.0):
+        # templates: {palabra: [matriz MFCC normalizada, ...]}
+        self.templates = templates
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.on_detect = None
+        self.min_distance = np.inf            # mejor distancia vista desde reset() (para evaluar)
+        longest = max(len(t) for ts in templates.values() for t in ts)
+        self._max_frames = int(longest * 1.5)
+        self._feats = deque(maxlen=self._max_frames)
+        self._extractor = None
+        self._voiced_frames = 0
+        self._last_detection = 0.0
+        self._detected = None
+        self._event = threading.Event()
+
+    @classmethod
+    def from_directory(cls, path, words, **kwargs):
+        """Carga las plantillas de path/<palabra>/*.wav; devuelve None si no hay ninguna"""
+        templates = {}
+        for word in words:
+            files = sorted(glob.glob(os.path.join(path, word, '*.wav')))
+            feats = []
+            for f in files:
+                samples, rate = read_wav(f)
+                mfcc = MfccExtractor(rate).push(samples)
+                if len(mfcc):
+                    feats.append(_normalize(mfcc))
+            if feats:
+                templates[word] = feats
+        if not templates:
+            return None
+        logging.info('Detector de activación con plantillas para: %s', ', '.join(templates))
+        return cls(templates, **kwargs)
+
+    def reset(self):
+        self._feats.clear()
+        self._extractor = None
+        self._voiced_frames = 0
+        self.min_distance = np.inf
+
+    def process(self, frame, voiced, sample_rate):
+        """Procesa un bloque PCM de la captura; devuelve la detección o None"""
+        if self._extractor is None or self._extractor.sample_rate != sample_rate:
+            self._extractor = MfccExtractor(sample_rate)
+        feats = self._extractor.push(pcm_to_float(frame))
+        if len(feats):
+            self._feats.extend(_normalize(feats))
+        # Sólo se compara cuando ha habido voz en la ventana reciente
+        self._voiced_frames = len(self._feats) if voiced else max(0, self._voiced_frames - len(feats))
+        if not self._voiced_frames or len(self._feats) < 10:
+            return None
+        window = np.array(self._feats)
+        tail = max(1, len(feats))
+        best_word, best = None, np.inf
+        for word, templates in self.templates.items():
+            for template in templates:
+                d = dtw_distance(template, window)[-tail:].min()
+                if d < best:
+                    best_word, best = word, d
+        self.min_distance = min(self.min_distance, best)
+        now = time.perf_counter()
+        if best > self.threshold or now - self._last_detection < self.cooldown:
+            return None
+        self._last_detection = now
+        self._feats.clear()
+        span = len(self.templates[best_word][0]) * self._extractor.hop / sample_rate
+        detection = Detection(best_word, float(best), now - span, now)
+        self._detected = detection
+        self._event.set()
+        if self.on_detect:
+            self.on_detect(detection)
+        return detection
+
+    def wait(self, timeout=None):
+        """Espera la próxima detección (ignora las anteriores a la llamada)"""
+        self._event.clear()
+        if not self._event.wait(timeout):
+            return None
+        return self._detected
+
+
+def record_templates(word, count, directory):
+    """Graba count ejemplos de la palabra con el micrófono"""
+    from audio_capture import AudioCapture, CaptureClosed, MicrophoneSource
+    os.makedirs(os.path.join(directory, word), exist_ok=True)
+    capture = AudioCapture(MicrophoneSource(), pause_threshold=0.5, pre_roll=0.1)
+    capture.start()
+    try:
+        for i in range(count):
+            print(f'[{i + 1}/{count}] Di "{word}"...')
+            try:
+                segment = capture.next_segment(timeout=10)
+            except CaptureClosed:
+                print('El micrófono dejó de grabar')
+                break
+            if segment is None:
+                print('No se oyó nada')
+                continue
+            path = os.path.join(directory, word, f'{int(time.time() * 1000)}.wav')
+            with wave.open(path, 'wb') as w:
+                w.setnchannels(1)
+                w.setsampwidth(segment.sample_width)
+                w.setframerate(segment.sample_rate)
+                w.writeframes(segment.data)
+            print(f'Guardado {path}')
+    finally:
+        capture.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plantillas del detector de palabra de activación')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    rec = sub.add_parser('record', help='graba ejemplos de una palabra')
+    rec.add_argument('word')
+    rec.add_argument('--count', type=int, default=5)
+    rec.add_argument('--dir', default='wake_words')
+    args = parser.parse_args()
+    if args.cmd == 'record':
+        record_templates(args.word, args.count, args.dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+import csv
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+
+def normalize_name(name):
+    """Nombre de proceso comparable entre plataformas ("Chrome.exe" -> "chrome")"""
+    name = os.path.basename(name.strip().lower())
+    return name[:-4] if name.endswith('.exe') else name
+
+
+class ProbeBackend:
+    """Interfaz de los sondeos de procesos y ventanas de cada plataforma.
+
+    process_names() devuelve los nombres normalizados de los procesos en
+    ejecución; foreground() el del proceso con la ventana activa (o None si
+    no se sabe) y focus() intenta traer al frente una ventana del proceso.
+    """
+
+    name = None
+
+    def process_names(self):
+        raise NotImplementedError
+
+    def foreground(self):
+        return None
+
+    def focus(self, process):
+        return False
+
+
+class PsutilBackend(ProbeBackend):
+    """Procesos con psutil (cualquier plataforma)"""
+
+    name = 'psutil'
+
+    def __init__(self):
+        import psutil
+        self._psutil = psutil
+
+    def process_names(self):
+        names = set()
+        for p in self._psutil.process_iter(['name']):
+            if p.info.get('name'):
+                names.add(normalize_name(p.info['name']))
+        return names
+
+    def name_of(self, pid):
+        try:
+            return normalize_name(self._psutil.Process(pid).name())
+        except Exception:
+            return None
+
+
+class ProcBackend(ProbeBackend):
+    """Procesos leyendo /proc/<pid>/comm en Linux (sin dependencias); ventanas con xdotool si existe"""
+
+    name = 'proc'
+
+    def __init__(self, root='/proc'):
+        self.root = root
+
+    def process_names(self):
+        names = set()
+        for entry in os.listdir(self.root):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(os.path.join(self.root, entry, 'comm'), encoding='utf-8', errors='replace') as f:
+                    names.add(normalize_name(f.read()))
+            except OSError:
+                continue      # el proceso terminó mientras se leía
+        return names
+
+    def name_of(self, pid):
+        try:
+            with open(os.path.join(self.root, str(pid), 'comm'), encoding='utf-8', errors='replace') as f:
+                return normalize_name(f.read())
+        except OSError:
+            return None
+
+    def foreground(self):
+        try:
+            pid = subprocess.check_output(['xdotool', 'getactivewindow', 'getwindowpid'],
+                                          stderr=subprocess.DEVNULL, timeout=1)
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return self.name_of(int(pid.strip() or 0))
+
+    def focus(self, process):
+        try:
+            subprocess.run(['xdotool', 'search', '--onlyvisible', '--class', process, 'windowactivate'],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=2, check=True)
+            return True
+        except (OSError, subprocess.SubprocessError):
+            return False
+
+
+class WindowsBackend(ProbeBackend):
+    """Procesos con psutil (o tasklist si no está) y ventanas con la API de user32"""
+
+    name = 'windows'
+
+    def __init__(self):
+        try:
+            self._procs = PsutilBackend()
+        except ImportError:
+            self._procs = None
+        import ctypes
+        from ctypes import wintypes
+        self._ctypes = ctypes
+        self._wintypes = wintypes
+        self._user32 = ctypes.windll.user32
+
+    def process_names(self):
+        if self._procs is not None:
+            return self._procs.process_names()
+        return set(self._tasklist().values())
+
+    def _tasklist(self):
+        """{pid: nombre} de todos los procesos con una sola llamada a tasklist"""
+        out = subprocess.check_output(['tasklist', '/fo', 'csv', '/nh']).decode('cp1252', errors='replace')
+        names = {}
+        for row in csv.reader(out.splitlines()):
+            if len(row) > 1 and row[1].isdigit():
+                names[int(row[1])] = normalize_name(row[0])
+        return names
+
+    def _pid_names(self):
+        """Función pid -> nombre: psutil si está; si no, un único tasklist para toda la consulta"""
+        if self._procs is not None:
+            return self._procs.name_of
+        return self._tasklist().get
+
+    def _window_pid(self, hwnd):
+        pid = self._wintypes.DWORD()
+        self._user32.GetWindowThreadProcessId(hwnd, self._ctypes.byref(pid))
+        return pid.value
+
+    def foreground(self):
+        hwnd = self._user32.GetForegroundWindow()
+        return self._pid_names()(self._window_pid(hwnd)) if hwnd else None
+
+    def focus(self, process):
+        found = []
+        pid_name = self._pid_names()
+        names = {}
+
+        def callback(hwnd, _):
+            if self._user32.IsWindowVisible(hwnd) and self._user32.GetWindowTextLengthW(hwnd):
+                pid = self._window_pid(hwnd)
+                if pid not in names:
+                    names[pid] = pid_name(pid)
+                if names[pid] == process:
+                    found.append(hwnd)
+                    return False
+            return True
+        proto = self._ctypes.WINFUNCTYPE(self._wintypes.BOOL, self._wintypes.HWND, self._wintypes.LPARAM)
+        self._user32.EnumWindows(proto(callback), 0)
+        if not found:
+            return False
+        self._user32.ShowWindow(found[0], 9)          # SW_RESTORE
+        return bool(self._user32.SetForegroundWindow(found[0]))
+
+
+class FakeBackend(ProbeBackend):
+    """Sondeo simulado para pruebas: procesos y ventana activa fijados a mano, cuenta las consultas"""
+
+    name = 'fake'
+
+    def __init__(self, processes=(), foreground=None, latency=0.0):
+        self.processes = {normalize_name(p) for p in processes}
+        self.active = foreground and normalize_name(foreground)
+        self.latency = latency
+        self.calls = {'process_names': 0, 'foreground': 0, 'focus': 0}
+
+    def process_names(self):
+        self.calls['process_names'] += 1
+        time.sleep(self.latency)
+        return set(self.processes)
+
+    def foreground(self):
+        self.calls['foreground'] += 1
+        time.sleep(self.latency)
+        return self.active
+
+    def focus(self, process):
+        self.calls['focus'] += 1
+        time.sleep(self.latency)
+        if process in self.processes:
+            self.active = process
+            return True
+        return False
+
+
+def make_backend():
+    """Elige el sondeo de la plataforma actual"""
+    if sys.platform == 'win32':
+        return WindowsBackend()
+    if os.path.isdir('/proc'):
+        return ProcBackend()
+    try:
+        return PsutilBackend()
+    except ImportError:
+        logging.warning("Sondeo de procesos no disponible: instala psutil ('pip install psutil')")
+        return FakeBackend()
+
+
+class ProcessProbe:
+    """Estado de procesos y ventana activa con caché de corta duración.
+
+    Las consultas al sistema se repiten como mucho cada ttl segundos (la
+    ventana activa cada foreground_ttl). Lo que hace el propio asistente
+    (lanzar el navegador, enfocarlo) actualiza la caché sin consultar.
+    """
+
+    def __init__(self, backend=None, ttl=5.0, foreground_ttl=1.0):
+        self._backend = backend
+        self.ttl = ttl
+        self.foreground_ttl = foreground_ttl
+        self._lock = threading.Lock()
+        self._names = None
+        self._names_at = 0.0
+        self._active = None
+        self._active_at = 0.0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = make_backend()
+            logging.info('Sondeo de procesos: %s', self._backend.name)
+        return self._backend
+
+    def _process_names(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._names is not None and now - self._names_at < self.ttl:
+                return self._names
+        try:
+            names = self.backend.process_names()
+        except Exception as e:
+            logging.error(f"Error al consultar procesos: {e}")
+            names = set()
+        with self._lock:
+            self._names, self._names_at = names, time.monotonic()
+        return names
+
+    def is_running(self, process):
+        return normalize_name(process) in self._process_names()
+
+    def foreground(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._active_at and now - self._active_at < self.foreground_ttl:
+                return self._active
+        try:
+            active = self.backend.foreground()
+        except Exception as e:
+            logging.error(f"Error al consultar la ventana activa: {e}")
+            active = None
+        with self._lock:
+            self._active, self._active_at = active, time.monotonic()
+        return active
+
+    def is_foreground(self, process):
+        return self.foreground() == normalize_name(process)
+
+    def focus(self, process):
+        """Trae el proceso al frente salvo que ya lo esté; devuelve False si no se pudo"""
+        process = normalize_name(process)
+        if self.is_foreground(process):
+            return True
+        try:
+            ok = self.backend.focus(process)
+        except Exception as e:
+            logging.error(f"Error al enfocar {process}: {e}")
+            ok = False
+        if ok:
+            self.note_foreground(process)
+        return ok
+
+    def note_started(self, process):
+        """Evento: el asistente acaba de lanzar el proceso (queda en marcha y al frente)"""
+        process = normalize_name(process)
+        with self._lock:
+            if self._names is not None:
+                self._names = self._names | {process}
+        self.note_foreground(process)
+
+    def note_foreground(self, process):
+        with self._lock:
+            self._active, self._active_at = normalize_name(process), time.monotonic()
+
+    def invalidate(self):
+        """Olvida lo cacheado (p. ej. tras un cambio que el asistente no controla)"""
+        with self._lock:
+            self._names = None
+            self._active_at = 0.0